@@ -1,30 +1,55 @@
 from django.contrib import admin
+from django.http import HttpResponseRedirect
+from django.utils import timezone
 from .models import (
     RecipeView, RecipeLike, RecipeComment, RecipeShare, 
-    RecipeSave, UserFollowing, DailyAnalyticsSummary
+    RecipeSave, UserFollowing, DailyAnalyticsSummary, RecipeDailyStats,
+    EngagementEvent, TrendingRecipe
 )
+from .pagination import EstimatedCountPaginator
+
+
+class EventTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for the large, partitioned event tables: estimated
+    counts, date drill-down instead of filters that join recipes, and raw id
+    widgets instead of select boxes listing every recipe and user.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ['recipe', 'user']
+    raw_id_fields = ['recipe', 'user']
+    
+    def changelist_view(self, request, extra_context=None):
+        # Open on today: the top level of a date hierarchy runs MIN/MAX and
+        # DISTINCT years over the whole table, a single day prunes to one partition
+        field = self.date_hierarchy
+        if request.method == 'GET' and field and not any(key.startswith(f'{field}__') for key in request.GET):
+            today = timezone.localdate()
+            params = request.GET.copy()
+            params.update({f'{field}__year': today.year, f'{field}__month': today.month, f'{field}__day': today.day})
+            return HttpResponseRedirect(f'{request.path}?{params.urlencode()}')
+        return super().changelist_view(request, extra_context)
 
 @admin.register(RecipeView)
-class RecipeViewAdmin(admin.ModelAdmin):
+class RecipeViewAdmin(EventTableAdmin):
     list_display = ['recipe', 'user', 'ip_address', 'viewed_at', 'time_spent']
-    list_filter = ['viewed_at', 'recipe__category']
+    date_hierarchy = 'viewed_at'
     search_fields = ['recipe__title', 'user__username', 'ip_address']
     readonly_fields = ['id', 'viewed_at']
-    
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related('recipe', 'user')
+    raw_id_fields = EventTableAdmin.raw_id_fields + ['user_agent', 'referrer']
 
 @admin.register(RecipeLike)
-class RecipeLikeAdmin(admin.ModelAdmin):
+class RecipeLikeAdmin(EventTableAdmin):
     list_display = ['recipe', 'user', 'created_at']
-    list_filter = ['created_at', 'recipe__category']
+    date_hierarchy = 'created_at'
     search_fields = ['recipe__title', 'user__username']
     readonly_fields = ['created_at']
 
 @admin.register(RecipeComment)
-class RecipeCommentAdmin(admin.ModelAdmin):
+class RecipeCommentAdmin(EventTableAdmin):
     list_display = ['recipe', 'user', 'comment_preview', 'created_at']
-    list_filter = ['created_at', 'recipe__category']
+    date_hierarchy = 'created_at'
     search_fields = ['recipe__title', 'user__username', 'comment']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -33,16 +58,17 @@ class RecipeCommentAdmin(admin.ModelAdmin):
     comment_preview.short_description = 'Comment Preview'
 
 @admin.register(RecipeShare)
-class RecipeShareAdmin(admin.ModelAdmin):
+class RecipeShareAdmin(EventTableAdmin):
     list_display = ['recipe', 'user', 'platform', 'shared_at']
-    list_filter = ['platform', 'shared_at', 'recipe__category']
+    list_filter = ['platform']
+    date_hierarchy = 'shared_at'
     search_fields = ['recipe__title', 'user__username']
     readonly_fields = ['shared_at']
 
 @admin.register(RecipeSave)
-class RecipeSaveAdmin(admin.ModelAdmin):
+class RecipeSaveAdmin(EventTableAdmin):
     list_display = ['recipe', 'user', 'saved_at']
-    list_filter = ['saved_at', 'recipe__category']
+    date_hierarchy = 'saved_at'
     search_fields = ['recipe__title', 'user__username']
     readonly_fields = ['saved_at']
 
@@ -61,4 +87,31 @@ class DailyAnalyticsSummaryAdmin(admin.ModelAdmin):
     readonly_fields = ['date']
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user')
\ No newline at end of file
+        return super().get_queryset(request).select_related('user')
+
+@admin.register(RecipeDailyStats)
+class RecipeDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['recipe', 'date', 'views', 'unique_visitors', 'likes', 'comments', 'shares', 'saves']
+    list_filter = ['date']
+    search_fields = ['recipe__title']
+    readonly_fields = ['date']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('recipe')
+
+@admin.register(EngagementEvent)
+class EngagementEventAdmin(EventTableAdmin):
+    list_display = ['event_type', 'recipe', 'user', 'created_at']
+    list_filter = ['event_type']
+    date_hierarchy = 'created_at'
+    search_fields = ['recipe__title', 'user__username']
+    readonly_fields = ['created_at']
+
+@admin.register(TrendingRecipe)
+class TrendingRecipeAdmin(admin.ModelAdmin):
+    list_display = ['rank', 'recipe', 'category', 'score', 'computed_at']
+    list_filter = ['category']
+    search_fields = ['recipe__title']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('recipe', 'category')
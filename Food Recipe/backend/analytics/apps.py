@@ -6,4 +6,5 @@ class AnalyticsConfig(AppConfig):
     name = "analytics"
     
     def ready(self):
+        import analytics.checks
         import analytics.signals
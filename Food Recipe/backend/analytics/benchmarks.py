@@ -0,0 +1,192 @@
+# analytics/benchmarks.py
+"""
+Percentile benchmarks of a chef's recipes against the platform.
+
+The nightly aggregation stores, per day, a KLL sketch (analytics/quantiles.py)
+of each per-recipe daily metric over every recipe that existed that day,
+platform-wide and per category. For each of the WINDOWS it then sketches
+every recipe's mean daily value over the window (its window total from
+RecipeDailyStats divided by the window length), which is exactly what the
+dashboard compares a chef's recipes by: merging the daily sketches instead
+would rank a recipe's average against single days, most of them zero. The
+dashboard reads a single window row per (metric, category), so a request
+never touches other chefs' data.
+"""
+import statistics
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from recipe.models import Recipe
+from .models import MetricQuantileSketch, RecipeDailyStats
+from .quantiles import KLLSketch
+from .timeseries import day_range
+
+BENCHMARK_METRICS = ['views', 'likes', 'comments', 'shares', 'saves']
+
+# Dashboard range -> merged window (days ending at the latest aggregated day)
+WINDOWS = {'7days': 7, '30days': 30, '90days': 90, '12months': 365}
+
+
+def compute_metric_sketches(day, recipe_stats):
+    """
+    Sketch every recipe's metrics for day; recipes with no activity count as zeros.
+
+    Args:
+        day (date): The aggregated day.
+        recipe_stats (dict): {(recipe_id, date): RecipeDailyStats} as returned by compute_recipe_daily_stats.
+
+    Returns:
+        dict: {(metric, category_id or None): KLLSketch}
+    """
+    active = {
+        recipe_id: {metric: getattr(stats, metric) for metric in BENCHMARK_METRICS}
+        for (recipe_id, stats_date), stats in recipe_stats.items() if stats_date == day
+    }
+    return sketch_recipe_values(day, active)
+
+
+def sketch_recipe_values(day, values):
+    """
+    Sketch per-recipe metric values over every recipe that existed on day.
+
+    Args:
+        day (date): Recipes created after it are left out.
+        values (dict): {recipe_id: {metric: value}}; existing recipes missing from it count as zeros.
+
+    Returns:
+        dict: {(metric, category_id or None): KLLSketch}
+    """
+    existing = dict(
+        Recipe.objects.filter(created_at__lt=day_range(day, day)[1]).values_list('pk', 'category_id').order_by()
+    )
+    recipes_per_category = Counter(existing.values())
+    categories = {recipe_id: existing[recipe_id] for recipe_id in values if recipe_id in existing}
+
+    sketches = defaultdict(KLLSketch)
+    for recipe_id, category_id in categories.items():
+        metrics = values[recipe_id]
+        for metric in BENCHMARK_METRICS:
+            value = metrics[metric]
+            sketches[(metric, None)].add(value)
+            if category_id is not None:
+                sketches[(metric, category_id)].add(value)
+
+    active_per_category = Counter(categories.values())
+    for metric in BENCHMARK_METRICS:
+        sketches[(metric, None)].add_zeros(sum(recipes_per_category.values()) - len(categories))
+        for category_id, total in recipes_per_category.items():
+            if category_id is not None:
+                sketches[(metric, category_id)].add_zeros(total - active_per_category[category_id])
+    return sketches
+
+
+def store_metric_sketches(day, sketches, window_days=1):
+    """Replace the sketches of (day, window_days) (idempotent)"""
+    with transaction.atomic():
+        MetricQuantileSketch.objects.filter(date=day, window_days=window_days).delete()
+        MetricQuantileSketch.objects.bulk_create([
+            MetricQuantileSketch(
+                date=day, window_days=window_days, metric=metric,
+                category_id=category_id, sketch=sketch.to_bytes()
+            )
+            for (metric, category_id), sketch in sketches.items()
+        ], batch_size=500)
+
+
+def window_daily_means(end_date):
+    """
+    Every recipe's mean daily metrics over each WINDOWS length ending at end_date, in one scan.
+
+    Returns:
+        dict: {window_days: {recipe_id: {metric: mean per day}}}
+    """
+    windows = sorted(set(WINDOWS.values()))
+    aggregates = {
+        f'{metric}_{days}': Sum(metric, filter=Q(date__gt=end_date - timedelta(days=days)))
+        for days in windows for metric in BENCHMARK_METRICS
+    }
+    rows = (
+        RecipeDailyStats.objects.filter(date__gt=end_date - timedelta(days=windows[-1]), date__lte=end_date)
+        .values('recipe_id').annotate(**aggregates).order_by()
+    )
+    means = {days: {} for days in windows}
+    for row in rows.iterator(chunk_size=2000):
+        for days in windows:
+            means[days][row['recipe_id']] = {
+                metric: (row[f'{metric}_{days}'] or 0) / days for metric in BENCHMARK_METRICS
+            }
+    return means
+
+
+def build_window_sketches(end_date):
+    """Sketch the recipes' mean daily metrics over each WINDOWS length ending at end_date and store them"""
+    for days, values in window_daily_means(end_date).items():
+        store_metric_sketches(end_date, sketch_recipe_values(end_date, values), window_days=days)
+
+
+def get_benchmarks(recipes, breakdown, time_range):
+    """
+    Where the chef's median recipe ranks, per metric, platform-wide and in each of their categories.
+
+    A recipe's value is its mean daily count over the window, the same
+    quantity the window sketches hold for every other recipe.
+
+    Args:
+        recipes (list): (recipe_id, category_id, category name) of the chef's recipes.
+        breakdown (dict): {recipe_id: {metric: count}} over the range (combine_summaries()['recipes']).
+        time_range (str): Dashboard range, a WINDOWS key.
+
+    Returns:
+        dict or None: None until the nightly job has stored window sketches.
+    """
+    window = WINDOWS.get(time_range, WINDOWS['30days'])
+    latest = (
+        MetricQuantileSketch.objects.filter(window_days=window)
+        .order_by('-date').values_list('date', flat=True).first()
+    )
+    if latest is None or not recipes:
+        return None
+
+    category_ids = {category_id for _, category_id, _ in recipes if category_id is not None}
+    sketches = {
+        (metric, category_id): KLLSketch.from_bytes(data)
+        for metric, category_id, data in MetricQuantileSketch.objects.filter(
+            Q(category__isnull=True) | Q(category_id__in=category_ids),
+            date=latest, window_days=window,
+        ).values_list('metric', 'category_id', 'sketch')
+    }
+
+    def median_daily(recipe_ids, metric):
+        return statistics.median(breakdown.get(recipe_id, {}).get(metric, 0) / window for recipe_id in recipe_ids)
+
+    def percentile(sketch, value):
+        return round(sketch.rank(value) * 100) if sketch is not None else None
+
+    by_category = defaultdict(list)
+    names = {}
+    for recipe_id, category_id, name in recipes:
+        if category_id is not None:
+            by_category[category_id].append(recipe_id)
+            names[category_id] = name
+
+    metrics = []
+    for metric in BENCHMARK_METRICS:
+        median = median_daily([recipe_id for recipe_id, _, _ in recipes], metric)
+        metrics.append({
+            'metric': metric,
+            'medianRecipeDaily': round(median, 2),
+            'platformPercentile': percentile(sketches.get((metric, None)), median),
+            'categories': [
+                {
+                    'name': names[category_id],
+                    'medianRecipeDaily': round(category_median, 2),
+                    'percentile': percentile(sketches.get((metric, category_id)), category_median),
+                }
+                for category_id, recipe_ids in sorted(by_category.items(), key=lambda item: names[item[0]])
+                for category_median in [median_daily(recipe_ids, metric)]
+            ],
+        })
+    return {'asOf': latest, 'windowDays': window, 'metrics': metrics}
@@ -0,0 +1,94 @@
+# analytics/bloom.py
+"""
+Per-process filter of recently seen (recipe, viewer) pairs.
+
+Two Bloom filter generations are kept: lookups check both, inserts go to the
+current one, and when it holds `capacity` items the previous generation is
+discarded and a fresh one started. Memory stays bounded and "recent" means
+roughly the last 1-2 x capacity distinct pairs.
+"""
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for capacity items at error_rate"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.bits_set = 0
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, value):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(value))
+
+    def add(self, value):
+        for p in self._positions(value):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                self.bits_set += 1
+        self.count += 1
+
+    def false_positive_rate(self):
+        """Current false-positive probability, from the share of bits set"""
+        return (self.bits_set / self.size) ** self.hashes
+
+
+class SeenFilter:
+    """Rotating pair of Bloom filters with hit/miss counters"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = None
+        self.checked = 0
+        self.hits = 0
+        self.rotations = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, value):
+        self.checked += 1
+        found = value in self.current or (self.previous is not None and value in self.previous)
+        if found:
+            self.hits += 1
+        return found
+
+    def add(self, value):
+        if self.current.count >= self.capacity:
+            with self._lock:
+                if self.current.count >= self.capacity:
+                    self.previous = self.current
+                    self.current = BloomFilter(self.capacity, self.error_rate)
+                    self.rotations += 1
+        self.current.add(value)
+
+    def false_positive_rate(self):
+        """Probability that an unseen pair is reported as seen by either generation"""
+        miss = 1 - self.current.false_positive_rate()
+        if self.previous is not None:
+            miss *= 1 - self.previous.false_positive_rate()
+        return 1 - miss
+
+    def stats(self):
+        return {
+            'checked': self.checked,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.checked, 4) if self.checked else 0,
+            'estimated_false_positive_rate': round(self.false_positive_rate(), 6),
+            'items': self.current.count + (self.previous.count if self.previous else 0),
+            'capacity': self.capacity,
+            'rotations': self.rotations,
+            'memory_bytes': len(self.current.bits) * (2 if self.previous else 1),
+        }
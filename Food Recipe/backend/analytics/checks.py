@@ -0,0 +1,31 @@
+# analytics/checks.py
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+from .dashboard_cache import is_shared_cache
+
+
+def _cache_issue(level, check_id):
+    if is_shared_cache():
+        return []
+    return [level(
+        f"The default cache ({settings.CACHES['default']['BACKEND']}) is not Redis or Memcached.",
+        hint='Set CACHE_URL, e.g. CACHE_URL=redis://localhost:6379/1.',
+        id=check_id,
+    )]
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The dashboard cache, its version counters and the recipe counters are
+    shared state between workers; a per-process or database cache breaks
+    invalidation or puts every hot-path cache call back on the database.
+    """
+    return _cache_issue(Warning, 'analytics.W001')
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    """`check --deploy` fails outright without a shared cache"""
+    return _cache_issue(Error, 'analytics.E001')
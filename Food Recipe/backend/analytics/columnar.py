@@ -0,0 +1,135 @@
+# analytics/columnar.py
+"""
+Columnar export of the engagement log for offline reports.
+
+Each closed day of EngagementEvent rows is written once, by the
+export_analytics_events command, to
+
+    <ANALYTICS_EXPORT_DIR>/events/date=YYYY-MM-DD/<column>.npy
+
+with one NumPy file per column and a _SUCCESS marker written last, so a
+half-written day is never read. Reports memory-map only the columns they
+need (see analytics/reports.py).
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models.functions import Extract
+
+from .models import EngagementEvent
+from .timeseries import day_range
+
+EXPORT_DIR = Path(getattr(settings, 'ANALYTICS_EXPORT_DIR', settings.BASE_DIR / 'analytics_export'))
+EVENTS_DIR = EXPORT_DIR / 'events'
+
+# column -> dtype; created_at is a Unix timestamp, user_id is 0 for anonymous events
+COLUMNS = {
+    'event_type': np.uint8,
+    'recipe_id': np.int64,
+    'author_id': np.int64,
+    'user_id': np.int64,
+    'visitor': np.int64,
+    'created_at': np.int64,
+}
+
+SUCCESS_MARKER = '_SUCCESS'
+CHUNK_SIZE = 50000
+
+
+def day_dir(day):
+    return EVENTS_DIR / f'date={day:%Y-%m-%d}'
+
+
+def is_exported(day):
+    return (day_dir(day) / SUCCESS_MARKER).exists()
+
+
+def exported_days():
+    """Sorted dates with a complete export"""
+    if not EVENTS_DIR.exists():
+        return []
+    return sorted(
+        date.fromisoformat(path.parent.name[len('date='):])
+        for path in EVENTS_DIR.glob(f'date=*/{SUCCESS_MARKER}')
+    )
+
+
+def export_day(day):
+    """
+    Write one day of EngagementEvents as column files, replacing any earlier export.
+
+    Returns:
+        int: rows written.
+    """
+    range_start, range_end = day_range(day, day)
+    rows = (
+        EngagementEvent.objects
+        .filter(created_at__gte=range_start, created_at__lt=range_end)
+        .annotate(ts=Extract('created_at', 'epoch'))
+        .values_list('event_type', 'recipe_id', 'recipe__author_id', 'user_id', 'visitor', 'ts')
+        .order_by()
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    chunks = {name: [] for name in COLUMNS}
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) == CHUNK_SIZE:
+            _add_chunk(chunks, buffer)
+            buffer = []
+    if buffer:
+        _add_chunk(chunks, buffer)
+
+    target = day_dir(day)
+    tmp = target.with_name(target.name + '.tmp')
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    count = 0
+    for name, dtype in COLUMNS.items():
+        column = np.concatenate(chunks[name]) if chunks[name] else np.empty(0, dtype=dtype)
+        np.save(tmp / f'{name}.npy', column)
+        count = len(column)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    (target / SUCCESS_MARKER).write_text(json.dumps({'rows': count}))
+    return count
+
+
+def _add_chunk(chunks, rows):
+    for name, dtype, values in zip(COLUMNS, COLUMNS.values(), zip(*rows)):
+        # None (anonymous user) becomes 0
+        chunks[name].append(np.array([value or 0 for value in values], dtype=dtype))
+
+
+def load_columns(start_date, end_date, columns):
+    """
+    Concatenate the exported days of start_date..end_date, memory-mapping each file.
+
+    Returns:
+        tuple: ({column: ndarray}, [dates loaded])
+    """
+    days = [day for day in exported_days() if start_date <= day <= end_date]
+    arrays = {
+        name: np.concatenate(
+            [np.load(day_dir(day) / f'{name}.npy', mmap_mode='r') for day in days]
+        ) if days else np.empty(0, dtype=COLUMNS[name])
+        for name in columns
+    }
+    return arrays, days
+
+
+def export_version(start_date, end_date):
+    """Changes whenever a day in the range is (re-)exported; used in report cache keys"""
+    stamps = [
+        f'{day:%Y%m%d}.{(day_dir(day) / SUCCESS_MARKER).stat().st_mtime_ns}'
+        for day in exported_days() if start_date <= day <= end_date
+    ]
+    return hashlib.md5(','.join(stamps).encode()).hexdigest()[:12]
@@ -0,0 +1,116 @@
+# analytics/dashboard_cache.py
+"""
+Cache of assembled RecipeAnalyticsView responses, per (author, range).
+
+Entries are keyed on a per-author version number, so invalidation is a
+single cache.incr(): old entries simply stop being read and expire on their
+own. Writers (EngagementEvent logging, new followers) bump the version at
+most once per VERSION_BUMP_INTERVAL seconds per author, so a burst of events
+on a popular chef's recipes costs one increment instead of one per event.
+Events that land inside that window show up when the entry's TTL runs out.
+All of this assumes a cache shared by every worker (Redis or Memcached, see
+is_shared_cache and the analytics.E001 check).
+
+TTLs grow with the range: a 7 day dashboard is mostly recent, still-changing
+days, while a 12 month one is almost entirely closed days from the rollups.
+
+Settings (all optional):
+    ANALYTICS_DASHBOARD_CACHE_TTLS = {'7days': 60, '30days': 300, '90days': 900, '12months': 3600}
+    ANALYTICS_DASHBOARD_VERSION_BUMP_INTERVAL = 30  # seconds
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipe.models import Recipe
+
+DASHBOARD_CACHE_TTLS = {
+    '7days': 60,
+    '30days': 300,
+    '90days': 900,
+    '12months': 3600,
+    **getattr(settings, 'ANALYTICS_DASHBOARD_CACHE_TTLS', {}),
+}
+DEFAULT_RANGE = '30days'
+VERSION_BUMP_INTERVAL = getattr(settings, 'ANALYTICS_DASHBOARD_VERSION_BUMP_INTERVAL', 30)
+
+SHARED_CACHE_BACKENDS = frozenset({
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+})
+
+
+def is_shared_cache():
+    """Whether the default cache is an in-memory store shared by all processes"""
+    return settings.CACHES['default']['BACKEND'] in SHARED_CACHE_BACKENDS
+
+
+def _version_key(author_id):
+    return f'analytics_dashboard_version:{author_id}'
+
+
+def _dashboard_key(author_id, time_range, version):
+    return f'analytics_dashboard:{author_id}:{time_range}:{version}'
+
+
+def get_author_version(author_id):
+    key = _version_key(author_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_author_versions(author_ids):
+    """Invalidate the cached dashboards of these authors, at most once per interval each"""
+    for author_id in set(author_ids):
+        # cache.add only succeeds for the first writer in the interval, across processes
+        if not cache.add(f'analytics_dashboard_bumped:{author_id}', 1, VERSION_BUMP_INTERVAL):
+            continue
+        try:
+            cache.incr(_version_key(author_id))
+        except ValueError:
+            # No version yet, so nothing is cached under it either
+            cache.add(_version_key(author_id), 1, None)
+
+
+def bump_recipe_authors(recipe_ids):
+    """bump_author_versions() for the authors of these recipes"""
+    recipe_ids = set(recipe_ids)
+    if recipe_ids:
+        bump_author_versions(
+            Recipe.objects.filter(pk__in=recipe_ids).values_list('author_id', flat=True).distinct()
+        )
+
+
+def normalize_range(time_range):
+    return time_range if time_range in DASHBOARD_CACHE_TTLS else DEFAULT_RANGE
+
+
+def get_cached_dashboard(author_id, time_range, build):
+    """
+    Return the author's dashboard for time_range, building it on a miss.
+
+    Args:
+        author_id (int): Dashboard owner.
+        time_range (str): One of DASHBOARD_CACHE_TTLS; anything else is DEFAULT_RANGE.
+        build (callable): Returns the response data; only called on a miss.
+
+    Returns:
+        tuple: (data, age in seconds, ttl, hit)
+    """
+    time_range = normalize_range(time_range)
+    ttl = DASHBOARD_CACHE_TTLS[time_range]
+    key = _dashboard_key(author_id, time_range, get_author_version(author_id))
+
+    entry = cache.get(key)
+    if entry is not None:
+        return entry['data'], int(time.time() - entry['computed_at']), ttl, True
+
+    data = build()
+    cache.set(key, {'data': data, 'computed_at': time.time()}, ttl)
+    return data, 0, ttl, False
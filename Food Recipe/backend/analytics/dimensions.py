@@ -0,0 +1,94 @@
+# analytics/dimensions.py
+"""
+Dictionary encoding of RecipeView user agents and referrers.
+
+Each distinct string is stored once in its dimension table (UserAgent,
+Referrer) under the MD5 hex digest of its value, and RecipeView rows keep
+only the integer id. Lookups go through a small per-process LRU cache of
+string -> id; misses are resolved for a whole batch with one INSERT ...
+ON CONFLICT DO NOTHING and one SELECT.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import UserAgent, Referrer
+
+CACHE_SIZE = getattr(settings, 'ANALYTICS_DIMENSION_CACHE_SIZE', 2048)
+
+
+def value_hash(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used key"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        return {'size': len(self._data), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+_caches = {UserAgent: LRUCache(CACHE_SIZE), Referrer: LRUCache(CACHE_SIZE)}
+
+
+def get_dimension_ids(model, values):
+    """
+    Map strings to their dimension ids, creating missing rows.
+
+    Args:
+        model: UserAgent or Referrer.
+        values: Iterable of strings; empty values are skipped.
+
+    Returns:
+        dict: {value: id}
+    """
+    cache = _caches[model]
+    ids = {}
+    missing = {}
+    for value in set(values):
+        if not value:
+            continue
+        cached = cache.get(value)
+        if cached is None:
+            missing[value_hash(value)] = value
+        else:
+            ids[value] = cached
+
+    if missing:
+        model.objects.bulk_create(
+            [model(hash=digest, value=value) for digest, value in missing.items()],
+            ignore_conflicts=True
+        )
+        for digest, pk in model.objects.filter(hash__in=missing).values_list('hash', 'pk'):
+            ids[missing[digest]] = pk
+            cache.set(missing[digest], pk)
+    return ids
+
+
+def cache_stats():
+    return {model._meta.model_name: cache.stats() for model, cache in _caches.items()}
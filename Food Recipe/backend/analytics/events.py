@@ -0,0 +1,50 @@
+# analytics/events.py
+"""
+Writers for the unified engagement log (EngagementEvent).
+
+Every view, like, comment, share and save is appended to one narrow table
+alongside the per-type tables, so dashboards can count several metrics in a
+single scan with conditional aggregates (see rollups.compute_recipe_daily_stats).
+Rows are never updated or deleted; retention drops whole monthly partitions
+(see analytics/partitions.py).
+"""
+import hashlib
+
+from .dashboard_cache import bump_recipe_authors
+from .models import EngagementEvent
+from .rollups import visitor_identity
+from .trending import add_trending_events
+
+
+def visitor_hash(user_id, session_key, ip_address):
+    """
+    Signed 64-bit hash of visitor_identity(); the backfill migration computes
+    the same value in SQL as ('x' || substr(md5(identity), 1, 16))::bit(64)::bigint.
+    """
+    identity = visitor_identity(user_id, session_key, ip_address)
+    return int.from_bytes(hashlib.md5(identity.encode()).digest()[:8], 'big', signed=True)
+
+
+def engagement_event(event_type, recipe_id, user_id=None, session_key=None, ip_address=None, created_at=None, **payload):
+    """Build an unsaved EngagementEvent; extra keyword arguments go into its payload"""
+    event = EngagementEvent(
+        event_type=event_type,
+        recipe_id=recipe_id,
+        user_id=user_id,
+        visitor=visitor_hash(user_id, session_key, ip_address),
+        payload={key: value for key, value in payload.items() if value} or None,
+    )
+    if created_at is not None:
+        event.created_at = created_at
+    return event
+
+
+def log_events(events):
+    """
+    Append unsaved EngagementEvents in one INSERT, add them to the trending
+    scores and invalidate the authors' cached dashboards.
+    """
+    if events:
+        EngagementEvent.objects.bulk_create(events, batch_size=1000)
+        add_trending_events(events)
+        bump_recipe_authors(event.recipe_id for event in events)
@@ -0,0 +1,156 @@
+# analytics/hyperloglog.py
+"""
+HyperLogLog sketches for approximate distinct counts (unique visitors).
+
+A sketch has 2**14 registers, which gives a standard error of about 0.8%.
+count() uses Ertl's improved estimator ("New cardinality estimation
+algorithms for HyperLogLog sketches", 2017), computed from the histogram of
+register values. The classic raw estimate with a linear-counting switch is
+biased by up to ~1.5% around 5 * REGISTERS (40-50k visitors); this one stays
+unbiased across the whole range without empirical correction tables.
+Sketches of different days or recipes merge by taking the register-wise
+maximum, so uniques over any range or set of recipes come from merging the
+stored daily sketches instead of scanning raw events.
+
+Small sketches are kept sparse ({register: rank}) and serialized as 3 bytes
+per register in use; once that is no longer smaller they switch to a dense,
+zlib-compressed register array.
+"""
+import hashlib
+import math
+import struct
+import zlib
+from collections import Counter
+
+PRECISION = 14
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64
+# Largest rank: every remainder bit zero
+MAX_RANK = HASH_BITS - PRECISION + 1
+ALPHA_INF = 1 / (2 * math.log(2))
+
+_SPARSE = b'S'
+_DENSE = b'D'
+_SPARSE_ENTRY = struct.Struct('>HB')
+# Past this many registers in use the dense form is smaller
+_SPARSE_LIMIT = REGISTERS // _SPARSE_ENTRY.size
+
+
+def _sigma(x):
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def _hash(value):
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HyperLogLog:
+    """Mergeable approximate distinct counter"""
+
+    def __init__(self):
+        self._sparse = {}
+        self._dense = None
+
+    def add(self, value):
+        h = _hash(value)
+        index = h >> (HASH_BITS - PRECISION)
+        remainder = h & ((1 << (HASH_BITS - PRECISION)) - 1)
+        rank = (HASH_BITS - PRECISION) - remainder.bit_length() + 1
+        self._set(index, rank)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one (in place) and return self"""
+        if other._dense is not None:
+            self._to_dense()
+            self._dense = bytearray(map(max, self._dense, other._dense))
+        else:
+            for index, rank in other._sparse.items():
+                self._set(index, rank)
+        return self
+
+    def count(self):
+        if self._dense is not None:
+            histogram = Counter(self._dense)
+        else:
+            histogram = Counter(self._sparse.values())
+            histogram[0] = REGISTERS - len(self._sparse)
+        z = REGISTERS * _tau(1 - histogram[MAX_RANK] / REGISTERS)
+        for rank in range(MAX_RANK - 1, 0, -1):
+            z = 0.5 * (z + histogram[rank])
+        z += REGISTERS * _sigma(histogram[0] / REGISTERS)
+        return int(round(ALPHA_INF * REGISTERS * REGISTERS / z))
+
+    def __len__(self):
+        return self.count()
+
+    def to_bytes(self):
+        if self._dense is not None:
+            return _DENSE + zlib.compress(bytes(self._dense))
+        return _SPARSE + b''.join(
+            _SPARSE_ENTRY.pack(index, rank) for index, rank in sorted(self._sparse.items())
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a serialized sketch; empty or missing data gives an empty sketch"""
+        sketch = cls()
+        if not data:
+            return sketch
+        data = bytes(data)
+        if data[:1] == _DENSE:
+            sketch._dense = bytearray(zlib.decompress(data[1:]))
+        else:
+            sketch._sparse = {
+                index: rank for index, rank in _SPARSE_ENTRY.iter_unpack(data[1:])
+            }
+        return sketch
+
+    @classmethod
+    def union(cls, sketches):
+        """Merge serialized or loaded sketches into a new one"""
+        merged = cls()
+        for sketch in sketches:
+            merged.merge(sketch if isinstance(sketch, cls) else cls.from_bytes(sketch))
+        return merged
+
+    def _set(self, index, rank):
+        if self._dense is not None:
+            if rank > self._dense[index]:
+                self._dense[index] = rank
+        elif rank > self._sparse.get(index, 0):
+            self._sparse[index] = rank
+            if len(self._sparse) > _SPARSE_LIMIT:
+                self._to_dense()
+
+    def _to_dense(self):
+        if self._dense is None:
+            self._dense = bytearray(REGISTERS)
+            for index, rank in self._sparse.items():
+                self._dense[index] = rank
+            self._sparse = {}
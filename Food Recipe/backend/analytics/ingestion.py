@@ -0,0 +1,339 @@
+# analytics/ingestion.py
+"""
+Buffered, asynchronous ingestion of recipe view events.
+
+Request handlers call enqueue_view(), which only puts a small tuple on a
+bounded in-process queue. A background thread drains the queue every
+BATCH_SIZE events or FLUSH_INTERVAL_MS milliseconds, dedupes the batch in
+memory and records first-time viewers with one INSERT ... ON CONFLICT DO
+NOTHING against the partial unique indexes on RecipeViewer (the partitioned
+RecipeView table cannot carry them), then inserts the matching RecipeView
+rows. When the queue is full the event is dropped and counted instead of
+slowing the request down.
+
+Before queueing, enqueue_view() checks a per-process Bloom filter of recently
+seen (recipe, viewer) pairs (analytics/bloom.py), so most repeat views are
+discarded without touching the queue or the database. Pairs are only added
+once their batch is committed, so a failed flush never suppresses the
+viewer's next view. A false positive can drop a genuine first view; its
+estimated rate is reported in stats().
+
+Settings (all optional):
+    ANALYTICS_INGESTION = {
+        'ASYNC': True,               # False writes each event inline (tests, shell)
+        'MAX_QUEUE_SIZE': 10000,
+        'BATCH_SIZE': 500,
+        'FLUSH_INTERVAL_MS': 1000,
+        'SEEN_FILTER_CAPACITY': 100000,  # pairs per filter generation
+        'SEEN_FILTER_ERROR_RATE': 0.01,
+    }
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from recipe.counters import increment_counters
+from .bloom import SeenFilter
+from .dimensions import get_dimension_ids
+from .events import engagement_event, log_events
+from .models import RecipeView, RecipeViewer, UserAgent, Referrer, EngagementEvent
+from .rollups import add_recipe_visitors, bump_recipe_daily_stats, visitor_identity
+
+logger = logging.getLogger(__name__)
+
+INGESTION_SETTINGS = {
+    'ASYNC': True,
+    'MAX_QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL_MS': 1000,
+    'SEEN_FILTER_CAPACITY': 100000,
+    'SEEN_FILTER_ERROR_RATE': 0.01,
+    **getattr(settings, 'ANALYTICS_INGESTION', {}),
+}
+
+# user_agent and referrer hold the raw strings; write_view_events swaps them
+# for dimension ids (analytics/dimensions.py) before inserting
+ViewEvent = namedtuple('ViewEvent', [
+    'recipe_id', 'user_id', 'session_key', 'ip_address',
+    'user_agent', 'referrer', 'time_spent', 'viewed_at',
+])
+
+# INSERT column list for RecipeView, in ViewEvent field order
+VIEW_COLUMNS = [
+    'recipe_id', 'user_id', 'session_key', 'ip_address',
+    'user_agent_id', 'referrer_id', 'time_spent', 'viewed_at',
+]
+
+
+def viewer_key(recipe_id, user_id, session_key, ip_address):
+    """Identity used for dedupe: user, else session, else IP (same rules as the unique indexes)"""
+    if user_id:
+        return (recipe_id, user_id, None, None)
+    if session_key:
+        return (recipe_id, None, session_key, None)
+    return (recipe_id, None, None, ip_address)
+
+
+def seen_key(event):
+    """Seen-filter entry for an event's (recipe, viewer) pair; None when the viewer is unknown"""
+    if event.user_id or event.session_key or event.ip_address:
+        return f'{event.recipe_id}|{visitor_identity(event.user_id, event.session_key, event.ip_address)}'
+    return None
+
+
+def remember_seen(events):
+    """Add the pairs of written events to the seen filter"""
+    for event in events:
+        key = seen_key(event)
+        if key:
+            seen_filter.add(key)
+
+
+def write_view_events(events):
+    """
+    Write a batch of view events, skipping viewers that already have a row.
+
+    Events for the same viewer and recipe are merged first (time spent is
+    summed). Rows that already exist only get their time_spent increased.
+    The recipes' view counters are bumped for the rows actually inserted.
+
+    Returns:
+        set: viewer keys (see viewer_key) of the newly inserted views.
+    """
+    merged = {}
+    for event in events:
+        key = viewer_key(event.recipe_id, event.user_id, event.session_key, event.ip_address)
+        if key in merged:
+            merged[key] = merged[key]._replace(time_spent=merged[key].time_spent + event.time_spent)
+        else:
+            merged[key] = event
+    if not merged:
+        return set()
+
+    table = connection.ops.quote_name(RecipeView._meta.db_table)
+    ledger = connection.ops.quote_name(RecipeViewer._meta.db_table)
+    rows = list(merged.values())
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {ledger} (recipe_id, user_id, session_key, ip_address, viewed_at) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))} "
+                "ON CONFLICT DO NOTHING RETURNING recipe_id, user_id, session_key, ip_address",
+                [value for row in rows for value in (row.recipe_id, row.user_id, row.session_key, row.ip_address, row.viewed_at)]
+            )
+            inserted = {viewer_key(*row) for row in cursor.fetchall()}
+
+            new_views = [row for key, row in merged.items() if key in inserted]
+            if new_views:
+                log_events([
+                    engagement_event(
+                        EngagementEvent.VIEW, row.recipe_id, row.user_id, row.session_key, row.ip_address,
+                        created_at=row.viewed_at, time_spent=row.time_spent
+                    )
+                    for row in new_views
+                ])
+                user_agents = get_dimension_ids(UserAgent, (row.user_agent for row in new_views))
+                referrers = get_dimension_ids(Referrer, (row.referrer for row in new_views))
+                new_views = [
+                    row._replace(user_agent=user_agents.get(row.user_agent), referrer=referrers.get(row.referrer))
+                    for row in new_views
+                ]
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(VIEW_COLUMNS)}) "
+                    f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(new_views))}",
+                    [value for row in new_views for value in row]
+                )
+
+            # Repeat visits only add to the time spent on the existing row; the
+            # ledger's viewed_at pins the update to a single partition
+            repeats = [
+                row for key, row in merged.items()
+                if key not in inserted and row.time_spent and (row.user_id or row.session_key)
+            ]
+            if repeats:
+                values = ', '.join(['(%s::bigint, %s::bigint, %s::varchar, %s::integer)'] * len(repeats))
+                cursor.execute(
+                    f"UPDATE {table} AS v SET time_spent = v.time_spent + d.time_spent "
+                    f"FROM (VALUES {values}) AS d(recipe_id, user_id, session_key, time_spent) "
+                    f"JOIN {ledger} AS l ON l.recipe_id = d.recipe_id AND ("
+                    "  l.user_id = d.user_id"
+                    "  OR (d.user_id IS NULL AND l.user_id IS NULL AND l.session_key = d.session_key)) "
+                    "WHERE v.recipe_id = l.recipe_id AND v.viewed_at = l.viewed_at "
+                    "AND v.user_id IS NOT DISTINCT FROM l.user_id AND v.session_key IS NOT DISTINCT FROM l.session_key",
+                    [value for row in repeats for value in (row.recipe_id, row.user_id, row.session_key, row.time_spent)]
+                )
+
+        views_per_recipe = Counter(key[0] for key in inserted)
+        increment_counters({(recipe_id, 'views'): count for recipe_id, count in views_per_recipe.items()})
+
+        # Today's per-recipe rollup: new rows are new views and visitors; time spent counts repeats too
+        daily = defaultdict(Counter)
+        visitors = defaultdict(list)
+        for key, row in merged.items():
+            if key in inserted:
+                daily[row.recipe_id]['views'] += 1
+                visitors[row.recipe_id].append(visitor_identity(row.user_id, row.session_key, row.ip_address))
+            daily[row.recipe_id]['time_spent_total'] += row.time_spent
+        bump_recipe_daily_stats(daily)
+        add_recipe_visitors(visitors)
+
+    return inserted
+
+
+class ViewIngestionBuffer:
+    """Bounded queue of ViewEvents drained by a background flusher thread"""
+
+    def __init__(self, max_size, batch_size, flush_interval_ms):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.duplicates = 0
+        self.skipped_seen = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def enqueue(self, event):
+        """Queue an event without blocking. Returns False if it was dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def stats(self):
+        total = self.skipped_seen + self.enqueued
+        return {
+            'pid': os.getpid(),
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'queue_capacity': self.max_size,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            # Repeat views: skipped by the seen filter, or rejected by the unique indexes
+            'skipped_seen': self.skipped_seen,
+            'duplicates': self.duplicates,
+            'duplicate_rate': round((self.skipped_seen + self.duplicates) / total, 4) if total else 0,
+            'seen_filter': seen_filter.stats(),
+            'running': bool(self._thread and self._thread.is_alive()),
+        }
+
+    def shutdown(self, timeout=10):
+        """Flush everything still queued and stop the flusher thread"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        self._stopping.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"View ingestion flusher did not drain within {timeout}s "
+                           f"({self._queue.qsize()} events left)")
+
+    def _ensure_started(self):
+        # Start lazily, and again in each forked worker process
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_size)
+            self._stopping = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='view-ingestion', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stopping.is_set():
+                break
+        connection.close()
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if self._stopping.is_set():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        close_old_connections()
+        try:
+            inserted = write_view_events(batch)
+            remember_seen(batch)
+            self.written += len(inserted)
+            self.duplicates += len(batch) - len(inserted)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} view events: {str(e)}")
+
+
+seen_filter = SeenFilter(
+    capacity=INGESTION_SETTINGS['SEEN_FILTER_CAPACITY'],
+    error_rate=INGESTION_SETTINGS['SEEN_FILTER_ERROR_RATE'],
+)
+view_buffer = ViewIngestionBuffer(
+    max_size=INGESTION_SETTINGS['MAX_QUEUE_SIZE'],
+    batch_size=INGESTION_SETTINGS['BATCH_SIZE'],
+    flush_interval_ms=INGESTION_SETTINGS['FLUSH_INTERVAL_MS'],
+)
+atexit.register(view_buffer.shutdown)
+
+
+def enqueue_view(recipe_id, user=None, ip_address=None, user_agent=None, referrer=None, session_key=None, time_spent=0):
+    """Hand a view to the ingestion pipeline; never touches the database when ASYNC is on"""
+    event = ViewEvent(
+        recipe_id=recipe_id,
+        user_id=user.id if user and user.is_authenticated else None,
+        session_key=session_key or None,
+        ip_address=ip_address or None,
+        user_agent=user_agent,
+        referrer=referrer,
+        time_spent=time_spent or 0,
+        viewed_at=timezone.now(),
+    )
+
+    # Repeat views only matter when they carry time spent
+    key = seen_key(event)
+    if key and not event.time_spent and key in seen_filter:
+        view_buffer.skipped_seen += 1
+        return True
+
+    if not INGESTION_SETTINGS['ASYNC']:
+        write_view_events([event])
+        remember_seen([event])
+        return True
+    return view_buffer.enqueue(event)
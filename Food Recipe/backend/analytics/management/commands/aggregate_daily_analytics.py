@@ -1,12 +1,30 @@
-from django.core.management.base import BaseCommand
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.utils import timezone
-from authentication.models import CustomUser
 from datetime import datetime, timedelta
-from analytics.models import (
-    RecipeView, RecipeLike, RecipeComment, RecipeShare, 
-    RecipeSave, UserFollowing, DailyAnalyticsSummary
+from analytics.benchmarks import build_window_sketches, compute_metric_sketches, store_metric_sketches
+from analytics.partitions import retention_cutoff
+from analytics.rollups import (
+    compute_daily_summaries, store_daily_summaries,
+    compute_recipe_daily_stats, store_recipe_daily_stats
 )
 
+
+def aggregate_date(target_date):
+    """Compute and store every author's summary, every recipe's stats and the
+    benchmark sketches for one date. Returns (date, author rows, recipe rows, seconds)."""
+    started = time.monotonic()
+    summaries = compute_daily_summaries(target_date, target_date)
+    store_daily_summaries(summaries)
+    recipe_stats = compute_recipe_daily_stats(target_date, target_date)
+    store_recipe_daily_stats(target_date, target_date, recipe_stats)
+    store_metric_sketches(target_date, compute_metric_sketches(target_date, recipe_stats))
+    return target_date, len(summaries), len(recipe_stats), time.monotonic() - started
+
+
 class Command(BaseCommand):
     help = 'Aggregate daily analytics data'
     
@@ -16,77 +34,80 @@ class Command(BaseCommand):
             type=str,
             help='Date to aggregate (YYYY-MM-DD). Defaults to yesterday.',
         )
+        parser.add_argument(
+            '--from',
+            dest='date_from',
+            type=str,
+            help='First date of a backfill range (YYYY-MM-DD). Requires --to.',
+        )
+        parser.add_argument(
+            '--to',
+            dest='date_to',
+            type=str,
+            help='Last date of a backfill range (YYYY-MM-DD), inclusive.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes for ranges (one date per task). Default: 1.',
+        )
     
     def handle(self, *args, **options):
-        if options['date']:
-            target_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
-        else:
-            target_date = timezone.now().date() - timedelta(days=1)
+        dates = self._get_dates(options)
         
-        self.stdout.write(f'Aggregating analytics data for {target_date}')
+        # Raw events before the retention cutoff are gone; rebuilding those days would wipe their rollups
+        cutoff = retention_cutoff()
+        if cutoff and dates[0] < cutoff:
+            self.stdout.write(self.style.WARNING(f'Skipping dates before {cutoff} (outside event retention)'))
+            dates = [target_date for target_date in dates if target_date >= cutoff]
+            if not dates:
+                return
+        workers = max(1, min(options['workers'], len(dates)))
         
-        users_with_recipes = CustomUser.objects.filter(recipes__isnull=False).distinct()
+        self.stdout.write(f'Aggregating analytics data for {dates[0]}..{dates[-1]} ({len(dates)} days, {workers} workers)')
+        started = time.monotonic()
         
-        for user in users_with_recipes:
-            user_recipes = user.recipes.all()
-            
-            # Get daily metrics
-            daily_views = RecipeView.objects.filter(
-                recipe__in=user_recipes,
-                viewed_at__date=target_date
-            ).count()
-            
-            unique_visitors = RecipeView.objects.filter(
-                recipe__in=user_recipes,
-                viewed_at__date=target_date
-            ).values('ip_address').distinct().count()
-            
-            daily_likes = RecipeLike.objects.filter(
-                recipe__in=user_recipes,
-                created_at__date=target_date
-            ).count()
-            
-            daily_comments = RecipeComment.objects.filter(
-                recipe__in=user_recipes,
-                created_at__date=target_date
-            ).count()
-            
-            daily_shares = RecipeShare.objects.filter(
-                recipe__in=user_recipes,
-                shared_at__date=target_date
-            ).count()
-            
-            daily_saves = RecipeSave.objects.filter(
-                recipe__in=user_recipes,
-                saved_at__date=target_date
-            ).count()
-            
-            new_followers = UserFollowing.objects.filter(
-                following=user,
-                created_at__date=target_date
-            ).count()
-            
-            recipe_count = user_recipes.count()
-            
-            # Create or update daily summary
-            summary, created = DailyAnalyticsSummary.objects.update_or_create(
-                user=user,
-                date=target_date,
-                defaults={
-                    'total_views': daily_views,
-                    'unique_visitors': unique_visitors,
-                    'total_likes': daily_likes,
-                    'total_comments': daily_comments,
-                    'total_shares': daily_shares,
-                    'total_saves': daily_saves,
-                    'new_followers': new_followers,
-                    'recipe_count': recipe_count,
-                }
-            )
-            
-            action = 'Created' if created else 'Updated'
-            self.stdout.write(f'{action} summary for {user.username}')
+        if workers == 1:
+            for target_date in dates:
+                self._report(*aggregate_date(target_date))
+        else:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(aggregate_date, target_date): target_date for target_date in dates}
+                for future in as_completed(futures):
+                    try:
+                        self._report(*future.result())
+                    except Exception as e:
+                        raise CommandError(f'Failed to aggregate {futures[future]}: {e}')
+        
+        # Benchmark windows end at the latest aggregated day
+        build_window_sketches(dates[-1])
         
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully aggregated analytics for {target_date}')
-        )
\ No newline at end of file
+            self.style.SUCCESS(
+                f'Successfully aggregated analytics for {len(dates)} days in {time.monotonic() - started:.1f}s'
+            )
+        )
+    
+    def _get_dates(self, options):
+        try:
+            if options['date_from'] or options['date_to']:
+                if not (options['date_from'] and options['date_to']):
+                    raise CommandError('--from and --to must be given together')
+                start = datetime.strptime(options['date_from'], '%Y-%m-%d').date()
+                end = datetime.strptime(options['date_to'], '%Y-%m-%d').date()
+            elif options['date']:
+                start = end = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            else:
+                start = end = timezone.now().date() - timedelta(days=1)
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        
+        if end < start:
+            raise CommandError('--to must not be before --from')
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    
+    def _report(self, target_date, summaries, recipe_stats, seconds):
+        self.stdout.write(f'{target_date}: {summaries} author summaries, {recipe_stats} recipe stats in {seconds * 1000:.0f} ms')
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+from analytics.models import RecipeView, UserAgent, Referrer
+
+# Bytes per RecipeView row for a nullable bigint FK (8 byte value, rounded for alignment)
+FK_BYTES = 8
+
+
+class Command(BaseCommand):
+    help = 'Report the storage saved by dictionary-encoding RecipeView user agents and referrers'
+
+    def handle(self, *args, **options):
+        total_inline = total_encoded = 0
+
+        for field, model in (('user_agent', UserAgent), ('referrer', Referrer)):
+            # What the strings would take inline: each view repeats its value
+            inline = RecipeView.objects.filter(**{f'{field}__isnull': False}).aggregate(
+                rows=Count('id'),
+                bytes=Sum(Length(f'{field}__value')),
+            )
+            dimension = model.objects.aggregate(
+                rows=Count('id'),
+                bytes=Sum(Length('value')),
+            )
+            inline_bytes = inline['bytes'] or 0
+            # Dictionary: one FK per view, plus each distinct value and its hash once
+            encoded_bytes = (
+                inline['rows'] * FK_BYTES
+                + (dimension['bytes'] or 0)
+                + dimension['rows'] * (model._meta.get_field('hash').max_length + FK_BYTES)
+            )
+            total_inline += inline_bytes
+            total_encoded += encoded_bytes
+
+            self.stdout.write(
+                f'{field}: {inline["rows"]} views, {dimension["rows"]} distinct values, '
+                f'{self._size(inline_bytes)} inline -> {self._size(encoded_bytes)} encoded'
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_total_relation_size(%s)', [model._meta.db_table])
+                    self.stdout.write(f'  {model._meta.db_table} on disk (with indexes): {self._size(cursor.fetchone()[0])}')
+
+        saved = total_inline - total_encoded
+        ratio = f' ({saved / total_inline:.0%})' if total_inline else ''
+        self.stdout.write(self.style.SUCCESS(f'Estimated saving: {self._size(saved)}{ratio}'))
+
+    @staticmethod
+    def _size(num_bytes):
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if abs(num_bytes) < 1024 or unit == 'GB':
+                return f'{num_bytes:.1f} {unit}' if unit != 'B' else f'{num_bytes} B'
+            num_bytes /= 1024
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from datetime import datetime, timedelta
+from analytics.columnar import EVENTS_DIR, export_day, exported_days, is_exported
+from analytics.models import EngagementEvent
+
+
+class Command(BaseCommand):
+    help = 'Export closed days of the engagement log to per-day NumPy column files for offline reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='date_from',
+            type=str,
+            help='First date to export (YYYY-MM-DD). Defaults to the day after the last export.',
+        )
+        parser.add_argument(
+            '--to',
+            dest='date_to',
+            type=str,
+            help='Last date to export (YYYY-MM-DD), inclusive. Defaults to yesterday.',
+        )
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Re-export days that already have an export.',
+        )
+
+    def handle(self, *args, **options):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        try:
+            end_date = self._parse(options['date_to']) or yesterday
+            start_date = self._parse(options['date_from'])
+        except ValueError:
+            raise CommandError('Invalid date format. Use YYYY-MM-DD')
+        if end_date > yesterday:
+            raise CommandError('Only closed days can be exported; --to must be before today')
+        start_date = start_date or self._next_day_to_export()
+        if start_date is None or start_date > end_date:
+            self.stdout.write('Nothing to export')
+            return
+
+        started = time.monotonic()
+        days = rows = 0
+        day = start_date
+        while day <= end_date:
+            if options['overwrite'] or not is_exported(day):
+                count = export_day(day)
+                self.stdout.write(f'Exported {day}: {count} events')
+                days += 1
+                rows += count
+            day += timedelta(days=1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Exported {days} days ({rows} events) to {EVENTS_DIR} in {time.monotonic() - started:.1f}s'
+            )
+        )
+
+    @staticmethod
+    def _parse(value):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+    @staticmethod
+    def _next_day_to_export():
+        """Day after the last export, or the first day of the log"""
+        days = exported_days()
+        if days:
+            return days[-1] + timedelta(days=1)
+        first = EngagementEvent.objects.aggregate(first=Min('created_at'))['first']
+        return timezone.localdate(first) if first else None
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from analytics.partitions import (
+    PARTITIONED_MODELS, RETENTION_MONTHS,
+    create_partition, drop_partition, list_partitions, retention_cutoff
+)
+from analytics.timeseries import add_months
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly partitions of the analytics event tables and drop expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Months after the current one to create partitions for. Default: 3.',
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=RETENTION_MONTHS,
+            help=f'Months of events to keep; older partitions are dropped. 0 keeps everything. Default: {RETENTION_MONTHS}.',
+        )
+        parser.add_argument(
+            '--detach-only',
+            action='store_true',
+            help='Detach expired partitions but keep them as standalone tables (e.g. to archive them).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only print what would be done.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Analytics partitions require PostgreSQL')
+
+        current_month = timezone.now().date().replace(day=1)
+        wanted = [add_months(current_month, i) for i in range(options['months_ahead'] + 1)]
+        cutoff = retention_cutoff(options['retain_months'])
+        dry_run = options['dry_run']
+        created = dropped = 0
+
+        for model, column in PARTITIONED_MODELS.items():
+            table = model._meta.db_table
+            with transaction.atomic(), connection.cursor() as cursor:
+                partitions = list_partitions(cursor, table)
+
+                for month in wanted:
+                    if month not in partitions:
+                        if not dry_run:
+                            create_partition(cursor, table, column, month)
+                        self.stdout.write(f'Created {table} partition for {month:%Y-%m}')
+                        created += 1
+
+                if cutoff:
+                    for month, name in sorted(partitions.items()):
+                        if month < cutoff:
+                            if not dry_run:
+                                drop_partition(cursor, table, name, detach_only=options['detach_only'])
+                            action = 'Detached' if options['detach_only'] else 'Dropped'
+                            self.stdout.write(f'{action} {name}')
+                            dropped += 1
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(
+            self.style.SUCCESS(f'{prefix}{created} partitions created, {dropped} expired partitions removed')
+        )
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from analytics.trending import TRENDING_SETTINGS, rebuild_trending_scores, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Materialize the top trending recipes overall and per category (run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TRENDING_SETTINGS['TOP_K'],
+            help=f'Recipes kept per list. Default: {TRENDING_SETTINGS["TOP_K"]}.',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute every score from the engagement log first (after a backfill or a weight change).',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['rebuild']:
+            rebuild_trending_scores()
+            self.stdout.write('Rebuilt trending scores from the engagement log')
+        written = refresh_trending(options['top_k'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Materialized {written} trending entries in {time.monotonic() - started:.1f}s')
+        )
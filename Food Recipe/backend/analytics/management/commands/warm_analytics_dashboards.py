@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import timedelta
+from analytics.dashboard_cache import DASHBOARD_CACHE_TTLS, get_cached_dashboard, is_shared_cache
+from analytics.models import RecipeDailyStats
+from analytics.views import RecipeAnalyticsView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Pre-populate the analytics dashboard cache for recently active chefs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--active-days',
+            type=int,
+            default=7,
+            help='Warm chefs whose recipes had engagement within this many days. Default: 7.',
+        )
+        parser.add_argument(
+            '--ranges',
+            nargs='+',
+            default=list(DASHBOARD_CACHE_TTLS),
+            help=f'Dashboard ranges to warm. Default: {" ".join(DASHBOARD_CACHE_TTLS)}.',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['ranges']) - set(DASHBOARD_CACHE_TTLS)
+        if unknown:
+            raise CommandError(f'Unknown ranges: {", ".join(sorted(unknown))}')
+        if not is_shared_cache():
+            # Entries would only live in this process and die with it
+            raise CommandError('The default cache is not Redis or Memcached; configure CACHE_URL first')
+
+        # last_login is never set by the JWT login, so go by engagement on the chef's recipes
+        since = timezone.now().date() - timedelta(days=options['active_days'])
+        chefs = User.objects.filter(
+            id__in=RecipeDailyStats.objects.filter(date__gte=since).values('recipe__author_id')
+        )
+        view = RecipeAnalyticsView()
+        started = time.monotonic()
+        built = cached = failed = 0
+
+        for chef in chefs.iterator():
+            for time_range in options['ranges']:
+                try:
+                    _, _, _, hit = get_cached_dashboard(
+                        chef.id, time_range, lambda: view.get_analytics_data(chef, time_range)
+                    )
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Failed to warm {time_range} dashboard of user {chef.id}: {e}')
+                    continue
+                if hit:
+                    cached += 1
+                else:
+                    built += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Warmed {built} dashboards ({cached} already cached, {failed} failed) '
+                f'in {time.monotonic() - started:.1f}s'
+            )
+        )
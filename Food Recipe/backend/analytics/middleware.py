@@ -0,0 +1,41 @@
+import uuid
+
+from django.conf import settings
+
+VISITOR_COOKIE_NAME = getattr(settings, 'ANALYTICS_VISITOR_COOKIE_NAME', 'visitor_id')
+VISITOR_COOKIE_AGE = getattr(settings, 'ANALYTICS_VISITOR_COOKIE_AGE', 60 * 60 * 24 * 365 * 2)  # 2 years
+VISITOR_COOKIE_SALT = 'analytics.visitor_id'
+
+
+class VisitorIdMiddleware:
+    """
+    Give every browser a stable anonymous visitor ID for analytics dedupe.
+
+    The ID lives in a signed cookie, so issuing and reading it never touches
+    the database (unlike request.session.create()). It is exposed as
+    request.visitor_id and used as the session_key of analytics rows.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        visitor_id = request.get_signed_cookie(VISITOR_COOKIE_NAME, default=None, salt=VISITOR_COOKIE_SALT)
+        is_new = visitor_id is None
+        if is_new:
+            visitor_id = uuid.uuid4().hex
+        request.visitor_id = visitor_id
+
+        response = self.get_response(request)
+
+        if is_new:
+            response.set_signed_cookie(
+                VISITOR_COOKIE_NAME,
+                visitor_id,
+                salt=VISITOR_COOKIE_SALT,
+                max_age=VISITOR_COOKIE_AGE,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+# Empty session keys were stored by the old tracking endpoint; treat them as
+# "no session" so those rows fall back to the IP identity.
+NORMALIZE_SESSION_KEYS = """
+UPDATE analytics_recipe_views SET session_key = NULL WHERE session_key = '';
+"""
+
+# Keep the first view per viewer (user, else session, else IP) and fold the
+# time spent of the duplicates into it.
+MERGE_DUPLICATE_VIEWS = """
+WITH viewers AS (
+    SELECT id, time_spent, MIN(id) OVER (
+        PARTITION BY recipe_id, CASE
+            WHEN user_id IS NOT NULL THEN 'u:' || user_id
+            WHEN session_key IS NOT NULL THEN 's:' || session_key
+            ELSE 'i:' || host(ip_address)
+        END
+    ) AS keep_id
+    FROM analytics_recipe_views
+    WHERE user_id IS NOT NULL OR session_key IS NOT NULL OR ip_address IS NOT NULL
+), duplicates AS (
+    DELETE FROM analytics_recipe_views v USING viewers
+    WHERE v.id = viewers.id AND viewers.id <> viewers.keep_id
+    RETURNING viewers.keep_id, viewers.time_spent
+)
+UPDATE analytics_recipe_views v SET time_spent = v.time_spent + merged.time_spent
+FROM (SELECT keep_id, SUM(time_spent) AS time_spent FROM duplicates GROUP BY keep_id) merged
+WHERE v.id = merged.keep_id;
+"""
+
+# Recount Recipe.views_count now that duplicates are gone
+RECOUNT_VIEWS = """
+DELETE FROM recipe_recipecountershard WHERE metric = 'views';
+UPDATE recipe_recipe r SET views_count = (
+    SELECT COUNT(*) FROM analytics_recipe_views v WHERE v.recipe_id = r.id
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_recipelike_ip_address_recipelike_session_key_and_more"),
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(NORMALIZE_SESSION_KEYS, migrations.RunSQL.noop),
+        migrations.RunSQL(MERGE_DUPLICATE_VIEWS, migrations.RunSQL.noop),
+        migrations.RunSQL(RECOUNT_VIEWS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="recipeview",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", False)),
+                fields=("recipe", "user"),
+                name="unique_recipe_view_per_user",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeview",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("session_key__isnull", False), ("user__isnull", True)
+                ),
+                fields=("recipe", "session_key"),
+                name="unique_recipe_view_per_session",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeview",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("ip_address__isnull", False),
+                    ("session_key__isnull", True),
+                    ("user__isnull", True),
+                ),
+                fields=("recipe", "ip_address"),
+                name="unique_recipe_view_per_ip",
+            ),
+        ),
+    ]
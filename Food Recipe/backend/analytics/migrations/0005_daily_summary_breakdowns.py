@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0004_recipe_view_unique_viewer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailyanalyticssummary",
+            name="category_breakdown",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="dailyanalyticssummary",
+            name="recipe_breakdown",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+        ("analytics", "0005_daily_summary_breakdowns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("unique_visitors", models.PositiveIntegerField(default=0)),
+                ("likes", models.PositiveIntegerField(default=0)),
+                ("comments", models.PositiveIntegerField(default=0)),
+                ("shares", models.PositiveIntegerField(default=0)),
+                ("saves", models.PositiveIntegerField(default=0)),
+                (
+                    "time_spent_total",
+                    models.BigIntegerField(default=0, help_text="Seconds"),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="recipe.recipe",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "analytics_recipe_daily_stats",
+                "unique_together": {("recipe", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0006_recipedailystats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailyanalyticssummary",
+            name="visitors_sketch",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+        migrations.AddField(
+            model_name="recipedailystats",
+            name="visitors_sketch",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+    ]
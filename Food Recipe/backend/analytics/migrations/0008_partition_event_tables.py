@@ -0,0 +1,221 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:10
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+# Event tables converted to monthly range partitions, with their partition key
+EVENT_TABLES = [
+    ("recipeview", "viewed_at"),
+    ("recipelike", "created_at"),
+    ("recipecomment", "created_at"),
+    ("recipeshare", "shared_at"),
+    ("recipesave", "saved_at"),
+]
+MONTHS_AHEAD = 3
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _partition_table(schema_editor, model, column):
+    """Rebuild one event table as a partitioned table with the same columns and data"""
+    table = model._meta.db_table
+    new_table = f"{table}_partitioned"
+    sequence = f"{table}_event_id_seq"
+    execute = schema_editor.execute
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("{column}") FROM "{table}"')
+        oldest = cursor.fetchone()[0]
+    current = timezone.now().date().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    last = current
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+
+    # Partitioned tables cannot use identity columns on older PostgreSQL versions,
+    # and their primary key must include the partition key.
+    execute(
+        f'CREATE TABLE "{new_table}" (LIKE "{table}" INCLUDING DEFAULTS) PARTITION BY RANGE ("{column}")'
+    )
+    execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{new_table}"."id"')
+    execute(
+        f'ALTER TABLE "{new_table}" ALTER COLUMN "id" SET DEFAULT nextval(\'{sequence}\')'
+    )
+    execute(f'ALTER TABLE "{new_table}" ADD PRIMARY KEY ("id", "{column}")')
+    execute(f'CREATE TABLE "{table}_default" PARTITION OF "{new_table}" DEFAULT')
+    while month <= last:
+        execute(
+            f'CREATE TABLE "{table}_p{month:%Y%m}" PARTITION OF "{new_table}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+
+    execute(f'INSERT INTO "{new_table}" SELECT * FROM "{table}"')
+    execute(
+        f"SELECT setval('{sequence}', COALESCE((SELECT MAX(id) FROM \"{new_table}\"), 0) + 1, false)"
+    )
+    execute(f'DROP TABLE "{table}"')
+    execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+
+    # Indexes and foreign keys declared on the parent apply to every partition
+    for field in model._meta.local_fields:
+        if field.remote_field:
+            target = field.remote_field.model._meta
+            execute(
+                f'CREATE INDEX "{table}_{field.column}_idx" ON "{table}" ("{field.column}")'
+            )
+            execute(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_{field.column}_fk" '
+                f'FOREIGN KEY ("{field.column}") REFERENCES "{target.db_table}" ("{target.pk.column}") '
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def partition_event_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        # Other backends keep plain tables; only drop the unique indexes
+        # that partitioned tables cannot have.
+        RecipeView = apps.get_model("analytics", "RecipeView")
+        for constraint in RecipeView._meta.constraints:
+            schema_editor.remove_constraint(RecipeView, constraint)
+        for name in ["RecipeLike", "RecipeSave"]:
+            model = apps.get_model("analytics", name)
+            schema_editor.alter_unique_together(model, model._meta.unique_together, [])
+        return
+
+    for model_name, column in EVENT_TABLES:
+        _partition_table(schema_editor, apps.get_model("analytics", model_name), column)
+
+
+# Seed the dedupe ledger with the first view of every known viewer
+POPULATE_VIEWERS = """
+INSERT INTO analytics_recipe_viewers (recipe_id, user_id, session_key, ip_address, viewed_at)
+SELECT recipe_id, user_id, session_key, ip_address, viewed_at
+FROM analytics_recipe_views
+WHERE user_id IS NOT NULL OR session_key IS NOT NULL OR ip_address IS NOT NULL
+ORDER BY id
+ON CONFLICT DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+        ("analytics", "0007_visitors_sketch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeViewer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("session_key", models.CharField(blank=True, max_length=40, null=True)),
+                ("ip_address", models.GenericIPAddressField(blank=True, null=True)),
+                (
+                    "viewed_at",
+                    models.DateTimeField(
+                        help_text="viewed_at of the RecipeView row (its partition key)"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "analytics_recipe_viewers",
+            },
+        ),
+        migrations.AddField(
+            model_name="recipeviewer",
+            name="recipe",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="analytics_viewers",
+                to="recipe.recipe",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipeviewer",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="analytics_recipe_viewers_user",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeviewer",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", False)),
+                fields=("recipe", "user"),
+                name="unique_recipe_viewer_per_user",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeviewer",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("session_key__isnull", False), ("user__isnull", True)
+                ),
+                fields=("recipe", "session_key"),
+                name="unique_recipe_viewer_per_session",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeviewer",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("ip_address__isnull", False),
+                    ("session_key__isnull", True),
+                    ("user__isnull", True),
+                ),
+                fields=("recipe", "ip_address"),
+                name="unique_recipe_viewer_per_ip",
+            ),
+        ),
+        migrations.RunSQL(POPULATE_VIEWERS, migrations.RunSQL.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(partition_event_tables),
+            ],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="recipeview",
+                    name="unique_recipe_view_per_user",
+                ),
+                migrations.RemoveConstraint(
+                    model_name="recipeview",
+                    name="unique_recipe_view_per_session",
+                ),
+                migrations.RemoveConstraint(
+                    model_name="recipeview",
+                    name="unique_recipe_view_per_ip",
+                ),
+                migrations.AlterUniqueTogether(
+                    name="recipelike",
+                    unique_together=set(),
+                ),
+                migrations.AlterUniqueTogether(
+                    name="recipesave",
+                    unique_together=set(),
+                ),
+            ],
+        ),
+    ]
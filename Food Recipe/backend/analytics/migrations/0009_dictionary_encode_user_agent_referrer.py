@@ -0,0 +1,172 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:13
+
+import hashlib
+
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+BATCH_SIZE = 10000
+
+# RecipeView text column -> (dimension model, new FK field)
+DIMENSIONS = [
+    ("user_agent", "useragent", "user_agent_ref"),
+    ("referrer", "referrer", "referrer_ref"),
+]
+
+
+def encode_dimensions(apps, schema_editor):
+    """
+    Move RecipeView user agent / referrer strings into the dimension tables,
+    BATCH_SIZE views at a time, each batch in its own transaction so the
+    table is never locked for the whole conversion.
+    """
+    RecipeView = apps.get_model("analytics", "RecipeView")
+    db = schema_editor.connection.alias
+    views = RecipeView.objects.using(db)
+    last_id = 0
+
+    while True:
+        with transaction.atomic(using=db):
+            batch = list(
+                views.filter(id__gt=last_id)
+                .order_by("id")
+                .values("id", "user_agent", "referrer")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_id = batch[-1]["id"]
+
+            # One UPDATE per distinct (user agent, referrer) pair in the batch
+            encoded = {}
+            for column, model_name, ref_field in DIMENSIONS:
+                Dimension = apps.get_model("analytics", model_name)
+                hashes = {
+                    row[column]: hashlib.md5(row[column].encode()).hexdigest()
+                    for row in batch
+                    if row[column]
+                }
+                Dimension.objects.using(db).bulk_create(
+                    [Dimension(hash=h, value=v) for v, h in hashes.items()],
+                    ignore_conflicts=True,
+                )
+                ids = dict(
+                    Dimension.objects.using(db)
+                    .filter(hash__in=hashes.values())
+                    .values_list("hash", "id")
+                )
+                encoded[column] = {v: ids[h] for v, h in hashes.items()}
+
+            groups = {}
+            for row in batch:
+                key = tuple(
+                    encoded[column].get(row[column]) for column, _, _ in DIMENSIONS
+                )
+                if any(key):
+                    groups.setdefault(key, []).append(row["id"])
+            for key, view_ids in groups.items():
+                views.filter(id__in=view_ids).update(
+                    **{
+                        f"{ref_field}_id": dimension_id
+                        for (_, _, ref_field), dimension_id in zip(DIMENSIONS, key)
+                    }
+                )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("analytics", "0008_partition_event_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Referrer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "hash",
+                    models.CharField(
+                        help_text="MD5 hex digest of value", max_length=32, unique=True
+                    ),
+                ),
+                ("value", models.TextField()),
+            ],
+            options={
+                "db_table": "analytics_referrers",
+            },
+        ),
+        migrations.CreateModel(
+            name="UserAgent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "hash",
+                    models.CharField(
+                        help_text="MD5 hex digest of value", max_length=32, unique=True
+                    ),
+                ),
+                ("value", models.TextField()),
+            ],
+            options={
+                "db_table": "analytics_user_agents",
+            },
+        ),
+        migrations.AddField(
+            model_name="recipeview",
+            name="user_agent_ref",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="analytics.useragent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipeview",
+            name="referrer_ref",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="analytics.referrer",
+            ),
+        ),
+        migrations.RunPython(encode_dimensions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="recipeview",
+            name="user_agent",
+        ),
+        migrations.RemoveField(
+            model_name="recipeview",
+            name="referrer",
+        ),
+        migrations.RenameField(
+            model_name="recipeview",
+            old_name="user_agent_ref",
+            new_name="user_agent",
+        ),
+        migrations.RenameField(
+            model_name="recipeview",
+            old_name="referrer_ref",
+            new_name="referrer",
+        ),
+    ]
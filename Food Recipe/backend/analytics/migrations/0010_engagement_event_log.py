@@ -0,0 +1,135 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:17
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# Same value as analytics.events.visitor_hash()
+VISITOR_HASH = """
+    ('x' || substr(md5(CASE
+        WHEN user_id IS NOT NULL THEN 'u:' || user_id
+        WHEN session_key IS NOT NULL THEN 's:' || session_key
+        ELSE 'i:' || COALESCE(host(ip_address), 'None')
+    END), 1, 16))::bit(64)::bigint
+"""
+
+# (event type, table, timestamp column, payload expression)
+EVENT_SOURCES = [
+    (
+        1,
+        "analytics_recipe_views",
+        "viewed_at",
+        "CASE WHEN time_spent > 0 THEN jsonb_build_object('time_spent', time_spent) END",
+    ),
+    (2, "analytics_recipe_likes", "created_at", "NULL"),
+    (3, "analytics_recipe_comments", "created_at", "NULL"),
+    (
+        4,
+        "analytics_recipe_shares",
+        "shared_at",
+        "CASE WHEN platform <> '' THEN jsonb_build_object('platform', platform) END",
+    ),
+    (5, "analytics_recipe_saves", "saved_at", "NULL"),
+]
+
+
+def backfill_events(apps, schema_editor):
+    """Copy the existing per-type events into the log, oldest first (PostgreSQL only)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    selects = " UNION ALL ".join(
+        f"SELECT {event_type}, recipe_id, user_id, {VISITOR_HASH}, {column}, {payload} "
+        f"FROM {table} WHERE recipe_id IS NOT NULL"
+        for event_type, table, column, payload in EVENT_SOURCES
+    )
+    schema_editor.execute(
+        "INSERT INTO analytics_engagement_events "
+        "(event_type, recipe_id, user_id, visitor, created_at, payload) "
+        f"SELECT * FROM ({selects}) AS events ORDER BY 5"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("analytics", "0009_dictionary_encode_user_agent_referrer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EngagementEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "View"),
+                            (2, "Like"),
+                            (3, "Comment"),
+                            (4, "Share"),
+                            (5, "Save"),
+                        ]
+                    ),
+                ),
+                (
+                    "visitor",
+                    models.BigIntegerField(
+                        help_text="64-bit hash of the visitor identity: user, else session, else IP"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "payload",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Event specific extras, e.g. share platform",
+                        null=True,
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="engagement_events",
+                        to="recipe.recipe",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "analytics_engagement_events",
+                "indexes": [
+                    models.Index(
+                        fields=["recipe", "created_at"],
+                        name="analytics_e_recipe__ae99a7_idx",
+                    ),
+                    django.contrib.postgres.indexes.BrinIndex(
+                        fields=["created_at"], name="analytics_events_created_brin"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
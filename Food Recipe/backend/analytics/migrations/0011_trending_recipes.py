@@ -0,0 +1,88 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+        ("analytics", "0010_engagement_event_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeTrendingScore",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending_score",
+                        serialize=False,
+                        to="recipe.recipe",
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "analytics_recipe_trending_scores",
+            },
+        ),
+        migrations.CreateModel(
+            name="TrendingRecipe",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipe.category",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trending_entries",
+                        to="recipe.recipe",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "analytics_trending_recipes",
+                "ordering": ["category", "rank"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="trendingrecipe",
+            constraint=models.UniqueConstraint(
+                fields=("category", "rank"), name="unique_trending_rank_per_category"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="trendingrecipe",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("category__isnull", True)),
+                fields=("rank",),
+                name="unique_trending_rank_overall",
+            ),
+        ),
+    ]
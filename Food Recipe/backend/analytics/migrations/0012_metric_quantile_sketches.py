@@ -0,0 +1,61 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+        ("analytics", "0011_trending_recipes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricQuantileSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("window_days", models.PositiveSmallIntegerField(default=1)),
+                ("metric", models.CharField(max_length=20)),
+                ("sketch", models.BinaryField()),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipe.category",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "analytics_metric_quantile_sketches",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="metricquantilesketch",
+            constraint=models.UniqueConstraint(
+                fields=("date", "window_days", "metric", "category"),
+                name="unique_metric_sketch_per_category",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="metricquantilesketch",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("category__isnull", True)),
+                fields=("date", "window_days", "metric"),
+                name="unique_metric_sketch_platform",
+            ),
+        ),
+    ]
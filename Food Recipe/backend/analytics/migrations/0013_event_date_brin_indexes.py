@@ -0,0 +1,44 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:32
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0012_metric_quantile_sketches"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipecomment",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["created_at"], name="analytics_comments_brin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipelike",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["created_at"], name="analytics_likes_brin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipesave",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["saved_at"], name="analytics_saves_brin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipeshare",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["shared_at"], name="analytics_shares_brin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipeview",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=["viewed_at"], name="analytics_views_brin"
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# (ledger reaction, analytics table, timestamp column)
+REACTION_TABLES = [
+    ("like", "analytics_recipe_likes", "created_at"),
+    ("save", "analytics_recipe_saves", "saved_at"),
+]
+
+# Drop the repeat rows re-likes/re-saves wrote since the unique index went away,
+# keeping each user's first one, then seed the ledger from what remains
+DEDUPE_REACTIONS = """
+DELETE FROM {table} AS a USING {table} AS b
+WHERE a.recipe_id = b.recipe_id AND a.user_id = b.user_id
+AND (a.{column}, a.id) > (b.{column}, b.id);
+"""
+
+POPULATE_REACTIONS = """
+INSERT INTO analytics_recipe_reactions (recipe_id, user_id, reaction, created_at)
+SELECT recipe_id, user_id, '{reaction}', MIN({column})
+FROM {table}
+WHERE recipe_id IS NOT NULL
+GROUP BY recipe_id, user_id
+ON CONFLICT DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0012_recipe_shares_count_recipe_views_count_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("analytics", "0013_event_date_brin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeReaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "reaction",
+                    models.CharField(
+                        choices=[("like", "Like"), ("save", "Save")], max_length=10
+                    ),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="analytics_reactions",
+                        to="recipe.recipe",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="analytics_recipe_reactions_user",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "analytics_recipe_reactions",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="recipereaction",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "user", "reaction"),
+                name="unique_recipe_reaction_per_user",
+            ),
+        ),
+    ] + [
+        migrations.RunSQL(
+            DEDUPE_REACTIONS.format(table=table, column=column)
+            + POPULATE_REACTIONS.format(reaction=reaction, table=table, column=column),
+            migrations.RunSQL.noop,
+        )
+        for reaction, table, column in REACTION_TABLES
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.20 on 2026-10-19 18:05
+
+from importlib import import_module
+
+from django.db import migrations
+
+# Same rebuild as the other event tables got in 0008
+partition_table = import_module(
+    "analytics.migrations.0008_partition_event_tables"
+)._partition_table
+
+
+def partition_engagement_events(apps, schema_editor):
+    """Rebuild the engagement log as monthly range partitions on created_at (PostgreSQL only)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    partition_table(
+        schema_editor, apps.get_model("analytics", "EngagementEvent"), "created_at"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0014_recipe_reaction_ledger"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_engagement_events, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,38 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.utils import timezone
 from authentication.models import CustomUser
-from recipe.models import Recipe
+from recipe.models import Recipe, Category
+
+class UserAgent(models.Model):
+    """Distinct user agent strings, referenced by RecipeView (see analytics/dimensions.py)"""
+    hash = models.CharField(max_length=32, unique=True, help_text="MD5 hex digest of value")
+    value = models.TextField()
+    
+    class Meta:
+        db_table = 'analytics_user_agents'
+    
+    def __str__(self):
+        return self.value[:80]
+
+class Referrer(models.Model):
+    """Distinct referrer URLs, referenced by RecipeView (see analytics/dimensions.py)"""
+    hash = models.CharField(max_length=32, unique=True, help_text="MD5 hex digest of value")
+    value = models.TextField()
+    
+    class Meta:
+        db_table = 'analytics_referrers'
+    
+    def __str__(self):
+        return self.value[:80]
 
 class RecipeView(models.Model):
     """Track individual recipe views"""
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='analytics_views')
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='analytics_recipe_views_user')  # null if anonymous
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True, null=True)
-    referrer = models.URLField(blank=True, null=True)
+    user_agent = models.ForeignKey(UserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    referrer = models.ForeignKey(Referrer, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     session_key = models.CharField(max_length=40, blank=True, null=True)
     viewed_at = models.DateTimeField(auto_now_add=True)
     time_spent = models.IntegerField(default=0, help_text="Time spent viewing recipe in seconds")
@@ -19,6 +43,39 @@ class RecipeView(models.Model):
             models.Index(fields=['recipe', 'viewed_at']),
             models.Index(fields=['user', 'viewed_at']),
             models.Index(fields=['ip_address', 'viewed_at']),
+            # Day/month ranges for the admin date drill-down
+            BrinIndex(fields=['viewed_at'], name='analytics_views_brin'),
+        ]
+        # Monthly PostgreSQL partitions on viewed_at (see analytics/partitions.py);
+        # one-view-per-viewer dedupe lives in RecipeViewer.
+
+class RecipeViewer(models.Model):
+    """First view of a recipe per viewer: user, else session, else IP. Dedupe ledger for RecipeView."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='analytics_viewers')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='analytics_recipe_viewers_user')
+    session_key = models.CharField(max_length=40, blank=True, null=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    viewed_at = models.DateTimeField(help_text="viewed_at of the RecipeView row (its partition key)")
+    
+    class Meta:
+        db_table = 'analytics_recipe_viewers'
+        # The ingestion pipeline relies on these for INSERT ... ON CONFLICT DO NOTHING.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'user'],
+                condition=models.Q(user__isnull=False),
+                name='unique_recipe_viewer_per_user'
+            ),
+            models.UniqueConstraint(
+                fields=['recipe', 'session_key'],
+                condition=models.Q(user__isnull=True, session_key__isnull=False),
+                name='unique_recipe_viewer_per_session'
+            ),
+            models.UniqueConstraint(
+                fields=['recipe', 'ip_address'],
+                condition=models.Q(user__isnull=True, session_key__isnull=True, ip_address__isnull=False),
+                name='unique_recipe_viewer_per_ip'
+            ),
         ]
 
 class RecipeLike(models.Model):
@@ -31,7 +88,33 @@ class RecipeLike(models.Model):
     
     class Meta:
         db_table = 'analytics_recipe_likes'
-        unique_together = ['recipe', 'user']
+        indexes = [BrinIndex(fields=['created_at'], name='analytics_likes_brin')]
+        # Partitioned monthly on created_at, so no (recipe, user) unique index;
+        # RecipeReaction dedupes the rows and recipe.LikedRecipe holds who likes what now.
+
+class RecipeReaction(models.Model):
+    """First like/save of a recipe per user. Dedupe ledger for the partitioned RecipeLike and RecipeSave."""
+    LIKE = 'like'
+    SAVE = 'save'
+    REACTIONS = [
+        (LIKE, 'Like'),
+        (SAVE, 'Save'),
+    ]
+    
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='analytics_reactions')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='analytics_recipe_reactions_user')
+    reaction = models.CharField(max_length=10, choices=REACTIONS)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'analytics_recipe_reactions'
+        # Analytics rows are written through INSERT ... ON CONFLICT DO NOTHING on this index
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'user', 'reaction'],
+                name='unique_recipe_reaction_per_user'
+            ),
+        ]
 
 class RecipeComment(models.Model):
     """Track recipe comments"""
@@ -45,6 +128,7 @@ class RecipeComment(models.Model):
     
     class Meta:
         db_table = 'analytics_recipe_comments'
+        indexes = [BrinIndex(fields=['created_at'], name='analytics_comments_brin')]
 
 class RecipeShare(models.Model):
     """Track recipe shares"""
@@ -67,6 +151,7 @@ class RecipeShare(models.Model):
     
     class Meta:
         db_table = 'analytics_recipe_shares'
+        indexes = [BrinIndex(fields=['shared_at'], name='analytics_shares_brin')]
 
 class RecipeSave(models.Model):
     """Track recipe saves/bookmarks"""
@@ -78,7 +163,9 @@ class RecipeSave(models.Model):
     
     class Meta:
         db_table = 'analytics_recipe_saves'
-        unique_together = ['recipe', 'user']
+        indexes = [BrinIndex(fields=['saved_at'], name='analytics_saves_brin')]
+        # Partitioned monthly on saved_at, so no (recipe, user) unique index;
+        # RecipeReaction dedupes the rows and recipe.FavoriteRecipe holds who saved what now.
 
 class UserFollowing(models.Model):
     """Track user followers"""
@@ -90,6 +177,66 @@ class UserFollowing(models.Model):
         db_table = 'analytics_user_following'
         unique_together = ['follower', 'following']
 
+class EngagementEvent(models.Model):
+    """Append-only log of every engagement event, one narrow row each (see analytics/events.py)"""
+    VIEW = 1
+    LIKE = 2
+    COMMENT = 3
+    SHARE = 4
+    SAVE = 5
+    EVENT_TYPES = [
+        (VIEW, 'View'),
+        (LIKE, 'Like'),
+        (COMMENT, 'Comment'),
+        (SHARE, 'Share'),
+        (SAVE, 'Save'),
+    ]
+    
+    event_type = models.PositiveSmallIntegerField(choices=EVENT_TYPES)
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='engagement_events')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    visitor = models.BigIntegerField(help_text="64-bit hash of the visitor identity: user, else session, else IP")
+    created_at = models.DateTimeField(default=timezone.now)
+    payload = models.JSONField(null=True, blank=True, help_text="Event specific extras, e.g. share platform")
+    
+    class Meta:
+        db_table = 'analytics_engagement_events'
+        indexes = [
+            models.Index(fields=['recipe', 'created_at']),
+            # Rows arrive in created_at order, so a BRIN index covers range scans at a fraction of a B-tree's size
+            BrinIndex(fields=['created_at'], name='analytics_events_created_brin'),
+        ]
+        # Monthly PostgreSQL partitions on created_at (see analytics/partitions.py)
+
+class RecipeTrendingScore(models.Model):
+    """Exponentially decayed engagement score of a recipe as of updated_at (see analytics/trending.py)"""
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='trending_score')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'analytics_recipe_trending_scores'
+
+class TrendingRecipe(models.Model):
+    """Materialized top-K trending recipes, overall (no category) and per category"""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='trending_entries')
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'analytics_trending_recipes'
+        ordering = ['category', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'rank'], name='unique_trending_rank_per_category'),
+            models.UniqueConstraint(
+                fields=['rank'],
+                condition=models.Q(category__isnull=True),
+                name='unique_trending_rank_overall'
+            ),
+        ]
+
 class DailyAnalyticsSummary(models.Model):
     """Daily aggregated analytics data"""
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='analytics_daily_analytics')
@@ -102,10 +249,61 @@ class DailyAnalyticsSummary(models.Model):
     total_saves = models.IntegerField(default=0)
     new_followers = models.IntegerField(default=0)
     recipe_count = models.IntegerField(default=0)
+    # {recipe_id: {'views': n, 'likes': n, 'comments': n}} for recipes with activity that day
+    recipe_breakdown = models.JSONField(default=dict, blank=True)
+    # {category name: views}
+    category_breakdown = models.JSONField(default=dict, blank=True)
+    # HyperLogLog of the day's visitors (see analytics/hyperloglog.py); unique_visitors is its estimate
+    visitors_sketch = models.BinaryField(default=b'', blank=True)
     
     class Meta:
         db_table = 'analytics_daily_summary'
         unique_together = ['user', 'date']
         indexes = [
             models.Index(fields=['user', 'date']),
-        ]
\ No newline at end of file
+        ]
+
+class RecipeDailyStats(models.Model):
+    """Daily per-recipe rollup; closed days are rebuilt by aggregate_daily_analytics, today is bumped live"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    shares = models.PositiveIntegerField(default=0)
+    saves = models.PositiveIntegerField(default=0)
+    time_spent_total = models.BigIntegerField(default=0, help_text="Seconds")
+    # HyperLogLog of the day's visitors (see analytics/hyperloglog.py); unique_visitors is its estimate
+    visitors_sketch = models.BinaryField(default=b'', blank=True)
+    
+    class Meta:
+        db_table = 'analytics_recipe_daily_stats'
+        # The unique index doubles as the (recipe, date) range-scan index
+        unique_together = ['recipe', 'date']
+
+class MetricQuantileSketch(models.Model):
+    """
+    KLL sketch (see analytics/quantiles.py) of one metric's per-recipe mean daily
+    value over the window_days days ending at date (window_days=1: that day's
+    values), for one category or the whole platform.
+    """
+    date = models.DateField()
+    window_days = models.PositiveSmallIntegerField(default=1)
+    metric = models.CharField(max_length=20)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    sketch = models.BinaryField()
+    
+    class Meta:
+        db_table = 'analytics_metric_quantile_sketches'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'window_days', 'metric', 'category'],
+                name='unique_metric_sketch_per_category'
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'window_days', 'metric'],
+                condition=models.Q(category__isnull=True),
+                name='unique_metric_sketch_platform'
+            ),
+        ]
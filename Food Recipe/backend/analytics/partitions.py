@@ -0,0 +1,92 @@
+# analytics/partitions.py
+"""
+Monthly range partitions for the analytics event tables (PostgreSQL only).
+
+Each event table is partitioned on its timestamp into <table>_pYYYYMM
+partitions plus a <table>_default partition that catches rows no monthly
+partition covers yet. The manage_analytics_partitions command creates the
+upcoming months ahead of time and drops months older than the retention
+window, so deleting old events is a DROP TABLE instead of a row-by-row DELETE.
+"""
+import re
+from datetime import date
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RecipeView, RecipeLike, RecipeComment, RecipeShare, RecipeSave, EngagementEvent
+from .timeseries import add_months
+
+RETENTION_MONTHS = getattr(settings, 'ANALYTICS_RETENTION_MONTHS', 24)
+
+# model -> partition key
+PARTITIONED_MODELS = {
+    RecipeView: 'viewed_at',
+    RecipeLike: 'created_at',
+    RecipeComment: 'created_at',
+    RecipeShare: 'shared_at',
+    RecipeSave: 'saved_at',
+    EngagementEvent: 'created_at',
+}
+
+_MONTH_SUFFIX = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def retention_cutoff(retain_months=RETENTION_MONTHS):
+    """First day of the oldest month still retained, or None when retention is off"""
+    if not retain_months:
+        return None
+    return add_months(timezone.now().date(), -retain_months)
+
+
+def list_partitions(cursor, table):
+    """{month (date): partition name} of the monthly partitions attached to table"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s",
+        [table]
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = _MONTH_SUFFIX.search(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(cursor, table, column, month):
+    """
+    Attach the partition for month, moving any of its rows out of the default
+    partition first (ATTACH would fail while the default still holds them).
+    """
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    lower, upper = month, add_months(month, 1)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{default}" WHERE "{column}" >= %s AND "{column}" < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [lower, upper]
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [lower, upper]
+    )
+    return name
+
+
+def drop_partition(cursor, table, name, detach_only=False):
+    """Detach a partition and, unless detach_only, drop it"""
+    cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+    if not detach_only:
+        cursor.execute(f'DROP TABLE "{name}"')
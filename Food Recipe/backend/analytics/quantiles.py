@@ -0,0 +1,155 @@
+# analytics/quantiles.py
+"""
+KLL sketches for approximate ranks and quantiles of per-recipe daily metrics.
+
+A sketch keeps a stack of compactors: level h holds items that each stand for
+2**h inputs. When a level fills up it is sorted and every other item is
+promoted to the next level, so the sketch stays at roughly 3 * K items
+whatever the input size, with rank error around 1.7 / K (~1% for K = 200).
+Sketches merge by concatenating levels and compacting again, so sketches of
+single days and categories combine into any range or the whole platform.
+
+Most recipes see no saves, shares or comments on most days, so zeros are
+counted exactly beside the compactors instead of filling them up.
+
+Items are serialized as float64: per-day means such as 1/7 must compare equal
+to the same mean computed at read time, which float32 rounding breaks.
+"""
+import math
+import struct
+import zlib
+from array import array
+
+K = 200
+
+_HEADER = struct.Struct('>HIIH')  # k, zeros, items, levels
+_LEVEL = struct.Struct('>I')
+# Marks float64 sketches; older float32 ones are plain zlib streams (b'x...')
+_FLOAT64 = b'd'
+
+
+class KLLSketch:
+    """Mergeable approximate quantile sketch for non-negative values"""
+
+    def __init__(self, k=K):
+        self.k = k
+        self.zeros = 0
+        self.items = 0
+        self.levels = [[]]
+        self._offset = 0
+
+    def add(self, value):
+        if value == 0:
+            self.zeros += 1
+            return
+        self.items += 1
+        self.levels[0].append(float(value))
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def add_zeros(self, count):
+        """Count zeros in bulk (e.g. recipes with no activity)"""
+        self.zeros += max(count, 0)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one (in place) and return self"""
+        self.zeros += other.zeros
+        self.items += other.items
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in zip(self.levels, other.levels):
+            level.extend(items)
+        self._compress()
+        return self
+
+    def __len__(self):
+        return self.zeros + self.items
+
+    def rank(self, value):
+        """Approximate share of the inputs that are <= value"""
+        total = len(self)
+        if not total or value < 0:
+            return 0.0
+        below = self.zeros
+        for h, level in enumerate(self.levels):
+            below += sum(1 for item in level if item <= value) << h
+        return min(below / total, 1.0)
+
+    def quantile(self, q):
+        """Approximate value at rank q (0..1); None for an empty sketch"""
+        total = len(self)
+        if not total:
+            return None
+        target = q * total
+        if target <= self.zeros:
+            return 0.0
+        weighted = sorted((item, 1 << h) for h, level in enumerate(self.levels) for item in level)
+        seen = self.zeros
+        for item, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return item
+        return weighted[-1][0] if weighted else 0.0
+
+    def to_bytes(self):
+        parts = [_HEADER.pack(self.k, self.zeros, self.items, len(self.levels))]
+        for level in self.levels:
+            parts.append(_LEVEL.pack(len(level)))
+            parts.append(array('d', level).tobytes())
+        return _FLOAT64 + zlib.compress(b''.join(parts))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a serialized sketch; empty or missing data gives an empty sketch"""
+        if not data:
+            return cls()
+        data = bytes(data)
+        typecode = 'f'
+        if data[:1] == _FLOAT64:
+            typecode, data = 'd', data[1:]
+        data = zlib.decompress(data)
+        k, zeros, items, levels = _HEADER.unpack_from(data)
+        sketch = cls(k)
+        sketch.zeros, sketch.items, sketch.levels = zeros, items, []
+        offset = _HEADER.size
+        for _ in range(levels):
+            (length,) = _LEVEL.unpack_from(data, offset)
+            offset += _LEVEL.size
+            level = array(typecode)
+            level.frombytes(data[offset:offset + length * level.itemsize])
+            offset += length * level.itemsize
+            sketch.levels.append(level.tolist())
+        return sketch
+
+    @classmethod
+    def union(cls, sketches):
+        """Merge serialized or loaded sketches into a new one"""
+        merged = cls()
+        for sketch in sketches:
+            merged.merge(sketch if isinstance(sketch, cls) else cls.from_bytes(sketch))
+        return merged
+
+    def _capacity(self, h):
+        # Lower levels shrink geometrically (factor 2/3) below the top one
+        depth = len(self.levels) - h - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) >= self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                level.sort()
+                # An odd item out stays behind; the rest halve into the next level
+                keep = [level.pop()] if len(level) % 2 else []
+                self.levels[h + 1].extend(level[self._offset::2])
+                self._offset ^= 1
+                self.levels[h] = keep
+            h += 1
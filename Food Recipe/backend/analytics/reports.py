@@ -0,0 +1,154 @@
+# analytics/reports.py
+"""
+Retention cohorts and view -> like -> save funnels over the columnar export.
+
+Both reports work on whole columns with NumPy sorts and bincounts instead of
+per-row Python, so tens of millions of events take seconds. Visitors are the
+EngagementEvent visitor hash (user, else session, else IP), which is the same
+for a signed-in user's views, likes and saves.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+from .columnar import load_columns
+from .models import EngagementEvent
+from .timeseries import day_range
+
+DAY_SECONDS = 24 * 60 * 60
+FUNNEL_STEPS = [EngagementEvent.VIEW, EngagementEvent.LIKE, EngagementEvent.SAVE]
+_NEVER = np.iinfo(np.int64).max
+# Odd 64-bit constant (golden ratio) used to mix recipe ids into visitor hashes
+_PAIR_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _for_author(columns, author_id):
+    if author_id is None:
+        return columns
+    mask = columns['author_id'] == author_id
+    return {name: values[mask] for name, values in columns.items()}
+
+
+def _run_starts(sorted_values):
+    """Indexes where a new run of equal values starts in a sorted array"""
+    return np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+
+
+def _low_bits(n):
+    """Bits needed for values 0..n-1"""
+    return max(int(n - 1).bit_length(), 1)
+
+
+def cohort_retention(start_date, end_date, author_id=None, period_days=7):
+    """
+    Visitors grouped by the period of their first event in the range, and the
+    share of each cohort active again in each later period.
+
+    Args:
+        start_date, end_date (date): Inclusive range of exported days.
+        author_id (int): Only events on this author's recipes. None for the whole platform.
+        period_days (int): Cohort / retention period length.
+
+    Returns:
+        list: [{'cohort': date, 'size': int, 'retention': [share active in period 0, 1, ...]}]
+    """
+    columns, _ = load_columns(start_date, end_date, ['author_id', 'visitor', 'created_at'])
+    columns = _for_author(columns, author_id)
+    n_periods = -(-((end_date - start_date).days + 1) // period_days)
+    if not len(columns['visitor']):
+        return []
+
+    range_start = int(day_range(start_date, start_date)[0].timestamp())
+    period = ((columns['created_at'] - range_start) // (period_days * DAY_SECONDS)).astype(np.uint64)
+
+    # Pack (visitor, period) into one sortable key; shifting drops the visitor
+    # hash's top bits, which only merges visitors colliding on all the others
+    bits = np.uint64(_low_bits(n_periods))
+    mask = np.uint64((1 << int(bits)) - 1)
+    keys = np.sort((columns['visitor'].view(np.uint64) << bits) | period)
+    active = keys[_run_starts(keys)]
+    active_visitor, active_period = active >> bits, (active & mask).astype(np.int64)
+
+    # Sorted by visitor then period, so each visitor's first row is their cohort
+    visitor_starts = _run_starts(active_visitor)
+    cohort = np.repeat(active_period[visitor_starts], np.diff(np.r_[visitor_starts, len(active)]))
+
+    matrix = np.bincount(
+        cohort * n_periods + (active_period - cohort), minlength=n_periods * n_periods
+    ).reshape(n_periods, n_periods)
+
+    report = []
+    for index, row in enumerate(matrix):
+        size = int(row[0])
+        if size:
+            report.append({
+                'cohort': start_date + timedelta(days=index * period_days),
+                'size': size,
+                'retention': [round(count / size, 4) for count in row[:n_periods - index].tolist()],
+            })
+    return report
+
+
+def funnel(start_date, end_date, author_id=None, steps=FUNNEL_STEPS):
+    """
+    Ordered funnel per (visitor, recipe): a pair reaches step i when it has an
+    event of that type no earlier than its first event of step i - 1.
+
+    Returns:
+        list: [{'step': name, 'count': int, 'from_previous': share, 'from_first': share}]
+    """
+    columns, _ = load_columns(
+        start_date, end_date, ['event_type', 'author_id', 'recipe_id', 'visitor', 'created_at']
+    )
+    columns = _for_author(columns, author_id)
+    names = dict(EngagementEvent.EVENT_TYPES)
+
+    step_of_type = np.full(256, -1, dtype=np.int64)
+    step_of_type[steps] = np.arange(len(steps))
+    step = step_of_type[columns['event_type']]
+    selected = step >= 0
+
+    counts = np.zeros(len(steps), dtype=np.int64)
+    if selected.any():
+        # One 64-bit key per (visitor, recipe, step): the pair hashed together,
+        # shifted to make room for the step in the low bits
+        bits = np.uint64(_low_bits(len(steps)))
+        mask = np.uint64((1 << int(bits)) - 1)
+        pair = columns['visitor'][selected].view(np.uint64) ^ (
+            columns['recipe_id'][selected].astype(np.uint64) * _PAIR_MIX
+        )
+        keys = (pair << bits) | step[selected].astype(np.uint64)
+
+        order = np.argsort(keys)
+        keys = keys[order]
+        groups = _run_starts(keys)
+        first_seen = np.minimum.reduceat(columns['created_at'][selected][order], groups)
+        group_keys = keys[groups]
+
+        pair_id = np.cumsum(np.r_[True, (group_keys[1:] >> bits) != (group_keys[:-1] >> bits)]) - 1
+        first_at = np.full((pair_id[-1] + 1, len(steps)), _NEVER, dtype=np.int64)
+        first_at[pair_id, (group_keys & mask).astype(np.int64)] = first_seen
+
+        reached = first_at[:, 0] != _NEVER
+        counts[0] = reached.sum()
+        for i in range(1, len(steps)):
+            reached &= (first_at[:, i] != _NEVER) & (first_at[:, i] >= first_at[:, i - 1])
+            counts[i] = reached.sum()
+
+    report = []
+    for i, event_type in enumerate(steps):
+        count = int(counts[i])
+        previous, top = int(counts[i - 1]) if i else count, int(counts[0])
+        report.append({
+            'step': names[event_type].lower(),
+            'count': count,
+            'from_previous': round(count / previous, 4) if previous else 0,
+            'from_first': round(count / top, 4) if top else 0,
+        })
+    return report
+
+
+REPORTS = {
+    'cohorts': cohort_retention,
+    'funnel': funnel,
+}
@@ -0,0 +1,359 @@
+# analytics/rollups.py
+"""
+Daily per-author rollups (DailyAnalyticsSummary).
+
+compute_daily_summaries() builds the rollups for a date range from the raw
+events with a handful of GROUP BY queries, whatever the number of authors or
+days. Event counts come from a single scan of the EngagementEvent log with
+one conditional aggregate per event type. The aggregate_daily_analytics command stores them for
+closed days; the dashboard reads the stored rows and only computes today
+(and any day the job has not covered yet) live.
+
+RecipeDailyStats holds the same numbers per recipe: the job rebuilds closed
+days with compute_recipe_daily_stats(), and the tracking paths add today's
+events as they are written with bump_recipe_daily_stats().
+
+Unique visitors are HyperLogLog sketches (visitors_sketch) rather than plain
+counts, so they can be merged across days and recipes.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from recipe.models import Recipe
+from .models import (
+    RecipeView, UserFollowing, DailyAnalyticsSummary, RecipeDailyStats, EngagementEvent
+)
+from .hyperloglog import HyperLogLog
+from .timeseries import day_range
+
+# DailyAnalyticsSummary counters; unique_visitors is combined through visitors_sketch, not summed
+SUMMARY_TOTALS = [
+    'total_views', 'unique_visitors', 'total_likes', 'total_comments',
+    'total_shares', 'total_saves', 'new_followers',
+]
+
+# EngagementEvent type -> metric, all counted in the same scan by _event_counts
+EVENT_COUNTS = {
+    EngagementEvent.VIEW: 'views',
+    EngagementEvent.LIKE: 'likes',
+    EngagementEvent.COMMENT: 'comments',
+    EngagementEvent.SHARE: 'shares',
+    EngagementEvent.SAVE: 'saves',
+}
+
+# Per-recipe metrics kept in recipe_breakdown
+RECIPE_METRICS = ['views', 'likes', 'comments', 'shares', 'saves']
+
+RECIPE_STATS_FIELDS = ['views', 'unique_visitors', 'time_spent_total', 'likes', 'comments', 'shares', 'saves']
+
+UNCATEGORIZED = 'Uncategorized'
+
+
+def _days(start_date, end_date):
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def visitor_identity(user_id, session_key, ip_address):
+    """Value hashed into visitor sketches: user, else session, else IP (the RecipeView dedupe identity)"""
+    if user_id:
+        return f'u:{user_id}'
+    if session_key:
+        return f's:{session_key}'
+    return f'i:{ip_address}'
+
+
+def _visitor_sketches(views, range_start, range_end, group_field):
+    """{(group_field value, day): HyperLogLog} of the visitors in views"""
+    sketches = defaultdict(HyperLogLog)
+    rows = (
+        views
+        .filter(viewed_at__gte=range_start, viewed_at__lt=range_end)
+        .annotate(day=TruncDate('viewed_at'))
+        .values_list(group_field, 'day', 'user_id', 'session_key', 'ip_address')
+        .order_by()
+    )
+    for group, day, user_id, session_key, ip_address in rows.iterator(chunk_size=5000):
+        sketches[(group, day)].add(visitor_identity(user_id, session_key, ip_address))
+    return sketches
+
+
+def _per_day(queryset, date_field, range_start, range_end, *group_by):
+    """Rows of queryset in [range_start, range_end) counted per group_by fields and day"""
+    return (
+        queryset
+        .filter(**{f'{date_field}__gte': range_start, f'{date_field}__lt': range_end})
+        .annotate(day=TruncDate(date_field))
+        .values(*group_by, 'day')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+
+
+def _event_counts(events, range_start, range_end, *group_by):
+    """Every EVENT_COUNTS metric of events in [range_start, range_end) per group_by fields and day"""
+    return (
+        events
+        .filter(created_at__gte=range_start, created_at__lt=range_end)
+        .annotate(day=TruncDate('created_at'))
+        .values(*group_by, 'day')
+        .annotate(**{
+            metric: Count('pk', filter=Q(event_type=event_type))
+            for event_type, metric in EVENT_COUNTS.items()
+        })
+        .order_by()
+    )
+
+
+def compute_daily_summaries(start_date, end_date, author_ids=None):
+    """
+    Build DailyAnalyticsSummary rows for every author and day in the range.
+
+    Args:
+        start_date (date): First day (inclusive).
+        end_date (date): Last day (inclusive).
+        author_ids (list): Restrict to these authors. Defaults to every user with recipes.
+
+    Returns:
+        dict: {(author_id, date): unsaved DailyAnalyticsSummary}
+    """
+    range_start, range_end = day_range(start_date, end_date)
+    recipes = Recipe.objects.all()
+    if author_ids is not None:
+        recipes = recipes.filter(author_id__in=author_ids)
+
+    recipe_counts = dict(recipes.values_list('author_id').annotate(n=Count('pk')).order_by())
+    authors = set(author_ids) if author_ids is not None else set(recipe_counts)
+
+    summaries = {
+        (author_id, day): DailyAnalyticsSummary(
+            user_id=author_id,
+            date=day,
+            recipe_count=recipe_counts.get(author_id, 0),
+            recipe_breakdown={},
+            category_breakdown={},
+        )
+        for author_id in authors
+        for day in _days(start_date, end_date)
+    }
+
+    def add(author_id, day, field, value):
+        summary = summaries.get((author_id, day))
+        if summary is not None:
+            setattr(summary, field, getattr(summary, field) + value)
+            return summary
+
+    # Totals, per-recipe metrics and views per category
+    rows = _event_counts(
+        EngagementEvent.objects.filter(recipe__in=recipes), range_start, range_end,
+        'recipe_id', 'recipe__author_id', 'recipe__category__name'
+    )
+    for row in rows:
+        summary = summaries.get((row['recipe__author_id'], row['day']))
+        if summary is None:
+            continue
+        for metric in EVENT_COUNTS.values():
+            add(row['recipe__author_id'], row['day'], f'total_{metric}', row[metric])
+        if any(row[metric] for metric in RECIPE_METRICS):
+            breakdown = summary.recipe_breakdown.setdefault(
+                str(row['recipe_id']), {metric: 0 for metric in RECIPE_METRICS}
+            )
+            for metric in RECIPE_METRICS:
+                breakdown[metric] += row[metric]
+        if row['views']:
+            category = row['recipe__category__name'] or UNCATEGORIZED
+            summary.category_breakdown[category] = summary.category_breakdown.get(category, 0) + row['views']
+
+    sketches = _visitor_sketches(RecipeView.objects.filter(recipe__in=recipes), range_start, range_end, 'recipe__author_id')
+    for (author_id, day), sketch in sketches.items():
+        summary = summaries.get((author_id, day))
+        if summary is not None:
+            summary.visitors_sketch = sketch.to_bytes()
+            summary.unique_visitors = sketch.count()
+
+    followers = UserFollowing.objects.all()
+    if author_ids is not None:
+        followers = followers.filter(following_id__in=author_ids)
+    for row in _per_day(followers, 'created_at', range_start, range_end, 'following_id'):
+        add(row['following_id'], row['day'], 'new_followers', row['n'])
+
+    return summaries
+
+
+def store_daily_summaries(summaries):
+    """
+    Upsert summaries (as returned by compute_daily_summaries) in one statement.
+    Safe to rerun: existing (user, date) rows are overwritten.
+    """
+    return DailyAnalyticsSummary.objects.bulk_create(
+        list(summaries.values()),
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=SUMMARY_TOTALS + ['recipe_count', 'recipe_breakdown', 'category_breakdown', 'visitors_sketch'],
+        batch_size=1000,
+    )
+
+
+def compute_recipe_daily_stats(start_date, end_date):
+    """
+    Build RecipeDailyStats rows for start_date..end_date: event counts from one
+    scan of the engagement log, time spent and visitors from RecipeView. Only recipe-days with some activity get a row.
+
+    Returns:
+        dict: {(recipe_id, date): unsaved RecipeDailyStats}
+    """
+    range_start, range_end = day_range(start_date, end_date)
+    stats = {}
+
+    def row_for(recipe_id, day):
+        key = (recipe_id, day)
+        if key not in stats:
+            stats[key] = RecipeDailyStats(recipe_id=recipe_id, date=day)
+        return stats[key]
+
+    for row in _event_counts(EngagementEvent.objects.all(), range_start, range_end, 'recipe_id'):
+        stats_row = row_for(row['recipe_id'], row['day'])
+        for metric in EVENT_COUNTS.values():
+            setattr(stats_row, metric, row[metric])
+
+    # Repeat visits add to time_spent on the RecipeView row, not to the log
+    time_spent = (
+        RecipeView.objects
+        .filter(viewed_at__gte=range_start, viewed_at__lt=range_end, time_spent__gt=0)
+        .annotate(day=TruncDate('viewed_at'))
+        .values('recipe_id', 'day')
+        .annotate(seconds=Sum('time_spent'))
+        .order_by()
+    )
+    for row in time_spent:
+        row_for(row['recipe_id'], row['day']).time_spent_total = row['seconds']
+
+    for key, sketch in _visitor_sketches(RecipeView.objects.all(), range_start, range_end, 'recipe_id').items():
+        stats_row = row_for(*key)
+        stats_row.visitors_sketch = sketch.to_bytes()
+        stats_row.unique_visitors = sketch.count()
+
+    return stats
+
+
+def store_recipe_daily_stats(start_date, end_date, stats):
+    """Replace the RecipeDailyStats rows of start_date..end_date with stats (idempotent)"""
+    with transaction.atomic():
+        RecipeDailyStats.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        RecipeDailyStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+def bump_recipe_daily_stats(deltas, day=None):
+    """
+    Add live events to RecipeDailyStats in one statement.
+
+    Args:
+        deltas (dict): {recipe_id: {field: delta}} with fields from RECIPE_STATS_FIELDS.
+        day (date): Defaults to today.
+    """
+    day = day or timezone.now().date()
+    rows = []
+    # Sorted so concurrent writers lock rows in the same order
+    for recipe_id, fields in sorted(deltas.items()):
+        if any(fields.values()):
+            rows.append([recipe_id, day] + [fields.get(field, 0) for field in RECIPE_STATS_FIELDS])
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(RecipeDailyStats._meta.db_table)
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * (len(RECIPE_STATS_FIELDS) + 2)) + ')'] * len(rows))
+    updates = ', '.join(f"{field} = {table}.{field} + EXCLUDED.{field}" for field in RECIPE_STATS_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (recipe_id, date, {', '.join(RECIPE_STATS_FIELDS)}) VALUES {placeholders} "
+            f"ON CONFLICT (recipe_id, date) DO UPDATE SET {updates}",
+            [value for row in rows for value in row]
+        )
+
+
+def add_recipe_visitors(visitors, day=None):
+    """
+    Add visitors to the recipes' daily sketches and refresh unique_visitors.
+
+    Args:
+        visitors (dict): {recipe_id: [visitor_identity(...), ...]}
+        day (date): Defaults to today.
+
+    The rows are locked while their sketches are merged, so concurrent
+    writers do not lose each other's visitors.
+    """
+    day = day or timezone.now().date()
+    if not visitors:
+        return
+
+    with transaction.atomic():
+        # Make sure every row exists before locking
+        RecipeDailyStats.objects.bulk_create(
+            [RecipeDailyStats(recipe_id=recipe_id, date=day) for recipe_id in sorted(visitors)],
+            ignore_conflicts=True
+        )
+        rows = list(
+            RecipeDailyStats.objects
+            .select_for_update()
+            .filter(recipe_id__in=visitors, date=day)
+            .order_by('recipe_id')
+            .only('id', 'recipe_id', 'visitors_sketch')
+        )
+        for row in rows:
+            sketch = HyperLogLog.from_bytes(row.visitors_sketch).update(visitors[row.recipe_id])
+            row.visitors_sketch = sketch.to_bytes()
+            row.unique_visitors = sketch.count()
+        RecipeDailyStats.objects.bulk_update(rows, ['visitors_sketch', 'unique_visitors'])
+
+
+def get_author_summaries(user, start_date, end_date):
+    """
+    {date: DailyAnalyticsSummary} for one author over start_date..end_date.
+
+    Closed days come from the stored rollups; today and any day without a
+    stored row are computed live from the raw events in one pass.
+    """
+    today = timezone.now().date()
+    summaries = {
+        summary.date: summary
+        for summary in DailyAnalyticsSummary.objects.filter(
+            user=user, date__gte=start_date, date__lte=end_date, date__lt=today
+        )
+    }
+
+    missing = [day for day in _days(start_date, end_date) if day not in summaries]
+    if missing:
+        live = compute_daily_summaries(min(missing), max(missing), author_ids=[user.id])
+        for day in missing:
+            summaries[day] = live[(user.id, day)]
+    return summaries
+
+
+def combine_summaries(summaries):
+    """
+    Add up several daily summaries.
+
+    Returns:
+        dict: SUMMARY_TOTALS -> int (unique_visitors from the merged sketches),
+        plus 'recipes' ({recipe_id: Counter of RECIPE_METRICS}) and
+        'categories' (Counter of views).
+    """
+    totals = dict.fromkeys(SUMMARY_TOTALS, 0)
+    recipes = defaultdict(Counter)
+    categories = Counter()
+    visitors = HyperLogLog()
+    for summary in summaries:
+        for field in SUMMARY_TOTALS:
+            totals[field] += getattr(summary, field)
+        for recipe_id, metrics in summary.recipe_breakdown.items():
+            recipes[int(recipe_id)].update(metrics)
+        categories.update(summary.category_breakdown)
+        visitors.merge(HyperLogLog.from_bytes(summary.visitors_sketch))
+    totals['unique_visitors'] = visitors.count()
+    totals['recipes'] = recipes
+    totals['categories'] = categories
+    return totals
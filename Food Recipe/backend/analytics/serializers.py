@@ -43,6 +43,22 @@ class FollowersSerializer(serializers.Serializer):
     growth = serializers.IntegerField()
     growthPercentage = serializers.FloatField(required=False, default=0)
 
+class CategoryBenchmarkSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    medianRecipeDaily = serializers.FloatField()
+    percentile = serializers.IntegerField(allow_null=True)
+
+class MetricBenchmarkSerializer(serializers.Serializer):
+    metric = serializers.CharField()
+    medianRecipeDaily = serializers.FloatField()
+    platformPercentile = serializers.IntegerField(allow_null=True)
+    categories = CategoryBenchmarkSerializer(many=True)
+
+class BenchmarksSerializer(serializers.Serializer):
+    asOf = serializers.DateField()
+    windowDays = serializers.IntegerField()
+    metrics = MetricBenchmarkSerializer(many=True)
+
 class AnalyticsDataSerializer(serializers.Serializer):
     viewsData = ViewsDataSerializer(many=True)
     recipesPerformance = RecipePerformanceSerializer(many=True)
@@ -50,6 +66,8 @@ class AnalyticsDataSerializer(serializers.Serializer):
     engagement = EngagementSerializer()
     topRecipes = RecipePerformanceSerializer(many=True)
     categoryDistribution = CategoryDistributionSerializer(many=True)
+    # None until the nightly aggregation has stored benchmark sketches
+    benchmarks = BenchmarksSerializer(required=False, allow_null=True)
 
 class ViewTrackingSerializer(serializers.Serializer):
     recipe_id = serializers.IntegerField()
@@ -59,4 +77,19 @@ class EngagementActionSerializer(serializers.Serializer):
     action = serializers.ChoiceField(choices=['like', 'comment', 'share', 'save'])
     recipe_id = serializers.IntegerField()
     comment = serializers.CharField(required=False, allow_blank=True)
-    platform = serializers.CharField(required=False, default='other')
\ No newline at end of file
+    platform = serializers.ChoiceField(choices=RecipeShare.SHARE_PLATFORMS, required=False, default='other')
+
+class EngagementEventSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['like', 'favorite', 'share', 'view'])
+    recipe_id = serializers.IntegerField()
+    # like/favorite: False removes the reaction
+    active = serializers.BooleanField(default=True)
+    platform = serializers.ChoiceField(choices=RecipeShare.SHARE_PLATFORMS, required=False, default='other')
+    time_spent = serializers.IntegerField(min_value=0, required=False, default=0)
+
+class EngagementBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=100
+    )
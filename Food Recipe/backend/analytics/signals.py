@@ -1,9 +1,16 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from recipe.models import Recipe, Comment, LikedRecipe, FavoriteRecipe
-from .models import RecipeView, RecipeLike, RecipeComment, RecipeShare, RecipeSave
+from recipe.counters import increment_counter, increment_counters
+from .models import RecipeView, RecipeLike, RecipeComment, RecipeShare, RecipeSave, RecipeReaction, EngagementEvent, UserFollowing
+from .dashboard_cache import bump_author_versions
+from .events import engagement_event, log_events
+from .ingestion import ViewEvent, enqueue_view, write_view_events
+from .rollups import bump_recipe_daily_stats
+from collections import defaultdict
 from datetime import timedelta
+from django.db import connection, transaction
 from django.utils import timezone
 
 User = get_user_model()
@@ -12,13 +19,13 @@ User = get_user_model()
 @receiver(post_save, sender=LikedRecipe)
 def track_recipe_like(sender, instance, created, **kwargs):
     if created:
-        RecipeLike.objects.create(recipe=instance.recipe, user=instance.user)
+        track_recipe_reactions_bulk('like', [instance.recipe_id], instance.user)
 
 # Track when a recipe is saved/bookmarked
 @receiver(post_save, sender=FavoriteRecipe)
 def track_recipe_save(sender, instance, created, **kwargs):
     if created:
-        RecipeSave.objects.create(recipe=instance.recipe, user=instance.user)
+        track_recipe_reactions_bulk('favorite', [instance.recipe_id], instance.user)
 
 # Track when a comment is made
 @receiver(post_save, sender=Comment)
@@ -26,44 +33,71 @@ def track_recipe_comment(sender, instance, created, **kwargs):
     if created:
         RecipeComment.objects.create(recipe=instance.recipe, user=instance.user)
 
+# Keep today's RecipeDailyStats row current as engagement events are recorded
+DAILY_STATS_FIELDS = {RecipeLike: 'likes', RecipeComment: 'comments', RecipeShare: 'shares', RecipeSave: 'saves'}
+
+@receiver(post_save, sender=RecipeLike)
+@receiver(post_save, sender=RecipeComment)
+@receiver(post_save, sender=RecipeShare)
+@receiver(post_save, sender=RecipeSave)
+def track_recipe_daily_stats(sender, instance, created, **kwargs):
+    if created and instance.recipe_id:
+        bump_recipe_daily_stats({instance.recipe_id: {DAILY_STATS_FIELDS[sender]: 1}})
+
+# Append every engagement event to the unified log as well
+EVENT_TYPES = {
+    RecipeLike: EngagementEvent.LIKE,
+    RecipeComment: EngagementEvent.COMMENT,
+    RecipeShare: EngagementEvent.SHARE,
+    RecipeSave: EngagementEvent.SAVE,
+}
+
+def _engagement_event(instance):
+    return engagement_event(
+        EVENT_TYPES[type(instance)],
+        instance.recipe_id,
+        instance.user_id,
+        instance.session_key,
+        instance.ip_address,
+        platform=getattr(instance, 'platform', None),
+    )
+
+@receiver(post_save, sender=RecipeLike)
+@receiver(post_save, sender=RecipeComment)
+@receiver(post_save, sender=RecipeShare)
+@receiver(post_save, sender=RecipeSave)
+def log_engagement_event(sender, instance, created, **kwargs):
+    if created and instance.recipe_id:
+        log_events([_engagement_event(instance)])
+
+# Follower counts are part of the cached dashboard
+@receiver(post_save, sender=UserFollowing)
+@receiver(post_delete, sender=UserFollowing)
+def invalidate_followed_dashboard(sender, instance, **kwargs):
+    bump_author_versions([instance.following_id])
+
 def track_recipe_view(recipe, user=None, ip_address=None, user_agent=None, referrer=None, session_key=None, time_spent=0):
     """
     Track a unique recipe view.
     - For authenticated users: only one view per user per recipe ever (no repeat views).
     - For anonymous users: only one view per session_key (or IP) per recipe ever.
     - Do NOT count views from the recipe's author (chef).
+    The view is queued for the ingestion pipeline (analytics/ingestion.py), which
+    enforces the dedupe rules against the unique indexes when the batch is written.
     """
     # Do not count views from the recipe's author
-    if user and user.is_authenticated and hasattr(recipe, 'author') and recipe.author == user:
-        return
-
-    # Defensive: also check for author by id if possible
-    if user and user.is_authenticated and hasattr(recipe, 'author_id') and recipe.author_id == user.id:
+    if user and user.is_authenticated and recipe.author_id == user.id:
         return
 
-    filters = {'recipe': recipe}
-    if user and user.is_authenticated:
-        filters['user'] = user
-    elif session_key:
-        filters['session_key'] = session_key
-    elif ip_address:
-        filters['ip_address'] = ip_address
-    else:
-        filters['session_key'] = None
-        filters['ip_address'] = None
-        filters['user'] = None
-
-    # Only count a view if it does not already exist
-    if not RecipeView.objects.filter(**filters).exists():
-        RecipeView.objects.create(
-            recipe=recipe,
-            user=user if user and user.is_authenticated else None,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            referrer=referrer,
-            session_key=session_key,
-            time_spent=time_spent
-        )
+    enqueue_view(
+        recipe.id,
+        user=user,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        referrer=referrer,
+        session_key=session_key,
+        time_spent=time_spent
+    )
 
 # Example: Track when a recipe is shared (call this manually in your share logic)
 def track_recipe_share(recipe, user=None, platform=None, ip_address=None, session_key=None):
@@ -75,6 +109,7 @@ def track_recipe_share(recipe, user=None, platform=None, ip_address=None, sessio
         ip_address=ip_address,
         session_key=session_key
     )
+    increment_counter(recipe.id, 'shares')
     
 def track_recipe_comment_manual(recipe, user=None, ip_address=None, session_key=None, comment=''):
     RecipeComment.objects.create(
@@ -86,22 +121,95 @@ def track_recipe_comment_manual(recipe, user=None, ip_address=None, session_key=
     )
 
 def track_recipe_save_manual(recipe, user=None, ip_address=None, session_key=None, **kwargs):
-    """Track when a recipe is saved/bookmarked"""
-    # Avoid duplicate RecipeSave for the same user/recipe
-    RecipeSave.objects.get_or_create(
-        recipe=recipe,
-        user=user,
-        defaults={
-            'ip_address': ip_address,
-            'session_key': session_key
-        }
-    )
+    """Track when a recipe is saved/bookmarked (once per user, see track_recipe_reactions_bulk)"""
+    return recipe.id in track_recipe_reactions_bulk('favorite', [recipe.id], user, ip_address, session_key)
     
 def track_recipe_like_manual(recipe, user=None, ip_address=None, session_key=None, **kwargs):
-    """Track when a recipe is liked"""
-    RecipeLike.objects.create(
-        recipe=recipe,
-        user=user,
-        ip_address=ip_address,
-        session_key=session_key
-    )
\ No newline at end of file
+    """Track when a recipe is liked (once per user, see track_recipe_reactions_bulk)"""
+    return recipe.id in track_recipe_reactions_bulk('like', [recipe.id], user, ip_address, session_key)
+
+def track_recipe_views_bulk(recipes, user=None, ip_address=None, user_agent=None, referrer=None, session_key=None, time_spent=None):
+    """
+    Track unique views of several recipes by one viewer, written synchronously.
+    Same rules as track_recipe_view; time_spent is an optional {recipe_id: seconds} mapping.
+    Returns the set of recipe ids recorded as new views.
+    """
+    is_user = bool(user and user.is_authenticated)
+    time_spent = time_spent or {}
+    now = timezone.now()
+    events = [
+        ViewEvent(
+            recipe_id=recipe.id,
+            user_id=user.id if is_user else None,
+            session_key=session_key or None,
+            ip_address=ip_address or None,
+            user_agent=user_agent,
+            referrer=referrer,
+            time_spent=time_spent.get(recipe.id, 0),
+            viewed_at=now
+        )
+        for recipe in recipes
+        if not (is_user and recipe.author_id == user.id)
+    ]
+    return {key[0] for key in write_view_events(events)}
+
+def track_recipe_shares_bulk(shares, user=None, ip_address=None, session_key=None):
+    """Track several shares at once; shares is a list of (recipe_id, platform) pairs"""
+    created = RecipeShare.objects.bulk_create([
+        RecipeShare(
+            recipe_id=recipe_id,
+            user=user,
+            platform=platform,
+            ip_address=ip_address,
+            session_key=session_key
+        )
+        for recipe_id, platform in shares
+    ])
+    deltas = defaultdict(int)
+    for recipe_id, _ in shares:
+        deltas[(recipe_id, 'shares')] += 1
+    increment_counters(deltas)
+    # bulk_create skips post_save
+    bump_recipe_daily_stats({recipe_id: {'shares': count} for (recipe_id, _), count in deltas.items()})
+    log_events([_engagement_event(share) for share in created])
+
+def record_first_reactions(reaction, recipe_ids, user):
+    """
+    Add (recipe, user) pairs to the RecipeReaction ledger with INSERT ... ON CONFLICT DO NOTHING.
+
+    Returns:
+        set: recipe ids the user had never liked/saved before.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return set()
+    ledger = connection.ops.quote_name(RecipeReaction._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {ledger} (recipe_id, user_id, reaction, created_at) "
+            f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(recipe_ids))} "
+            "ON CONFLICT (recipe_id, user_id, reaction) DO NOTHING RETURNING recipe_id",
+            [value for recipe_id in recipe_ids for value in (recipe_id, user.id, reaction, now)]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+def track_recipe_reactions_bulk(reaction, recipe_ids, user, ip_address=None, session_key=None):
+    """
+    Record analytics likes ('like') or saves ('favorite').
+
+    Only a user's first like/save of a recipe is recorded: unlike/re-like
+    cycles would otherwise double count likes and saves in the daily stats
+    and the engagement log. Returns the set of recipe ids recorded.
+    """
+    model, ledger_reaction = (RecipeLike, RecipeReaction.LIKE) if reaction == 'like' else (RecipeSave, RecipeReaction.SAVE)
+    with transaction.atomic():
+        first = record_first_reactions(ledger_reaction, recipe_ids, user)
+        created = model.objects.bulk_create([
+            model(recipe_id=recipe_id, user=user, ip_address=ip_address, session_key=session_key)
+            for recipe_id in first
+        ])
+        # bulk_create skips post_save
+        bump_recipe_daily_stats({recipe_id: {DAILY_STATS_FIELDS[model]: 1} for recipe_id in first})
+        log_events([_engagement_event(row) for row in created])
+    return first
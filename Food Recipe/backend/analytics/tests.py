@@ -1,3 +1,179 @@
-from django.test import TestCase
+import random
+import struct
+import zlib
+from array import array
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from recipe.counters import get_counter
+from recipe.models import FavoriteRecipe, LikedRecipe, Recipe
+from . import ingestion
+from .bloom import BloomFilter, SeenFilter
+from .hyperloglog import HyperLogLog
+from .ingestion import ViewEvent, ViewIngestionBuffer
+from .models import EngagementEvent, RecipeDailyStats, RecipeLike, RecipeSave
+from .quantiles import KLLSketch
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def assertClose(self, estimate, exact, tolerance):
+        self.assertLessEqual(abs(estimate - exact), exact * tolerance, f'{estimate} vs {exact}')
+
+    def test_small_counts_are_near_exact(self):
+        sketch = HyperLogLog().update(f'visitor-{i}' for i in range(1000))
+        sketch.update(f'visitor-{i}' for i in range(500))  # repeats add nothing
+        self.assertClose(sketch.count(), 1000, 0.01)
+
+    def test_large_counts_within_error(self):
+        sketch = HyperLogLog().update(f'visitor-{i}' for i in range(30000))
+        self.assertClose(sketch.count(), 30000, 0.03)
+
+    def test_mid_range_is_unbiased(self):
+        # The classic estimator's linear counting/raw switch ran ~2% high around 45k
+        sketch = HyperLogLog()
+        added = 0
+        for exact in (10000, 20000, 30000, 40000, 45000, 50000, 60000, 70000, 80000, 90000, 100000):
+            sketch.update(f'visitor-{i}' for i in range(added, exact))
+            added = exact
+            self.assertClose(sketch.count(), exact, 0.012)
+
+    def test_merge_counts_the_union(self):
+        a = HyperLogLog().update(f'visitor-{i}' for i in range(0, 6000))
+        b = HyperLogLog().update(f'visitor-{i}' for i in range(4000, 10000))
+        self.assertClose(HyperLogLog.union([a, b]).count(), 10000, 0.03)
+
+    def test_round_trip_sparse_and_dense(self):
+        for n in (100, 10000):
+            sketch = HyperLogLog().update(range(n))
+            self.assertEqual(HyperLogLog.from_bytes(sketch.to_bytes()).count(), sketch.count())
+        self.assertEqual(HyperLogLog.from_bytes(b'').count(), 0)
+
+
+class KLLSketchTests(SimpleTestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+
+    def test_quantiles_within_rank_error(self):
+        values = [self.random.uniform(1, 1000) for _ in range(20000)]
+        sketch = KLLSketch().update(values)
+        ordered = sorted(values)
+        for q in (0.1, 0.5, 0.9, 0.99):
+            estimate = sketch.quantile(q)
+            exact_rank = sum(1 for v in ordered if v <= estimate) / len(values)
+            self.assertAlmostEqual(exact_rank, q, delta=0.02)
+
+    def test_rank_counts_bulk_zeros(self):
+        sketch = KLLSketch().update([1, 2, 3, 4])
+        sketch.add_zeros(4)
+        self.assertEqual(len(sketch), 8)
+        self.assertEqual(sketch.rank(0), 0.5)
+        self.assertEqual(sketch.rank(2), 0.75)
+        self.assertEqual(sketch.quantile(0.25), 0.0)
+
+    def test_merge_matches_single_sketch(self):
+        values = [self.random.expovariate(0.1) for _ in range(20000)]
+        merged = KLLSketch.union([KLLSketch().update(values[:10000]), KLLSketch().update(values[10000:])])
+        median = sorted(values)[len(values) // 2]
+        self.assertEqual(len(merged), len(values))
+        self.assertAlmostEqual(merged.rank(median), 0.5, delta=0.02)
+
+    def test_round_trip(self):
+        sketch = KLLSketch().update(self.random.uniform(0, 10) for _ in range(5000))
+        sketch.add_zeros(100)
+        loaded = KLLSketch.from_bytes(sketch.to_bytes())
+        self.assertEqual(len(loaded), len(sketch))
+        self.assertAlmostEqual(loaded.rank(5), sketch.rank(5), places=5)
+        self.assertIsNone(KLLSketch.from_bytes(None).quantile(0.5))
+
+    def test_round_trip_keeps_ties_with_float64_means(self):
+        sketch = KLLSketch().update([1 / 30] * 30 + [2 / 30] * 20)
+        sketch.add_zeros(50)
+        loaded = KLLSketch.from_bytes(sketch.to_bytes())
+        self.assertEqual(loaded.rank(1 / 30), sketch.rank(1 / 30))
+        self.assertEqual(loaded.rank(1 / 30), 0.8)
+        sevenths = KLLSketch.from_bytes(KLLSketch().update([1 / 7] * 10).to_bytes())
+        self.assertEqual(sevenths.rank(1 / 7), 1.0)
+
+    def test_reads_float32_sketches(self):
+        legacy = zlib.compress(
+            struct.pack('>HIIH', 200, 2, 3, 1) + struct.pack('>I', 3) + array('f', [0.5, 1.5, 2.5]).tobytes()
+        )
+        sketch = KLLSketch.from_bytes(legacy)
+        self.assertEqual((len(sketch), sketch.rank(1.5)), (5, 0.8))
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f'seen-{i}')
+        self.assertTrue(all(f'seen-{i}' in bloom for i in range(10000)))
+        false_positives = sum(1 for i in range(20000) if f'unseen-{i}' in bloom)
+        self.assertLess(false_positives / 20000, 0.02)
+        self.assertAlmostEqual(bloom.false_positive_rate(), 0.01, delta=0.005)
+
+    def test_seen_filter_keeps_one_previous_generation(self):
+        seen = SeenFilter(capacity=100, error_rate=0.001)
+        for i in range(250):
+            seen.add(f'pair-{i}')
+        self.assertEqual(seen.rotations, 2)
+        self.assertIn('pair-249', seen)
+        self.assertIn('pair-150', seen)  # previous generation
+        forgotten = sum(1 for i in range(100) if f'pair-{i}' in seen)
+        self.assertLess(forgotten, 5)
+        self.assertEqual(seen.stats()['items'], 150)
+
+
+
+class SeenFilterIngestionTests(SimpleTestCase):
+    def setUp(self):
+        self.seen = SeenFilter(capacity=100, error_rate=0.001)
+        self.enterContext(mock.patch.object(ingestion, 'seen_filter', self.seen))
+        self.buffer = ViewIngestionBuffer(max_size=10, batch_size=10, flush_interval_ms=10)
+        self.event = ViewEvent(1, 7, None, None, None, None, 0, None)
+
+    def test_pairs_are_remembered_after_a_successful_flush(self):
+        with mock.patch.object(ingestion, 'write_view_events', return_value={(1, 7, None, None)}):
+            self.buffer._flush([self.event])
+        self.assertIn(ingestion.seen_key(self.event), self.seen)
+
+    def test_failed_flush_does_not_suppress_the_viewer(self):
+        with mock.patch.object(ingestion, 'write_view_events', side_effect=DatabaseError('down')):
+            with self.assertLogs('analytics.ingestion', 'ERROR'):
+                self.buffer._flush([self.event])
+        self.assertNotIn(ingestion.seen_key(self.event), self.seen)
+        self.assertEqual(self.buffer.failed, 1)
+
+class RecipeEngagementViewTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        chef = User.objects.create_user(email='chef@example.com', username='chef', password='x')
+        self.user = User.objects.create_user(email='fan@example.com', username='fan', password='x')
+        self.recipe = Recipe.objects.create(
+            author=chef, title='Ndole', description='Bitterleaf stew', preparation_time=20, cooking_time=60,
+        )
+        self.client.force_authenticate(self.user)
+
+    def engage(self, action):
+        return self.client.post(reverse('engagement'), {'action': action, 'recipe_id': self.recipe.id}).data['status']
+
+    def test_like_unlike_like_counts_once(self):
+        self.assertEqual([self.engage('like') for _ in range(3)], ['liked', 'unliked', 'liked'])
+
+        self.assertTrue(LikedRecipe.objects.filter(user=self.user, recipe=self.recipe).exists())
+        self.assertEqual(get_counter(self.recipe.id, 'likes', use_cache=False), 1)
+        self.assertEqual(RecipeLike.objects.filter(recipe=self.recipe).count(), 1)
+        self.assertEqual(EngagementEvent.objects.filter(recipe=self.recipe, event_type=EngagementEvent.LIKE).count(), 1)
+        self.assertEqual(RecipeDailyStats.objects.get(recipe=self.recipe).likes, 1)
+
+    def test_unsave_keeps_the_analytics_row(self):
+        self.assertEqual([self.engage('save') for _ in range(2)], ['saved', 'unsaved'])
+
+        self.assertFalse(FavoriteRecipe.objects.filter(user=self.user, recipe=self.recipe).exists())
+        self.assertEqual(get_counter(self.recipe.id, 'favorites', use_cache=False), 0)
+        self.assertEqual(RecipeSave.objects.filter(recipe=self.recipe).count(), 1)
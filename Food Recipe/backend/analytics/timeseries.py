@@ -0,0 +1,91 @@
+# analytics/timeseries.py
+"""
+Time-series aggregation for the analytics dashboard.
+
+Every bucket of a series is computed by a single GROUP BY query over the
+truncated timestamp; buckets without rows are filled with zeros in Python,
+so the number of queries does not depend on the length of the range.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, DateField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+DAY = 'day'
+MONTH = 'month'
+
+
+def add_months(value, months):
+    """First day of the month `months` calendar months away from value's month"""
+    month_index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def bucket_starts(end_date, granularity, periods):
+    """
+    Start dates of the `periods` buckets ending with the one containing end_date,
+    oldest first. Monthly buckets are real calendar months.
+    """
+    if granularity == MONTH:
+        return [add_months(end_date, -i) for i in range(periods - 1, -1, -1)]
+    return [end_date - timedelta(days=i) for i in range(periods - 1, -1, -1)]
+
+
+def _start_of_day(value):
+    start = datetime.combine(value, time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def day_range(start_date, end_date):
+    """
+    [start, end) datetimes covering start_date..end_date inclusive.
+    Filtering on these keeps the (recipe, timestamp) indexes usable,
+    unlike a __date__range lookup.
+    """
+    return _start_of_day(start_date), _start_of_day(end_date + timedelta(days=1))
+
+
+def time_series(queryset, date_field, end_date, granularity=DAY, periods=30, distinct_field=None):
+    """
+    Count the rows of queryset per day or month in one query.
+
+    Args:
+        queryset: Rows to count (already filtered, e.g. to an author's recipes).
+        date_field (str): DateTimeField to bucket on.
+        end_date (date): Last day of the series (its bucket is included).
+        granularity (str): DAY or MONTH.
+        periods (int): Number of buckets.
+        distinct_field (str): Optional field to also count distinct values of.
+
+    Returns:
+        list: [{'bucket': date, 'count': int, 'distinct': int}, ...], oldest
+        first, one entry per bucket including empty ones.
+    """
+    starts = bucket_starts(end_date, granularity, periods)
+    range_start, range_end = day_range(starts[0], end_date)
+
+    aggregates = {'count': Count('pk')}
+    if distinct_field:
+        aggregates['distinct'] = Count(distinct_field, distinct=True)
+
+    rows = (
+        queryset
+        .filter(**{f'{date_field}__gte': range_start, f'{date_field}__lt': range_end})
+        .annotate(bucket=Trunc(date_field, granularity, output_field=DateField()))
+        .values('bucket')
+        .annotate(**aggregates)
+        .order_by()
+    )
+    by_bucket = {row['bucket']: row for row in rows}
+
+    series = []
+    for start in starts:
+        row = by_bucket.get(start, {})
+        series.append({
+            'bucket': start,
+            'count': row.get('count', 0),
+            'distinct': row.get('distinct', 0),
+        })
+    return series
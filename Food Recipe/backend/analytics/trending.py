@@ -0,0 +1,143 @@
+# analytics/trending.py
+"""
+Platform-wide trending recipes.
+
+Each recipe keeps one exponentially decayed score (RecipeTrendingScore):
+every engagement event adds its type's weight, and the whole score halves
+every HALF_LIFE_HOURS. Storing the score together with the time it was last
+brought up to date lets a write decay and add in a single upsert:
+
+    score = score * exp(-rate * (now - updated_at)) + weight
+
+refresh_trending() (run every few minutes by the refresh_trending_recipes
+command) decays every live score to the current time and materializes the
+top K overall and per category into TrendingRecipe, which the
+/recipes/trending/ endpoint reads by (category, rank).
+
+Settings (all optional):
+    ANALYTICS_TRENDING = {
+        'HALF_LIFE_HOURS': 24,
+        'WEIGHTS': {'views': 1, 'likes': 3, 'comments': 4, 'shares': 5, 'saves': 4},
+        'TOP_K': 50,
+    }
+"""
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Sum, Value, When
+from django.db.models.functions import Exp, Extract
+from django.utils import timezone
+
+from .models import EngagementEvent, RecipeTrendingScore, TrendingRecipe
+from .rollups import EVENT_COUNTS
+
+TRENDING_SETTINGS = {
+    'HALF_LIFE_HOURS': 24,
+    'WEIGHTS': {'views': 1, 'likes': 3, 'comments': 4, 'shares': 5, 'saves': 4},
+    'TOP_K': 50,
+    **getattr(settings, 'ANALYTICS_TRENDING', {}),
+}
+
+HALF_LIFE = timedelta(hours=TRENDING_SETTINGS['HALF_LIFE_HOURS'])
+DECAY_RATE = math.log(2) / HALF_LIFE.total_seconds()  # per second
+# Scores untouched for this long have decayed below a millionth of their weight
+HORIZON = HALF_LIFE * 20
+
+# EngagementEvent type -> weight
+EVENT_WEIGHTS = {
+    event_type: float(TRENDING_SETTINGS['WEIGHTS'].get(metric, 0))
+    for event_type, metric in EVENT_COUNTS.items()
+}
+
+
+def decay(score, since, now):
+    """score as of since, decayed to now"""
+    return score * math.exp(-DECAY_RATE * max((now - since).total_seconds(), 0))
+
+
+def add_trending_events(events):
+    """Fold a batch of EngagementEvents into the recipes' scores with one upsert"""
+    now = timezone.now()
+    deltas = defaultdict(float)
+    for event in events:
+        weight = EVENT_WEIGHTS.get(event.event_type)
+        if weight:
+            deltas[event.recipe_id] += decay(weight, event.created_at, now)
+    if not deltas:
+        return
+
+    table = connection.ops.quote_name(RecipeTrendingScore._meta.db_table)
+    # Sorted so concurrent writers lock rows in the same order
+    rows = sorted(deltas.items())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (recipe_id, score, updated_at) "
+            f"VALUES {', '.join(['(%s, %s, %s)'] * len(rows))} "
+            f"ON CONFLICT (recipe_id) DO UPDATE SET "
+            f"score = {table}.score * exp(%s * LEAST(EXTRACT(EPOCH FROM {table}.updated_at - EXCLUDED.updated_at), 0)) "
+            f"+ EXCLUDED.score, "
+            f"updated_at = GREATEST({table}.updated_at, EXCLUDED.updated_at)",
+            [value for recipe_id, score in rows for value in (recipe_id, score, now)] + [DECAY_RATE]
+        )
+
+
+def rebuild_trending_scores():
+    """Recompute every score from the engagement log of the last HORIZON (backfill / weight changes)"""
+    now = timezone.now()
+    weight = Case(
+        *[When(event_type=event_type, then=Value(w)) for event_type, w in EVENT_WEIGHTS.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    age_factor = Exp((Extract('created_at', 'epoch') - Value(now.timestamp())) * Value(DECAY_RATE), output_field=FloatField())
+    scores = (
+        EngagementEvent.objects
+        .filter(created_at__gte=now - HORIZON)
+        .values('recipe_id')
+        .annotate(score=Sum(weight * age_factor, output_field=FloatField()))
+        .order_by()
+    )
+    with transaction.atomic():
+        RecipeTrendingScore.objects.all().delete()
+        RecipeTrendingScore.objects.bulk_create(
+            [
+                RecipeTrendingScore(recipe_id=row['recipe_id'], score=row['score'], updated_at=now)
+                for row in scores if row['score']
+            ],
+            batch_size=1000,
+        )
+
+
+def refresh_trending(top_k=None):
+    """
+    Materialize the current top_k recipes overall and per category.
+
+    Returns:
+        int: TrendingRecipe rows written.
+    """
+    top_k = top_k or TRENDING_SETTINGS['TOP_K']
+    now = timezone.now()
+    RecipeTrendingScore.objects.filter(updated_at__lt=now - HORIZON).delete()
+
+    overall = []
+    by_category = defaultdict(list)
+    rows = RecipeTrendingScore.objects.values_list('recipe_id', 'recipe__category_id', 'score', 'updated_at')
+    for recipe_id, category_id, score, updated_at in rows.iterator(chunk_size=5000):
+        entry = (decay(score, updated_at, now), recipe_id)
+        overall.append(entry)
+        if category_id is not None:
+            by_category[category_id].append(entry)
+
+    entries = [
+        TrendingRecipe(category_id=category_id, rank=rank, recipe_id=recipe_id, score=score, computed_at=now)
+        for category_id, candidates in [(None, overall), *by_category.items()]
+        for rank, (score, recipe_id) in enumerate(heapq.nlargest(top_k, candidates), start=1)
+    ]
+    with transaction.atomic():
+        TrendingRecipe.objects.all().delete()
+        TrendingRecipe.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
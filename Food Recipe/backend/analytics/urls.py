@@ -5,6 +5,10 @@ from . import views
 
 urlpatterns = [
     path('recipe-analytics/', views.RecipeAnalyticsView.as_view(), name='recipe-analytics'),
+    path('recipes/<int:recipe_id>/daily-stats/', views.RecipeDailyStatsView.as_view(), name='recipe-daily-stats'),
+    path('reports/<str:report>/', views.AnalyticsReportView.as_view(), name='analytics-report'),
     path('track-view/', views.RecipeViewTrackingView.as_view(), name='track-view'),
     path('engagement/', views.RecipeEngagementView.as_view(), name='engagement'),
+    path('engagement/batch/', views.EngagementBatchView.as_view(), name='engagement-batch'),
+    path('ingestion/stats/', views.IngestionStatsView.as_view(), name='ingestion-stats'),
 ]
\ No newline at end of file
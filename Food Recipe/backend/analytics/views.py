@@ -1,21 +1,37 @@
 # analytics/views.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.authentication import TokenAuthentication
 from rest_framework import status
-from django.db.models import Count, Sum, Avg, Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum, Avg, Q, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
 from collections import defaultdict
 from recipe.models import Recipe
+from recipe.counters import increment_counter
+from recipe.utils import set_recipe_reactions_bulk, toggle_recipe_reaction
 import logging
 
 from .models import (
     RecipeView, RecipeLike, RecipeComment, RecipeShare, 
-    RecipeSave, UserFollowing, DailyAnalyticsSummary
+    RecipeSave, UserFollowing, DailyAnalyticsSummary, RecipeDailyStats
 )
-from .serializers import AnalyticsDataSerializer
+from .ingestion import view_buffer
+from .dimensions import cache_stats as dimension_cache_stats
+from .benchmarks import get_benchmarks
+from .dashboard_cache import get_cached_dashboard, normalize_range
+from .columnar import export_version
+from .reports import REPORTS
+from .serializers import AnalyticsDataSerializer, EngagementBatchSerializer, EngagementEventSerializer
+from .hyperloglog import HyperLogLog
+from .rollups import RECIPE_STATS_FIELDS, UNCATEGORIZED, combine_summaries, get_author_summaries
+from .timeseries import DAY, MONTH, bucket_starts
+from .signals import track_recipe_view, track_recipe_views_bulk, track_recipe_shares_bulk, track_recipe_reactions_bulk
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +40,34 @@ class RecipeAnalyticsView(APIView):
     
     def get(self, request):
         user = request.user
-        time_range = request.query_params.get('range', '30days')
+        time_range = normalize_range(request.query_params.get('range', '30days'))
         
         # Log the authentication details for debugging
         logger.info(f"Analytics request from user: {user.id}, time_range: {time_range}")
         print(f"DEBUG: Analytics request from user: {user.id}, time_range: {time_range}")
         print(f"DEBUG: Authorization header: {request.META.get('HTTP_AUTHORIZATION', 'Not found')}")
         
+        try:
+            # Served from the per-author cache; rebuilt when it expires or the author's version is bumped
+            analytics_data, age, ttl, hit = get_cached_dashboard(
+                user.id, time_range, lambda: self.get_analytics_data(user, time_range)
+            )
+            response = Response(analytics_data, status=status.HTTP_200_OK)
+            response['Age'] = str(age)
+            response['Cache-Control'] = f'private, max-age={max(ttl - age, 0)}'
+            response['X-Cache'] = 'HIT' if hit else 'MISS'
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error fetching analytics data for user {user.id}: {str(e)}")
+            print(f"DEBUG: Error details: {str(e)}")
+            return Response(
+                {'error': f'Failed to fetch analytics data: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def get_analytics_data(self, user, time_range):
+        """Assemble every dashboard section for user (uncached)"""
         # Calculate date range
         end_date = timezone.now().date()
         if time_range == '7days':
@@ -42,140 +79,100 @@ class RecipeAnalyticsView(APIView):
         else:  # 30days
             start_date = end_date - timedelta(days=30)
         
+        # Get user's recipes
+        user_recipes = Recipe.objects.filter(author=user)
+        
+        # Calculate previous period for comparison
+        period_length = (end_date - start_date).days
+        previous_start = start_date - timedelta(days=period_length)
+        
+        # Daily rollups for both periods and the whole chart (closed days are stored, today is live)
+        chart = self._chart_buckets(end_date, time_range)
+        summaries = get_author_summaries(user, min(previous_start, chart[1][0]), end_date)
+        current = combine_summaries(s for day, s in summaries.items() if start_date <= day <= end_date)
+        previous = combine_summaries(s for day, s in summaries.items() if previous_start <= day < start_date)
+        
+        analytics_data = {
+            'viewsData': self._get_views_data(summaries, chart),
+            'recipesPerformance': self._get_recipes_performance(user_recipes, current),
+            'followers': self._get_followers_data(user, current, previous),
+            'engagement': self._get_engagement_data(current, previous),
+            'topRecipes': self._get_top_recipes(user_recipes, current),
+            'categoryDistribution': self._get_category_distribution(user_recipes, current),
+            'benchmarks': get_benchmarks(
+                list(user_recipes.values_list('id', 'category_id', 'category__name')),
+                current['recipes'], time_range
+            ),
+        }
+        
+        # For debugging - let's return simplified data if serializer is not available
         try:
-            # Get user's recipes
-            user_recipes = Recipe.objects.filter(author=user)
-            logger.info(f"Found {user_recipes.count()} recipes for user {user.id}")
-            
-            # Calculate previous period for comparison
-            period_length = (end_date - start_date).days
-            previous_start = start_date - timedelta(days=period_length)
-            previous_end = start_date
-            
-            analytics_data = {
-                'viewsData': self._get_views_data(user_recipes, start_date, end_date, time_range),
-                'recipesPerformance': self._get_recipes_performance(user_recipes, start_date, end_date),
-                'followers': self._get_followers_data(user, start_date, end_date, previous_start, previous_end),
-                'engagement': self._get_engagement_data(user_recipes, start_date, end_date, previous_start, previous_end),
-                'topRecipes': self._get_top_recipes(user_recipes, start_date, end_date),
-                'categoryDistribution': self._get_category_distribution(user_recipes, start_date, end_date)
-            }
-            
-            # For debugging - let's return simplified data if serializer is not available
-            try:
-                serializer = AnalyticsDataSerializer(analytics_data)
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            except Exception as serializer_error:
-                logger.warning(f"Serializer error: {serializer_error}, returning raw data")
-                return Response(analytics_data, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Error fetching analytics data for user {user.id}: {str(e)}")
-            print(f"DEBUG: Error details: {str(e)}")
-            return Response(
-                {'error': f'Failed to fetch analytics data: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return AnalyticsDataSerializer(analytics_data).data
+        except Exception as serializer_error:
+            logger.warning(f"Serializer error: {serializer_error}, returning raw data")
+            return analytics_data
+    
+    def _chart_buckets(self, end_date, time_range):
+        """(granularity, bucket start dates, label format) of the views chart"""
+        if time_range == '12months':
+            return MONTH, bucket_starts(end_date, MONTH, 12), '%b %Y'
+        days = 7 if time_range == '7days' else (90 if time_range == '90days' else 30)
+        return DAY, bucket_starts(end_date, DAY, days), '%m/%d'
     
-    def _get_views_data(self, user_recipes, start_date, end_date, time_range):
+    def _get_views_data(self, summaries, chart):
         """Get views data aggregated by time period"""
-        views_data = []
+        granularity, starts, label = chart
+        views = dict.fromkeys(starts, 0)
+        # Daily visitor sketches merged per bucket (uniques cannot be summed across days)
+        visitors = {bucket: HyperLogLog() for bucket in starts}
         
-        try:
-            if time_range == '12months':
-                # Monthly aggregation - simplified
-                for i in range(12):
-                    month_start = end_date.replace(day=1) - timedelta(days=30*i)
-                    month_end = month_start + timedelta(days=30)
-                    
-                    views = RecipeView.objects.filter(
-                        recipe__in=user_recipes,
-                        viewed_at__date__range=[month_start, month_end]
-                    ).count() if user_recipes.exists() else 0
-                    
-                    unique_visitors = RecipeView.objects.filter(
-                        recipe__in=user_recipes,
-                        viewed_at__date__range=[month_start, month_end]
-                    ).values('ip_address').distinct().count() if user_recipes.exists() else 0
-                    
-                    views_data.append({
-                        'name': month_start.strftime('%b %Y'),
-                        'views': views,
-                        'uniqueVisitors': unique_visitors
-                    })
-            else:
-                # Daily aggregation
-                days = 7 if time_range == '7days' else (90 if time_range == '90days' else 30)
-                for i in range(days):
-                    date = end_date - timedelta(days=i)
-                    
-                    views = RecipeView.objects.filter(
-                        recipe__in=user_recipes,
-                        viewed_at__date=date
-                    ).count() if user_recipes.exists() else 0
-                    
-                    unique_visitors = RecipeView.objects.filter(
-                        recipe__in=user_recipes,
-                        viewed_at__date=date
-                    ).values('ip_address').distinct().count() if user_recipes.exists() else 0
-                    
-                    views_data.append({
-                        'name': date.strftime('%m/%d'),
-                        'views': views,
-                        'uniqueVisitors': unique_visitors
-                    })
-            
-            return list(reversed(views_data))
-        except Exception as e:
-            logger.error(f"Error in _get_views_data: {str(e)}")
-            return []
+        for day, summary in summaries.items():
+            bucket = day.replace(day=1) if granularity == MONTH else day
+            if bucket in views:
+                views[bucket] += summary.total_views
+                visitors[bucket].merge(HyperLogLog.from_bytes(summary.visitors_sketch))
+        
+        return [
+            {
+                'name': bucket.strftime(label),
+                'views': views[bucket],
+                'uniqueVisitors': visitors[bucket].count()
+            }
+            for bucket in starts
+        ]
     
-    def _get_recipes_performance(self, user_recipes, start_date, end_date):
+    def _recipe_rows(self, recipes, breakdown):
+        """Dashboard rows for recipes, with their period metrics from a combined breakdown"""
+        rows = []
+        for recipe_id, title in recipes:
+            metrics = breakdown.get(recipe_id, {})
+            views = metrics.get('views', 0)
+            likes = metrics.get('likes', 0)
+            rows.append({
+                'name': title[:30] + '...' if len(title) > 30 else title,
+                'views': views,
+                'likes': likes,
+                'comments': metrics.get('comments', 0),
+                # Conversion rate (likes/views * 100)
+                'conversionRate': str(round((likes / views * 100), 1) if views > 0 else 0)
+            })
+        return rows
+    
+    def _get_recipes_performance(self, user_recipes, current):
         """Get performance data for all user recipes"""
-        performance_data = []
-        
         try:
-            for recipe in user_recipes[:10]:  # Limit to top 10 for performance
-                views = RecipeView.objects.filter(
-                    recipe=recipe,
-                    viewed_at__date__range=[start_date, end_date]
-                ).count()
-                
-                likes = RecipeLike.objects.filter(
-                    recipe=recipe,
-                    created_at__date__range=[start_date, end_date]
-                ).count()
-                
-                comments = RecipeComment.objects.filter(
-                    recipe=recipe,
-                    created_at__date__range=[start_date, end_date]
-                ).count()
-                
-                performance_data.append({
-                    'name': recipe.title[:30] + '...' if len(recipe.title) > 30 else recipe.title,
-                    'views': views,
-                    'likes': likes,
-                    'comments': comments
-                })
+            recipes = user_recipes.values_list('id', 'title')[:10]  # Limit to top 10 for performance
+            return self._recipe_rows(recipes, current['recipes'])
         except Exception as e:
             logger.error(f"Error in _get_recipes_performance: {str(e)}")
-        
-        return performance_data
+            return []
     
-    def _get_followers_data(self, user, start_date, end_date, previous_start, previous_end):
+    def _get_followers_data(self, user, current, previous):
         """Get followers count and growth with percentage change"""
         try:
             total_followers = UserFollowing.objects.filter(following=user).count()
-            
-            current_new_followers = UserFollowing.objects.filter(
-                following=user,
-                created_at__date__range=[start_date, end_date]
-            ).count()
-            
-            previous_new_followers = UserFollowing.objects.filter(
-                following=user,
-                created_at__date__range=[previous_start, previous_end]
-            ).count()
+            current_new_followers = current['new_followers']
+            previous_new_followers = previous['new_followers']
             
             # Calculate growth percentage
             if previous_new_followers > 0:
@@ -192,169 +189,161 @@ class RecipeAnalyticsView(APIView):
             logger.error(f"Error in _get_followers_data: {str(e)}")
             return {'count': 0, 'growth': 0, 'growthPercentage': 0}
     
-    def _get_engagement_data(self, user_recipes, start_date, end_date, previous_start, previous_end):
+    def _get_engagement_data(self, current, previous):
         """Get total engagement metrics with percentage changes"""
-        try:
-            # Current period
-            current_likes = RecipeLike.objects.filter(
-                recipe__in=user_recipes,
-                created_at__date__range=[start_date, end_date]
-            ).count() if user_recipes.exists() else 0
-            
-            current_comments = RecipeComment.objects.filter(
-                recipe__in=user_recipes,
-                created_at__date__range=[start_date, end_date]
-            ).count() if user_recipes.exists() else 0
-            
-            current_shares = RecipeShare.objects.filter(
-                recipe__in=user_recipes,
-                shared_at__date__range=[start_date, end_date]
-            ).count() if user_recipes.exists() else 0
-            
-            current_saves = RecipeSave.objects.filter(
-                recipe__in=user_recipes,
-                saved_at__date__range=[start_date, end_date]
-            ).count() if user_recipes.exists() else 0
-            
-            # Previous period
-            previous_likes = RecipeLike.objects.filter(
-                recipe__in=user_recipes,
-                created_at__date__range=[previous_start, previous_end]
-            ).count() if user_recipes.exists() else 0
-            
-            previous_comments = RecipeComment.objects.filter(
-                recipe__in=user_recipes,
-                created_at__date__range=[previous_start, previous_end]
-            ).count() if user_recipes.exists() else 0
-            
-            previous_shares = RecipeShare.objects.filter(
-                recipe__in=user_recipes,
-                shared_at__date__range=[previous_start, previous_end]
-            ).count() if user_recipes.exists() else 0
-            
-            previous_saves = RecipeSave.objects.filter(
-                recipe__in=user_recipes,
-                saved_at__date__range=[previous_start, previous_end]
-            ).count() if user_recipes.exists() else 0
-            
-            # Calculate percentage changes
-            def calculate_percentage_change(current, previous):
-                if previous == 0:
-                    return 100 if current > 0 else 0
-                return round(((current - previous) / previous) * 100, 1)
-            
-            return {
-                'likes': current_likes,
-                'comments': current_comments,
-                'shares': current_shares,
-                'saves': current_saves,
-                'likesPercentage': calculate_percentage_change(current_likes, previous_likes),
-                'commentsPercentage': calculate_percentage_change(current_comments, previous_comments),
-                'sharesPercentage': calculate_percentage_change(current_shares, previous_shares),
-                'savesPercentage': calculate_percentage_change(current_saves, previous_saves)
-            }
-        except Exception as e:
-            logger.error(f"Error in _get_engagement_data: {str(e)}")
-            return {
-                'likes': 0, 'comments': 0, 'shares': 0, 'saves': 0,
-                'likesPercentage': 0, 'commentsPercentage': 0, 
-                'sharesPercentage': 0, 'savesPercentage': 0
-            }
+        # Calculate percentage changes
+        def calculate_percentage_change(current, previous):
+            if previous == 0:
+                return 100 if current > 0 else 0
+            return round(((current - previous) / previous) * 100, 1)
+        
+        engagement = {}
+        for metric in ['likes', 'comments', 'shares', 'saves']:
+            engagement[metric] = current[f'total_{metric}']
+            engagement[f'{metric}Percentage'] = calculate_percentage_change(
+                current[f'total_{metric}'], previous[f'total_{metric}']
+            )
+        return engagement
     
-    def _get_top_recipes(self, user_recipes, start_date, end_date):
+    def _get_top_recipes(self, user_recipes, current):
         """Get top 3 performing recipes"""
-        performance_data = []
-        
         try:
-            for recipe in user_recipes:
-                views = RecipeView.objects.filter(
-                    recipe=recipe,
-                    viewed_at__date__range=[start_date, end_date]
-                ).count()
-                
-                likes = RecipeLike.objects.filter(
-                    recipe=recipe,
-                    created_at__date__range=[start_date, end_date]
-                ).count()
-                
-                comments = RecipeComment.objects.filter(
-                    recipe=recipe,
-                    created_at__date__range=[start_date, end_date]
-                ).count()
-                
-                # Calculate conversion rate (likes/views * 100)
-                conversion_rate = round((likes / views * 100), 1) if views > 0 else 0
-                
-                performance_data.append({
-                    'name': recipe.title[:30] + '...' if len(recipe.title) > 30 else recipe.title,
-                    'views': views,
-                    'likes': likes,
-                    'comments': comments,
-                    'conversionRate': str(conversion_rate)
-                })
-            
-            # Sort by views and take top 3
-            sorted_recipes = sorted(performance_data, key=lambda x: x['views'], reverse=True)[:3]
-            return sorted_recipes
+            breakdown = current['recipes']
+            # Sort by views (newest first among ties) and take top 3
+            recipes = sorted(
+                user_recipes.values_list('id', 'title'),
+                key=lambda recipe: breakdown.get(recipe[0], {}).get('views', 0),
+                reverse=True
+            )[:3]
+            return self._recipe_rows(recipes, breakdown)
         except Exception as e:
             logger.error(f"Error in _get_top_recipes: {str(e)}")
             return []
     
-    def _get_category_distribution(self, user_recipes, start_date, end_date):
+    def _get_category_distribution(self, user_recipes, current):
         """Get recipe distribution by category"""
-        category_data = defaultdict(int)
-        
         try:
-            # First, get all categories that the user's recipes belong to
-            for recipe in user_recipes:
-                category_name = recipe.category.name if recipe.category else 'Uncategorized'
-                
-                # Get views for this recipe in the date range (optional - you can remove this if you just want recipe counts)
-                views = RecipeView.objects.filter(
-                    recipe=recipe,
-                    viewed_at__date__range=[start_date, end_date]
-                ).count()
-                
-                # Add views to the category (or just count recipes by using += 1)
-                category_data[category_name] += views
-            
-            # If no views data, fall back to just counting recipes per category
-            if not any(category_data.values()):
-                category_data.clear()
-                for recipe in user_recipes:
-                    category_name = recipe.category.name if recipe.category else 'Uncategorized'
-                    category_data[category_name] += 1
-            
-            # Return all categories, even those with 0 views/recipes
             result = [
-                {'name': category, 'value': count}
-                for category, count in category_data.items()
+                {'name': category, 'value': views}
+                for category, views in current['categories'].most_common()
+                if views
             ]
             
-            # If still empty, ensure we return at least something
+            # If no views data, fall back to just counting recipes per category
             if not result:
-                result = [{'name': 'No Categories', 'value': 0}]
-                
-            return result
+                result = list(
+                    user_recipes.values(name=Coalesce('category__name', Value(UNCATEGORIZED)))
+                    .annotate(value=Count('pk'))
+                    .order_by('-value')
+                )
+            
+            # If still empty, ensure we return at least something
+            return result or [{'name': 'No Categories', 'value': 0}]
             
         except Exception as e:
             logger.error(f"Error in _get_category_distribution: {str(e)}")
-            
-            # Fallback: Get categories directly from user recipes
+            return [{'name': 'Error', 'value': 0}]
+
+
+class RecipeDailyStatsView(APIView):
+    """Per-recipe daily series from RecipeDailyStats (recipe author only)"""
+    permission_classes = [IsAuthenticated]
+    
+    RANGE_DAYS = {'7days': 7, '30days': 30, '90days': 90, '12months': 365}
+    
+    def get(self, request, recipe_id):
+        time_range = request.query_params.get('range', '30days')
+        if time_range not in self.RANGE_DAYS:
+            return Response(
+                {'error': f"range must be one of: {', '.join(self.RANGE_DAYS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            recipe = Recipe.objects.only('id', 'title', 'author_id').get(id=recipe_id)
+        except Recipe.DoesNotExist:
+            return Response({'error': 'Recipe not found'}, status=status.HTTP_404_NOT_FOUND)
+        if recipe.author_id != request.user.id:
+            return Response({'error': 'You can only view stats for your own recipes'}, status=status.HTTP_403_FORBIDDEN)
+        
+        days = bucket_starts(timezone.now().date(), DAY, self.RANGE_DAYS[time_range])
+        rows = {}
+        visitors = HyperLogLog()
+        for row in RecipeDailyStats.objects.filter(
+            recipe=recipe, date__gte=days[0], date__lte=days[-1]
+        ).values('date', 'visitors_sketch', *RECIPE_STATS_FIELDS):
+            visitors.merge(HyperLogLog.from_bytes(row.pop('visitors_sketch')))
+            rows[row['date']] = row
+        empty = dict.fromkeys(RECIPE_STATS_FIELDS, 0)
+        series = [{**empty, **rows.get(day, {}), 'date': day} for day in days]
+        
+        return Response({
+            'recipe_id': recipe.id,
+            'title': recipe.title,
+            'range': time_range,
+            'unique_visitors': visitors.count(),
+            'series': series
+        })
+
+
+class AnalyticsReportView(APIView):
+    """
+    Retention cohorts or view -> like -> save funnel over the columnar export
+    (closed days only), for the user's recipes or, for staff, ?scope=platform.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    RANGE_DAYS = {'30days': 30, '90days': 90, '12months': 365}
+    CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_REPORT_CACHE_TIMEOUT', 60 * 60)
+    
+    def get(self, request, report):
+        if report not in REPORTS:
+            return Response({'error': f"report must be one of: {', '.join(REPORTS)}"}, status=status.HTTP_404_NOT_FOUND)
+        time_range = request.query_params.get('range', '90days')
+        if time_range not in self.RANGE_DAYS:
+            return Response(
+                {'error': f"range must be one of: {', '.join(self.RANGE_DAYS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        params = {}
+        if report == 'cohorts':
             try:
-                fallback_data = defaultdict(int)
-                for recipe in user_recipes:
-                    category_name = recipe.category.name if recipe.category else 'Uncategorized'
-                    fallback_data[category_name] += 1
-                
-                return [
-                    {'name': category, 'value': count}
-                    for category, count in fallback_data.items()
-                ] if fallback_data else [{'name': 'No Categories', 'value': 0}]
-                
-            except Exception as fallback_error:
-                logger.error(f"Fallback error in _get_category_distribution: {str(fallback_error)}")
-                return [{'name': 'Error', 'value': 0}]
+                params['period_days'] = min(max(int(request.query_params.get('period_days', 7)), 1), 31)
+            except ValueError:
+                return Response({'error': 'period_days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        author_id = request.user.id
+        if request.query_params.get('scope') == 'platform':
+            if not request.user.is_staff:
+                return Response({'error': 'Only staff can view platform reports'}, status=status.HTTP_403_FORBIDDEN)
+            author_id = None
+        
+        end_date = timezone.now().date() - timedelta(days=1)
+        start_date = end_date - timedelta(days=self.RANGE_DAYS[time_range] - 1)
+        # The export version changes whenever a day in the range is re-exported
+        cache_key = ':'.join(str(part) for part in [
+            'analytics_report', report, author_id or 'platform', start_date, end_date,
+            params.get('period_days', ''), export_version(start_date, end_date),
+        ])
+        data = cache.get(cache_key)
+        hit = data is not None
+        if not hit:
+            try:
+                data = {
+                    'report': report,
+                    'range': time_range,
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'results': REPORTS[report](start_date, end_date, author_id=author_id, **params),
+                }
+            except Exception as e:
+                logger.error(f"Error computing {report} report for user {request.user.id}: {str(e)}")
+                return Response({'error': 'Failed to compute report'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            cache.set(cache_key, data, self.CACHE_TIMEOUT)
+        
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
 
 
 class RecipeViewTrackingView(APIView):
@@ -379,20 +368,18 @@ class RecipeViewTrackingView(APIView):
             else:
                 ip_address = request.META.get('REMOTE_ADDR', '')
             
-            # Create view record
-            RecipeView.objects.create(
-                recipe=recipe,
-                user=request.user if request.user.is_authenticated else None,
+            # Queue the view; the ingestion pipeline dedupes and writes it in batches
+            track_recipe_view(
+                recipe,
+                user=request.user,
                 ip_address=ip_address,
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 referrer=request.META.get('HTTP_REFERER', ''),
-                session_key=request.session.session_key or '',
+                session_key=request.visitor_id,
                 time_spent=time_spent
             )
             
-            logger.info(f"Tracked view for recipe {recipe_id} from IP {ip_address}")
-            
-            return Response({'status': 'success'}, status=status.HTTP_201_CREATED)
+            return Response({'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
             
         except Recipe.DoesNotExist:
             return Response({'error': 'Recipe not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -420,12 +407,7 @@ class RecipeEngagementView(APIView):
             recipe = Recipe.objects.get(id=recipe_id)
             
             if action == 'like':
-                like, created = RecipeLike.objects.get_or_create(
-                    recipe=recipe,
-                    user=request.user
-                )
-                if not created:
-                    like.delete()
+                if not self._toggle_reaction('like', recipe, request.user):
                     return Response({'status': 'unliked'}, status=status.HTTP_200_OK)
                 return Response({'status': 'liked'}, status=status.HTTP_201_CREATED)
             
@@ -443,20 +425,18 @@ class RecipeEngagementView(APIView):
             
             elif action == 'share':
                 platform = request.data.get('platform', 'other')
+                if platform not in dict(RecipeShare.SHARE_PLATFORMS):
+                    return Response({'error': 'Invalid platform'}, status=status.HTTP_400_BAD_REQUEST)
                 RecipeShare.objects.create(
                     recipe=recipe,
                     user=request.user,
                     platform=platform
                 )
+                increment_counter(recipe.id, 'shares')
                 return Response({'status': 'shared'}, status=status.HTTP_201_CREATED)
             
             elif action == 'save':
-                save, created = RecipeSave.objects.get_or_create(
-                    recipe=recipe,
-                    user=request.user
-                )
-                if not created:
-                    save.delete()
+                if not self._toggle_reaction('favorite', recipe, request.user):
                     return Response({'status': 'unsaved'}, status=status.HTTP_200_OK)
                 return Response({'status': 'saved'}, status=status.HTTP_201_CREATED)
             
@@ -467,4 +447,131 @@ class RecipeEngagementView(APIView):
             return Response({'error': 'Recipe not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"Error handling engagement: {str(e)}")
-            return Response({'error': 'Failed to process engagement'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': 'Failed to process engagement'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _toggle_reaction(self, reaction, recipe, user):
+        """
+        Flip the user's like/favorite on recipe. Returns True if it is now active.
+
+        Unliking only removes the LikedRecipe/FavoriteRecipe row; the analytics
+        rows and RecipeReaction ledger are append-only, so a re-like is not
+        counted again.
+        """
+        with transaction.atomic():
+            active, _ = toggle_recipe_reaction(reaction, user, recipe.id)
+            if active:
+                track_recipe_reactions_bulk(reaction, [recipe.id], user)
+        return active
+
+class EngagementBatchView(APIView):
+    """
+    Apply a queue of engagement events (like, favorite, share, view) in one request.
+
+    Body: {"events": [{"type": "like", "recipe_id": 1, "active": true}, ...]}
+    Recipes are validated with a single in_bulk, events are grouped by type and
+    written with bulk statements. The response has one result per event, in order.
+    """
+    permission_classes = []  # Anonymous visitors may send views and shares
+
+    def post(self, request):
+        batch = EngagementBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        raw_events = batch.validated_data['events']
+        user = request.user
+
+        results = [None] * len(raw_events)
+        events = []
+        for index, raw in enumerate(raw_events):
+            serializer = EngagementEventSerializer(data=raw)
+            if serializer.is_valid():
+                events.append((index, serializer.validated_data))
+            else:
+                results[index] = {'status': 'error', 'errors': serializer.errors}
+
+        recipes = Recipe.objects.only('id', 'author_id').in_bulk({event['recipe_id'] for _, event in events})
+
+        grouped = defaultdict(list)
+        for index, event in events:
+            if event['recipe_id'] not in recipes:
+                results[index] = {'status': 'error', 'errors': {'recipe_id': ['Recipe not found']}}
+            elif event['type'] in ('like', 'favorite') and not user.is_authenticated:
+                results[index] = {'status': 'error', 'errors': {'type': ['Authentication required']}}
+            else:
+                grouped[event['type']].append((index, event))
+
+        ip_address = request.META.get('REMOTE_ADDR')
+        session_key = request.visitor_id
+
+        try:
+            with transaction.atomic():
+                for reaction in ('like', 'favorite'):
+                    if grouped[reaction]:
+                        self._apply_reactions(reaction, grouped[reaction], user, ip_address, session_key, results)
+
+                if grouped['share']:
+                    track_recipe_shares_bulk(
+                        [(event['recipe_id'], event['platform']) for _, event in grouped['share']],
+                        user=user if user.is_authenticated else None,
+                        ip_address=ip_address,
+                        session_key=session_key
+                    )
+                    for index, _ in grouped['share']:
+                        results[index] = {'status': 'applied'}
+
+                if grouped['view']:
+                    self._apply_views(grouped['view'], recipes, request, ip_address, session_key, results)
+        except Exception as e:
+            logger.error(f"Error applying engagement batch: {str(e)}")
+            return Response({'error': 'Failed to process engagement batch'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    def _apply_reactions(self, reaction, events, user, ip_address, session_key, results):
+        # The last event for a recipe decides its final state
+        states = {}
+        last_index = {}
+        for index, event in events:
+            states[event['recipe_id']] = event['active']
+            last_index[event['recipe_id']] = index
+
+        added, removed = set_recipe_reactions_bulk(reaction, user, states)
+        track_recipe_reactions_bulk(reaction, added, user, ip_address=ip_address, session_key=session_key)
+
+        for index, event in events:
+            recipe_id = event['recipe_id']
+            if last_index[recipe_id] != index:
+                results[index] = {'status': 'superseded'}
+            elif recipe_id in (added if event['active'] else removed):
+                results[index] = {'status': 'applied'}
+            else:
+                results[index] = {'status': 'unchanged'}
+
+    def _apply_views(self, events, recipes, request, ip_address, session_key, results):
+        time_spent = {}
+        for _, event in events:
+            time_spent.setdefault(event['recipe_id'], event['time_spent'])
+
+        new_ids = track_recipe_views_bulk(
+            [recipes[recipe_id] for recipe_id in time_spent],
+            user=request.user,
+            ip_address=ip_address,
+            user_agent=request.META.get('HTTP_USER_AGENT'),
+            referrer=request.META.get('HTTP_REFERER'),
+            session_key=session_key,
+            time_spent=time_spent
+        )
+
+        for index, event in events:
+            if event['recipe_id'] in new_ids:
+                results[index] = {'status': 'applied'}
+                new_ids.discard(event['recipe_id'])
+            else:
+                results[index] = {'status': 'duplicate'}
+
+
+class IngestionStatsView(APIView):
+    """Queue depth and write/drop counters of this worker's view ingestion buffer"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({**view_buffer.stats(), 'dimension_cache': dimension_cache_stats()})
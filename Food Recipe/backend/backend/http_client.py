@@ -0,0 +1,277 @@
+# backend/http_client.py
+"""
+Shared outbound HTTP client for external APIs (OpenRouter, Fapshi, ...).
+
+Every upstream (host[:port] of the URL) gets its own:
+
+- requests.Session with a keep-alive connection pool of POOL_SIZE;
+- retry policy: up to RETRIES more attempts with full-jitter exponential
+  backoff, all within DEADLINE seconds when set. Failures before the request
+  was sent (connect errors) are always retried; 502/503/504 only for
+  idempotent calls, so a payment is never submitted twice, and read timeouts
+  only for idempotent calls on upstreams with RETRY_TIMEOUTS (a slow LLM
+  would otherwise hold the worker for several full read timeouts);
+- circuit breaker: FAILURE_THRESHOLD consecutive failures open it for
+  RECOVERY_SECONDS, during which calls fail at once instead of waiting on a
+  dead upstream; then one trial call decides whether it closes again;
+- bulkhead: at most MAX_CONCURRENT calls in flight per process. Callers wait
+  up to ACQUIRE_TIMEOUT for a slot, so one slow dependency can only tie up
+  that many workers.
+
+Breaker and bulkhead rejections raise UpstreamUnavailable, a
+requests.RequestException, so the callers' existing `except
+requests.RequestException` fallbacks handle them.
+
+Settings (all optional):
+    HTTP_CLIENT = {
+        'DEFAULT': {'POOL_SIZE': 10, 'CONNECT_TIMEOUT': 3, 'READ_TIMEOUT': 15, ...},
+        'UPSTREAMS': {'openrouter.ai': {'READ_TIMEOUT': 45, 'DEADLINE': 50, 'MAX_CONCURRENT': 4}},
+    }
+"""
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPSTREAM = {
+    'POOL_SIZE': 10,
+    'CONNECT_TIMEOUT': 3,
+    'READ_TIMEOUT': 15,
+    'RETRIES': 2,
+    'BACKOFF_BASE': 0.2,
+    'BACKOFF_MAX': 2.0,
+    'RETRY_TIMEOUTS': True,
+    'DEADLINE': None,  # seconds for all attempts together; None = RETRIES x timeouts
+    'FAILURE_THRESHOLD': 5,
+    'RECOVERY_SECONDS': 30,
+    'MAX_CONCURRENT': 8,
+    'ACQUIRE_TIMEOUT': 0.5,
+}
+
+UPSTREAMS = {
+    'openrouter.ai': {'READ_TIMEOUT': 45, 'RETRY_TIMEOUTS': False, 'DEADLINE': 50, 'MAX_CONCURRENT': 4},
+    'fapshi-node.onrender.com': {'READ_TIMEOUT': 15, 'MAX_CONCURRENT': 4},
+}
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class UpstreamUnavailable(requests.RequestException):
+    """The call was not attempted: the upstream's breaker is open or its bulkhead is full"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class BulkheadFullError(UpstreamUnavailable):
+    pass
+
+
+def not_sent(error):
+    """Whether a ConnectionError happened before the request reached the upstream"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold, recovery_seconds):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go out now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class Upstream:
+    """Session, breaker, bulkhead and counters for one host"""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['POOL_SIZE'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = CircuitBreaker(config['FAILURE_THRESHOLD'], config['RECOVERY_SECONDS'])
+        self.bulkhead = threading.BoundedSemaphore(config['MAX_CONCURRENT'])
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected_open = 0
+        self.rejected_full = 0
+
+    def stats(self):
+        return {
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'trips': self.breaker.trips,
+            'in_flight': self.in_flight,
+            'max_concurrent': self.config['MAX_CONCURRENT'],
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'rejected_open': self.rejected_open,
+            'rejected_full': self.rejected_full,
+        }
+
+
+class HTTPClient:
+    """Per-upstream pooled sessions with retries, circuit breakers and bulkheads"""
+
+    def __init__(self, default=None, upstreams=None):
+        self.default = {**DEFAULT_UPSTREAM, **(default or {})}
+        self.overrides = upstreams or {}
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    def upstream(self, url):
+        name = urlsplit(url).netloc
+        upstream = self._upstreams.get(name)
+        if upstream is None:
+            with self._lock:
+                upstream = self._upstreams.get(name)
+                if upstream is None:
+                    config = {**self.default, **self.overrides.get(name, {})}
+                    upstream = self._upstreams[name] = Upstream(name, config)
+        return upstream
+
+    def request(self, method, url, timeout=None, idempotent=None, **kwargs):
+        """
+        Send a request through the upstream's bulkhead, breaker and retry policy.
+
+        Args:
+            timeout (float or tuple): Overrides the upstream's (connect, read) timeouts.
+            idempotent (bool): Whether 502/503/504 (and timeouts, if the upstream's
+                RETRY_TIMEOUTS allows) may be retried. Defaults to True for
+                GET/HEAD/OPTIONS/PUT/DELETE, False otherwise.
+            **kwargs: Passed to requests.Session.request (json, data, headers, ...).
+
+        Returns:
+            requests.Response: The last response, whatever its status.
+
+        Raises:
+            UpstreamUnavailable: Breaker open or bulkhead full; nothing was sent.
+            requests.RequestException: The last attempt failed.
+        """
+        upstream = self.upstream(url)
+        config = upstream.config
+        if idempotent is None:
+            idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+        if timeout is None:
+            timeout = (config['CONNECT_TIMEOUT'], config['READ_TIMEOUT'])
+        elif not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        deadline = time.monotonic() + config['DEADLINE'] if config['DEADLINE'] else None
+
+        if not upstream.bulkhead.acquire(timeout=config['ACQUIRE_TIMEOUT']):
+            upstream.rejected_full += 1
+            raise BulkheadFullError(f"Too many concurrent requests to {upstream.name}")
+        upstream.in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                if not upstream.breaker.allow():
+                    upstream.rejected_open += 1
+                    raise CircuitOpenError(f"Circuit open for {upstream.name}")
+                upstream.requests += 1
+                attempt_timeout = timeout
+                if deadline is not None:
+                    # The last attempt only gets what is left of the budget
+                    attempt_timeout = tuple(max(0.001, min(t, deadline - time.monotonic())) for t in timeout)
+                try:
+                    response = upstream.session.request(method, url, timeout=attempt_timeout, **kwargs)
+                except requests.ConnectionError as e:
+                    # A connection dropped mid-request may have been processed; only retry those when idempotent
+                    error, retryable = e, idempotent or not_sent(e)
+                except requests.Timeout as e:
+                    error, retryable = e, idempotent and config['RETRY_TIMEOUTS']
+                except requests.RequestException as e:
+                    # e.g. a truncated chunked body or too many redirects
+                    error, retryable = e, False
+                else:
+                    if response.status_code < 500:
+                        upstream.breaker.record_success()
+                        return response
+                    error, retryable = None, idempotent and response.status_code in RETRY_STATUSES
+
+                upstream.failures += 1
+                upstream.breaker.record_failure()
+                delay = random.uniform(0, min(config['BACKOFF_MAX'], config['BACKOFF_BASE'] * 2 ** (attempt + 1)))
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if not retryable or attempt >= config['RETRIES'] or out_of_time:
+                    if error is not None:
+                        raise error
+                    return response
+                attempt += 1
+                upstream.retries += 1
+                time.sleep(delay)
+        finally:
+            upstream.in_flight -= 1
+            upstream.bulkhead.release()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        return {name: upstream.stats() for name, upstream in self._upstreams.items()}
+
+
+_settings = getattr(settings, 'HTTP_CLIENT', {})
+http_client = HTTPClient(
+    default=_settings.get('DEFAULT'),
+    upstreams={
+        name: {**UPSTREAMS.get(name, {}), **_settings.get('UPSTREAMS', {}).get(name, {})}
+        for name in {*UPSTREAMS, *_settings.get('UPSTREAMS', {})}
+    },
+)
@@ -64,6 +64,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "shop.middleware.GuestSessionMiddleware",
+    "analytics.middleware.VisitorIdMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -130,6 +131,19 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/ref/settings/#caches
+# Shared by every worker (analytics dashboards, their invalidation versions,
+# recipe counters, recommendation refresh locks) and hit on every recipe read
+# and engagement write, so production needs Redis or Memcached:
+# CACHE_URL=redis://host:6379/1. Without it each process gets its own
+# local-memory cache, every management command warns (analytics.W001) and
+# `manage.py check --deploy` fails (analytics.E001).
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 
 
 # Password validation
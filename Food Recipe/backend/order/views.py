@@ -7,6 +7,7 @@ from django.shortcuts import get_object_or_404
 from .models import Order, OrderItem
 from .serializers import OrderSerializer
 from shop.models import Ingredient
+from backend.http_client import http_client
 import requests
 import uuid
 
@@ -75,7 +76,7 @@ def initiate_fapshi_payment(request):
             "bookingId": booking_id
         }
 
-        response = requests.post("https://fapshi-node.onrender.com/initiatePayment/", json=data)
+        response = http_client.post("https://fapshi-node.onrender.com/initiatePayment/", json=data)
 
         if response.status_code == 200:
             return Response(response.json(), status=status.HTTP_200_OK)
@@ -125,10 +126,9 @@ class InitiatePaymentView(APIView):
         }
 
         try:
-            resp = requests.post(
+            resp = http_client.post(
                 "https://fapshi-node.onrender.com/initiatePayment",
                 json=payload,
-                timeout=15
             )
             data = resp.json()
             if resp.status_code == 200 and data.get('link'):
@@ -14,6 +14,7 @@ from .models import (
     MealPlanEntry,
     
 )
+from .counters import with_counters
 # Register your models here.
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ["name", "slug", "description"]
@@ -22,15 +23,22 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ["name", "slug"]
     
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ["author", "title", "difficulty", "category", "favorites_count", "likes_count"]
-
-    def favorites_count(self, obj):
-        return obj.favorites.count()
-    favorites_count.short_description = "Favorites Count"
-
-    def likes_count(self, obj):
-        return obj.likes.count()
-    likes_count.short_description = "Likes Count"
+    list_display = ["author", "title", "difficulty", "category", "total_favorites", "total_likes"]
+    list_select_related = ["author", "category"]
+    readonly_fields = ["favorites_count", "likes_count", "shares_count", "views_count"]
+    
+    def get_queryset(self, request):
+        # Live totals (column + pending counter shards) in the changelist query itself
+        return with_counters(super().get_queryset(request), "favorites", "likes")
+    
+    @admin.display(description="Favorites", ordering="favorites_total")
+    def total_favorites(self, obj):
+        return obj.favorites_total
+    
+    @admin.display(description="Likes", ordering="likes_total")
+    def total_likes(self, obj):
+        return obj.likes_total
+    
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ["recipe", "name", "amount"]
     list_editable = ["amount"]
@@ -0,0 +1,164 @@
+# Food Recipe/backend/recipe/counters.py
+"""
+Sharded counters for recipe likes, favorites, shares and views.
+
+Increments go to one of COUNTER_SHARDS rows per (recipe, metric), picked at
+random, so concurrent writers on a trending recipe rarely wait on the same row
+lock. Reads add the base column on Recipe to the SUM of the pending shards.
+compact_counters() (run periodically by the compact_recipe_counters command)
+folds the shards back into the Recipe columns.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, IntegerField, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Recipe, RecipeCounterShard
+
+COUNTER_SHARDS = getattr(settings, 'RECIPE_COUNTER_SHARDS', 16)
+COUNTER_CACHE_TIMEOUT = getattr(settings, 'RECIPE_COUNTER_CACHE_TIMEOUT', 10)  # seconds
+
+# metric -> denormalized column on Recipe
+COUNTER_FIELDS = {
+    'likes': 'likes_count',
+    'favorites': 'favorites_count',
+    'shares': 'shares_count',
+    'views': 'views_count',
+}
+
+
+def _cache_key(recipe_id):
+    return f'recipe_counters:{recipe_id}'
+
+
+def increment_counter(recipe_id, metric, delta=1):
+    """Add delta to a random shard of the recipe's metric counter."""
+    increment_counters({(recipe_id, metric): delta})
+
+
+def increment_counters(deltas):
+    """
+    Apply several counter increments in one statement.
+
+    Args:
+        deltas (dict): {(recipe_id, metric): delta}
+
+    Uses INSERT ... ON CONFLICT DO UPDATE, so the first increment creates the
+    shard row and later ones add to it. Each (recipe, metric) pair appears
+    once, so the statement never touches the same shard twice.
+    """
+    rows = []
+    for (recipe_id, metric), delta in deltas.items():
+        if metric not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter metric: {metric}")
+        if delta:
+            rows.append((recipe_id, metric, random.randrange(COUNTER_SHARDS), delta))
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(RecipeCounterShard._meta.db_table)
+    placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (recipe_id, metric, shard, count) VALUES {placeholders} "
+            f"ON CONFLICT (recipe_id, metric, shard) DO UPDATE SET count = {table}.count + EXCLUDED.count",
+            [value for row in rows for value in row]
+        )
+
+
+def get_counters(recipe_id, use_cache=True):
+    """
+    Return {metric: value} for a recipe: base column plus pending shards.
+
+    Cached for COUNTER_CACHE_TIMEOUT seconds; pass use_cache=False to read
+    the current value (e.g. right after the user's own like).
+    """
+    key = _cache_key(recipe_id)
+    if use_cache:
+        counters = cache.get(key)
+        if counters is not None:
+            return counters
+
+    counters = dict(zip(
+        COUNTER_FIELDS,
+        Recipe.objects.filter(pk=recipe_id).values_list(*COUNTER_FIELDS.values()).get()
+    ))
+    pending = RecipeCounterShard.objects.filter(recipe_id=recipe_id).values_list('metric').annotate(
+        total=Sum('count')
+    )
+    for metric, total in pending:
+        counters[metric] = max(counters[metric] + (total or 0), 0)
+
+    cache.set(key, counters, COUNTER_CACHE_TIMEOUT)
+    return counters
+
+
+def with_counters(queryset, *metrics):
+    """
+    Annotate <metric>_total (base column plus pending shards) on a Recipe queryset.
+
+    One correlated subquery per metric, so listing many recipes stays a single
+    query instead of a get_counters() call per row.
+    """
+    return queryset.annotate(**counter_totals(*metrics))
+
+
+def prefetch_with_counters(lookup, *metrics):
+    """Prefetch the recipes at lookup (e.g. 'recipe' on MealPlanEntry) with with_counters() annotations"""
+    return Prefetch(lookup, queryset=with_counters(Recipe.objects.select_related('author', 'category'), *metrics))
+
+
+def counter_totals(*metrics):
+    """The with_counters() annotations, to pass to .annotate() alongside others"""
+    annotations = {}
+    for metric in metrics or COUNTER_FIELDS:
+        pending = (
+            RecipeCounterShard.objects.filter(recipe=OuterRef('pk'), metric=metric)
+            .values('recipe').annotate(total=Sum('count')).values('total')
+        )
+        annotations[f'{metric}_total'] = Greatest(
+            F(COUNTER_FIELDS[metric]) + Coalesce(Subquery(pending, output_field=IntegerField()), Value(0)),
+            Value(0),
+        )
+    return annotations
+
+
+def get_counter(recipe_id, metric, use_cache=True):
+    return get_counters(recipe_id, use_cache=use_cache)[metric]
+
+
+def compact_counters():
+    """
+    Fold every non-zero shard into the Recipe columns in one statement.
+
+    The shard rows are deleted and their totals added to the base columns
+    atomically, so readers see the same base + pending sum before and after.
+
+    Returns:
+        int: The number of recipes updated.
+    """
+    shard_table = connection.ops.quote_name(RecipeCounterShard._meta.db_table)
+    recipe_table = connection.ops.quote_name(Recipe._meta.db_table)
+
+    totals = ', '.join(
+        f"COALESCE(SUM(count) FILTER (WHERE metric = '{metric}'), 0) AS {metric}"
+        for metric in COUNTER_FIELDS
+    )
+    assignments = ', '.join(
+        f"{field} = GREATEST(r.{field} + totals.{metric}, 0)"
+        for metric, field in COUNTER_FIELDS.items()
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH drained AS ("
+            f"  DELETE FROM {shard_table} WHERE count <> 0 RETURNING recipe_id, metric, count"
+            f"), totals AS ("
+            f"  SELECT recipe_id, {totals} FROM drained GROUP BY recipe_id"
+            f") "
+            f"UPDATE {recipe_table} AS r SET {assignments} FROM totals WHERE r.id = totals.recipe_id"
+        )
+        return cursor.rowcount
@@ -0,0 +1,87 @@
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import F
+from recipe.models import Recipe
+from recipe.counters import increment_counter, get_counter, COUNTER_SHARDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure increment throughput on one recipe counter with many concurrent threads, '
+        'comparing a single hot row against the sharded counter. Run against a local PostgreSQL only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('recipe_id', type=int, help='Recipe whose view counter is hammered')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent writer threads')
+        parser.add_argument('--increments', type=int, default=200, help='Increments per thread')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This benchmark needs PostgreSQL (row locks and ON CONFLICT).')
+
+        recipe_id = options['recipe_id']
+        threads = options['threads']
+        increments = options['increments']
+
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            raise CommandError(f'Recipe {recipe_id} does not exist')
+
+        total = threads * increments
+        self.stdout.write(f'{threads} threads x {increments} increments on recipe {recipe_id}')
+
+        def hot_row():
+            Recipe.objects.filter(pk=recipe_id).update(views_count=F('views_count') + 1)
+
+        def sharded():
+            increment_counter(recipe_id, 'views')
+
+        before = get_counter(recipe_id, 'views', use_cache=False)
+
+        hot_elapsed = self._run(hot_row, threads, increments)
+        self._report('Single row', total, hot_elapsed)
+
+        sharded_elapsed = self._run(sharded, threads, increments)
+        self._report(f'Sharded ({COUNTER_SHARDS} shards)', total, sharded_elapsed)
+
+        # Undo both runs so the benchmark leaves the real counter untouched
+        Recipe.objects.filter(pk=recipe_id).update(views_count=F('views_count') - total)
+        increment_counter(recipe_id, 'views', -total)
+
+        after = get_counter(recipe_id, 'views', use_cache=False)
+        if after != before:
+            self.stdout.write(self.style.WARNING(f'Counter drifted from {before} to {after}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {hot_elapsed / sharded_elapsed:.2f}x'))
+
+    def _run(self, increment, threads, increments):
+        barrier = threading.Barrier(threads + 1)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(increments):
+                    increment()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        started = time.monotonic()
+        for w in workers:
+            w.join()
+        elapsed = time.monotonic() - started
+
+        if errors:
+            raise CommandError(f'{len(errors)} worker(s) failed: {errors[0]}')
+        return elapsed
+
+    def _report(self, label, total, elapsed):
+        self.stdout.write(f'{label}: {total} increments in {elapsed:.2f}s ({total / elapsed:.0f}/s)')
@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from recipe.counters import compact_counters
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded recipe counters (likes, favorites, shares, views) into the Recipe rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep compacting every N seconds instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['loop']
+
+        while True:
+            started = time.monotonic()
+            updated = compact_counters()
+            elapsed = (time.monotonic() - started) * 1000
+            self.stdout.write(
+                self.style.SUCCESS(f'Compacted counters for {updated} recipes in {elapsed:.1f} ms')
+            )
+
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.20 on 2026-10-19 16:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    LikedRecipe = apps.get_model("recipe", "LikedRecipe")
+    FavoriteRecipe = apps.get_model("recipe", "FavoriteRecipe")
+
+    def count_for(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(recipe=OuterRef("pk"))
+                .values("recipe")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+
+    Recipe.objects.update(
+        likes_count=count_for(LikedRecipe),
+        favorites_count=count_for(FavoriteRecipe),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0010_category_image_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.20 on 2026-10-19 16:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def backfill_share_and_view_counts(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    AnalyticsRecipeView = apps.get_model("analytics", "RecipeView")
+    AnalyticsRecipeShare = apps.get_model("analytics", "RecipeShare")
+
+    def count_for(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(recipe=OuterRef("pk"))
+                .values("recipe")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            0,
+        )
+
+    Recipe.objects.update(
+        shares_count=count_for(AnalyticsRecipeShare),
+        views_count=count_for(AnalyticsRecipeView),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0011_recipe_likes_count_recipe_favorites_count"),
+        ("analytics", "0003_recipelike_ip_address_recipelike_session_key_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="shares_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="views_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="RecipeCounterShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("likes", "Likes"),
+                            ("favorites", "Favorites"),
+                            ("shares", "Shares"),
+                            ("views", "Views"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counter_shards",
+                        to="recipe.recipe",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("recipe", "metric", "shard")},
+            },
+        ),
+        migrations.RunPython(
+            backfill_share_and_view_counts, migrations.RunPython.noop
+        ),
+    ]
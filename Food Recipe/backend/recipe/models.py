@@ -76,6 +76,13 @@ class Recipe(models.Model):
     favorites = models.ManyToManyField(User, through='FavoriteRecipe', related_name='favorite_recipes')
     likes = models.ManyToManyField(User, through='LikedRecipe', related_name='liked_recipes')
     
+    # Denormalized counters. Increments land in RecipeCounterShard rows and are
+    # folded in here by the compact_recipe_counters command (see recipe/counters.py)
+    likes_count = models.PositiveIntegerField(default=0)
+    favorites_count = models.PositiveIntegerField(default=0)
+    shares_count = models.PositiveIntegerField(default=0)
+    views_count = models.PositiveIntegerField(default=0)
+    
     class Meta:
         ordering = ['-created_at']
         
@@ -106,6 +113,30 @@ class Recipe(models.Model):
         return self.title
 
 
+class RecipeCounterShard(models.Model):
+    """
+    Pending increments for one recipe counter, spread over several rows so
+    concurrent writers on a trending recipe don't queue on a single row lock.
+    """
+    METRIC_CHOICES = (
+        ('likes', 'Likes'),
+        ('favorites', 'Favorites'),
+        ('shares', 'Shares'),
+        ('views', 'Views'),
+    )
+
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='counter_shards')
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    shard = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)  # may be negative (e.g. unlikes)
+
+    class Meta:
+        unique_together = ('recipe', 'metric', 'shard')
+
+    def __str__(self):
+        return f"{self.recipe_id}:{self.metric}[{self.shard}] = {self.count}"
+
+
 class Ingredient(models.Model):
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_items')
     name = models.CharField(max_length=100)
@@ -5,6 +5,8 @@ from .models import (
     Comment, Rating, FavoriteRecipe, LikedRecipe, MealPlan, MealPlanEntry
 )
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from .counters import get_counter, prefetch_with_counters, with_counters
 import json
 from decimal import Decimal
 
@@ -252,6 +254,9 @@ class RecipeListSerializer(serializers.ModelSerializer):
     average_rating = serializers.DecimalField(max_digits=3, decimal_places=1, read_only=True)
     rating_count = serializers.IntegerField(read_only=True)
     like_count = serializers.IntegerField(read_only=True)
+    # Base column plus pending counter shards, like the like/favorite responses
+    likes_count = serializers.SerializerMethodField()
+    favorites_count = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
@@ -264,6 +269,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'preparation_time', 'video_url', 'cooking_time', 'servings', 'difficulty',
             'calories', 'category', 'author', 'created_at',
             'average_rating', 'rating_count', 'like_count',
+            'likes_count', 'favorites_count',
             'is_favorited', 'is_liked'
         ]
 
@@ -286,6 +292,27 @@ class RecipeListSerializer(serializers.ModelSerializer):
         # If no uploaded video, fall back to video_url
         return obj.video_url
 
+    def get_likes_count(self, obj):
+        return self._counter(obj, 'likes')
+
+    def get_favorites_count(self, obj):
+        return self._counter(obj, 'favorites')
+
+    def _counter(self, obj, metric):
+        # Listed recipes must come annotated by counters.with_counters()/prefetch_with_counters()
+        total = getattr(obj, f'{metric}_total', None)
+        if total is not None:
+            return total
+        serializer = self
+        while serializer is not None:
+            if isinstance(serializer, serializers.ListSerializer):
+                raise ImproperlyConfigured(
+                    f"Recipes serialized in a list need the '{metric}_total' annotation from counters.with_counters()"
+                )
+            serializer = serializer.parent
+        # A single recipe (detail or write responses) reads its cached counters
+        return get_counter(obj.id, metric)
+
     def get_is_favorited(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
@@ -318,7 +345,7 @@ class RecipeDetailSerializer(RecipeListSerializer):
         if tag_ids:
             tag_related = Recipe.objects.filter(tags__in=tag_ids).exclude(id=obj.id)
             queryset = queryset | tag_related
-        queryset = queryset.distinct()[:6]  # Limit to 6 related recipes
+        queryset = with_counters(queryset.distinct(), 'likes', 'favorites')[:6]  # Limit to 6 related recipes
         return RecipeListSerializer(queryset, many=True, context=self.context).data
 
 
@@ -640,13 +667,18 @@ class MealPlanEntrySerializer(serializers.ModelSerializer):
 
 class MealPlanSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
-    entries = MealPlanEntrySerializer(many=True, read_only=True)
+    entries = serializers.SerializerMethodField()
 
     class Meta:
         model = MealPlan
         fields = ['id', 'user', 'start_date', 'end_date', 'entries']
         read_only_fields = ['id', 'entries'] # User is set automatically
 
+    def get_entries(self, obj):
+        # The entries' recipes with their counters in one query
+        entries = obj.entries.prefetch_related(prefetch_with_counters('recipe', 'likes', 'favorites'))
+        return MealPlanEntrySerializer(entries, many=True, context=self.context).data
+
 class ShoppingListSerializer(serializers.Serializer):
     # Serializer to represent the shopping list output
     ingredients = serializers.ListField(child=serializers.CharField())
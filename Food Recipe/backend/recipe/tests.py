@@ -1,3 +1,29 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from .models import Recipe
+from .serializers import RecipeListSerializer
+
+
+class RecipeListSerializerCounterTests(SimpleTestCase):
+    def test_listed_recipes_use_annotated_totals(self):
+        recipe = Recipe(id=1, title='Ndole', likes_count=3)
+        recipe.likes_total, recipe.favorites_total = 5, 2
+        child = RecipeListSerializer([recipe], many=True).child
+        self.assertEqual((child.get_likes_count(recipe), child.get_favorites_count(recipe)), (5, 2))
+
+    def test_listed_recipes_without_annotations_fail(self):
+        recipe = Recipe(id=1, title='Ndole')
+        child = RecipeListSerializer([recipe], many=True).child
+        with mock.patch('recipe.serializers.get_counter') as get_counter:
+            with self.assertRaises(ImproperlyConfigured):
+                child.get_likes_count(recipe)
+        get_counter.assert_not_called()
+
+    def test_single_recipe_reads_its_counters(self):
+        recipe = Recipe(id=1, title='Ndole')
+        with mock.patch('recipe.serializers.get_counter', return_value=7) as get_counter:
+            self.assertEqual(RecipeListSerializer(recipe).get_likes_count(recipe), 7)
+        get_counter.assert_called_once_with(1, 'likes')
@@ -22,6 +22,7 @@ urlpatterns = [
 # ...existing code...
     # Recipe endpoints
     path('recipes/', views.RecipeListCreateView.as_view(), name='recipe-list'),
+    path('recipes/trending/', views.TrendingRecipesView.as_view(), name='trending-recipes'),
     path('recipes/<str:id>/', views.RecipeDetailView.as_view(), name='recipe-detail'),
     path('recipes/<str:recipe_id>/review/', views.RecipeReviewView.as_view(), name='recipe-review'),
     path('recipes/<str:recipe_id>/comments/<str:comment_id>/reply/', views.CommentReplyView.as_view(), name='comment-reply'),
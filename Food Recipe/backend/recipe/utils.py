@@ -2,8 +2,17 @@
 import random
 from datetime import date, timedelta
 
-from .models import Recipe, Ingredient
+from .models import Recipe, Ingredient, LikedRecipe, FavoriteRecipe
+from .counters import increment_counters, get_counter
+from django.db import connection, transaction
 from django.db.models import Q, Count, Avg, F
+from django.utils import timezone
+
+# reaction -> (through model, timestamp column, counter metric)
+RECIPE_REACTIONS = {
+    'like': (LikedRecipe, 'liked_at', 'likes'),
+    'favorite': (FavoriteRecipe, 'added_at', 'favorites'),
+}
 
 
 def find_recipes_by_ingredients(ingredient_list):
@@ -115,4 +124,89 @@ def aggregate_ingredients(recipes):
     for recipe in recipes:
         for ingredient in recipe.ingredient_items.all():
             shopping_list.append(f"{ingredient.amount} {ingredient.name}".strip())
-    return shopping_list
\ No newline at end of file
+    return shopping_list
+
+def set_recipe_reaction(reaction, user, recipe_id, active):
+    """
+    Idempotently add or remove a user's like/favorite on a recipe.
+
+    The row is written with INSERT ... ON CONFLICT DO NOTHING or removed with
+    DELETE ... RETURNING, so repeated calls never raise IntegrityError or
+    create extra rows. The recipe's sharded counter is adjusted in the same
+    transaction.
+
+    Args:
+        reaction (str): 'like' or 'favorite'.
+        user: The acting user.
+        recipe_id (int): Primary key of the recipe.
+        active (bool): True to add the reaction, False to remove it.
+
+    Returns:
+        tuple: (changed, count) where changed tells whether a row was
+            inserted/deleted and count is the recipe's new counter value.
+    """
+    with transaction.atomic():
+        added, removed = set_recipe_reactions_bulk(reaction, user, {recipe_id: active})
+        changed = recipe_id in (added if active else removed)
+        count = get_counter(recipe_id, RECIPE_REACTIONS[reaction][2], use_cache=False)
+
+    return changed, count
+
+
+def set_recipe_reactions_bulk(reaction, user, states):
+    """
+    Apply many like/favorite states for one user with at most two statements.
+
+    Args:
+        reaction (str): 'like' or 'favorite'.
+        user: The acting user.
+        states (dict): {recipe_id: active}
+
+    Returns:
+        tuple: (added, removed) sets of recipe ids whose state actually changed.
+    """
+    model, timestamp_field, metric = RECIPE_REACTIONS[reaction]
+    table = connection.ops.quote_name(model._meta.db_table)
+    to_add = [recipe_id for recipe_id, active in states.items() if active]
+    to_remove = [recipe_id for recipe_id, active in states.items() if not active]
+    added, removed = set(), set()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if to_add:
+                now = timezone.now()
+                placeholders = ', '.join(['(%s, %s, %s)'] * len(to_add))
+                cursor.execute(
+                    f"INSERT INTO {table} (user_id, recipe_id, {timestamp_field}) VALUES {placeholders} "
+                    "ON CONFLICT (user_id, recipe_id) DO NOTHING RETURNING recipe_id",
+                    [value for recipe_id in to_add for value in (user.id, recipe_id, now)]
+                )
+                added = {row[0] for row in cursor.fetchall()}
+            if to_remove:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE user_id = %s AND recipe_id = ANY(%s) RETURNING recipe_id",
+                    [user.id, to_remove]
+                )
+                removed = {row[0] for row in cursor.fetchall()}
+
+        deltas = {(recipe_id, metric): 1 for recipe_id in added}
+        deltas.update({(recipe_id, metric): -1 for recipe_id in removed})
+        increment_counters(deltas)
+
+    return added, removed
+
+
+def toggle_recipe_reaction(reaction, user, recipe_id):
+    """
+    Flip a user's like/favorite on a recipe.
+
+    Tries the delete first so that a double tap can never leave two rows.
+
+    Returns:
+        tuple: (active, count) where active is the reaction state after the toggle.
+    """
+    removed, count = set_recipe_reaction(reaction, user, recipe_id, active=False)
+    if removed:
+        return False, count
+    _, count = set_recipe_reaction(reaction, user, recipe_id, active=True)
+    return True, count
@@ -23,11 +23,16 @@ from .serializers import (
 )
 from .permissions import IsAuthorOrReadOnly, IsVerifiedChef
 from .filters import RecipeFilter
+from .counters import COUNTER_FIELDS, counter_totals, prefetch_with_counters
 from django.contrib.postgres.search import TrigramSimilarity
-from .utils import filter_recipes_by_preferences, select_recipes_for_meal_plan, aggregate_ingredients
+from .utils import (
+    filter_recipes_by_preferences, select_recipes_for_meal_plan, aggregate_ingredients,
+    RECIPE_REACTIONS, set_recipe_reaction, toggle_recipe_reaction
+)
 from datetime import date, timedelta
 import logging
 import traceback
+from analytics.models import TrendingRecipe
 from analytics.signals import (
                 track_recipe_view, 
                 track_recipe_share, 
@@ -89,16 +94,11 @@ class RecipeReviewView(APIView):
         serializer.is_valid(raise_exception=True)
         review = serializer.save()
         # Track the comment action
-        # Ensure session exists for unauthenticated users
-        if not request.user.is_authenticated:
-            if not request.session.session_key:
-                request.session.create()
-        
         track_recipe_comment_manual(
             recipe=recipe,
             user=request.user if request.user.is_authenticated else None,
             ip_address=request.META.get('REMOTE_ADDR'),
-            session_key=request.session.session_key
+            session_key=request.visitor_id
         )
         return Response(review, status=status.HTTP_201_CREATED)
         
@@ -211,16 +211,11 @@ class CommentReplyView(APIView):
         if serializer.is_valid():
             reply = serializer.save()
             # Track the comment action for replies
-            # Ensure session exists for unauthenticated users
-            if not request.user.is_authenticated:
-                if not request.session.session_key:
-                    request.session.create()
-            
             track_recipe_comment_manual(
                 recipe=recipe,
                 user=request.user if request.user.is_authenticated else None,
                 ip_address=request.META.get('REMOTE_ADDR'),
-                session_key=request.session.session_key
+                session_key=request.visitor_id
             )
             return Response({
                 'detail': 'Reply submitted successfully.',
@@ -267,7 +262,8 @@ class RecipeListCreateView(generics.ListCreateAPIView):
         queryset = Recipe.objects.annotate(
             average_rating=Avg('ratings__value'),
             rating_count=Count('ratings', distinct=True),
-            like_count=Count('likes', distinct=True)
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
         )
         
         # Filter by user if provided
@@ -325,15 +321,12 @@ class RecipeDetailView(generics.RetrieveUpdateDestroyAPIView):
         return Recipe.objects.annotate(
             average_rating=Avg('ratings__value'),
             rating_count=Count('ratings', distinct=True),
-            like_count=Count('likes', distinct=True)
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
         )
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Ensure session exists for unauthenticated users
-        if not request.user.is_authenticated:
-            if not request.session.session_key:
-                request.session.create()
         # Track the view
         track_recipe_view(
             recipe=instance,
@@ -341,7 +334,7 @@ class RecipeDetailView(generics.RetrieveUpdateDestroyAPIView):
             ip_address=request.META.get('REMOTE_ADDR'),
             user_agent=request.META.get('HTTP_USER_AGENT'),
             referrer=request.META.get('HTTP_REFERER'),
-            session_key=request.session.session_key,  # This will now always have a value
+            session_key=request.visitor_id,
             time_spent=0
         )
         serializer = self.get_serializer(instance)
@@ -381,7 +374,8 @@ class UserRecipesView(generics.ListAPIView):
         return Recipe.objects.filter(author=self.request.user).annotate(
             average_rating=Avg('ratings__value'),
             rating_count=Count('ratings', distinct=True),
-            like_count=Count('likes', distinct=True)
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
         )
 
 
@@ -393,7 +387,8 @@ class UserFavoritesView(generics.ListAPIView):
         return Recipe.objects.filter(favorites=self.request.user).annotate(
             average_rating=Avg('ratings__value'),
             rating_count=Count('ratings', distinct=True),
-            like_count=Count('likes', distinct=True)
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
         )
 
 class CommentListCreateView(generics.ListCreateAPIView):
@@ -415,16 +410,11 @@ class CommentListCreateView(generics.ListCreateAPIView):
         comment = serializer.save()
         
         # Track the comment action
-        # Ensure session exists for unauthenticated users
-        if not self.request.user.is_authenticated:
-            if not self.request.session.session_key:
-                self.request.session.create()
-        
         track_recipe_comment_manual(
             recipe=comment.recipe,
             user=self.request.user if self.request.user.is_authenticated else None,
             ip_address=self.request.META.get('REMOTE_ADDR'),
-            session_key=self.request.session.session_key
+            session_key=self.request.visitor_id
         )
 
 
@@ -435,18 +425,13 @@ def share_recipe(request, recipe_id):
     recipe = get_object_or_404(Recipe, id=recipe_id)
     platform = request.data.get('platform', 'unknown')  # e.g., 'facebook', 'twitter', 'whatsapp', 'email', 'link'
     
-    # Ensure session exists for unauthenticated users
-    if not request.user.is_authenticated:
-        if not request.session.session_key:
-            request.session.create()
-    
     # Track the share action
     track_recipe_share(
         recipe=recipe,
         user=request.user if request.user.is_authenticated else None,
         platform=platform,
         ip_address=request.META.get('REMOTE_ADDR'),
-        session_key=request.session.session_key
+        session_key=request.visitor_id
     )
     
     return Response({
@@ -468,18 +453,13 @@ def track_share(request):
     
     recipe = get_object_or_404(Recipe, id=recipe_id)
     
-    # Ensure session exists for unauthenticated users
-    if not request.user.is_authenticated:
-        if not request.session.session_key:
-            request.session.create()
-    
     # Track the share action
     track_recipe_share(
         recipe=recipe,
         user=request.user if request.user.is_authenticated else None,
         platform=platform,
         ip_address=request.META.get('REMOTE_ADDR'),
-        session_key=request.session.session_key
+        session_key=request.visitor_id
     )
     
     return Response({'status': 'tracked'}, status=status.HTTP_200_OK)
@@ -503,49 +483,56 @@ class RateRecipeView(generics.CreateAPIView):
         return context
 
 
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def toggle_favorite(request, recipe_id):
-    recipe = get_object_or_404(Recipe, id=recipe_id)
-    favorite, created = FavoriteRecipe.objects.get_or_create(
-        user=request.user,
-        recipe=recipe
-    )
-    
-    if not created:
-        # Recipe was already favorited, so remove it
-        favorite.delete()
-        return Response({'status': 'removed'}, status=status.HTTP_200_OK)
+def _reaction_response(reaction, request, recipe_id):
+    """
+    Shared handler for the like/favorite endpoints.
+
+    POST toggles the reaction (kept for existing clients), PUT sets it and
+    DELETE clears it. PUT and DELETE are idempotent, so rapid repeated taps
+    neither fail nor create extra rows.
+    """
+    recipe = get_object_or_404(Recipe.objects.only('id'), id=recipe_id)
+    counter_field = COUNTER_FIELDS[RECIPE_REACTIONS[reaction][2]]
+
+    if request.method == 'POST':
+        active, count = toggle_recipe_reaction(reaction, request.user, recipe.id)
+        changed = True
     else:
-        # Track the save action when favorite is created
-        # Ensure session exists for tracking
-        if not request.session.session_key:
-            request.session.create()
-            
-        track_recipe_save_manual(
+        active = request.method == 'PUT'
+        changed, count = set_recipe_reaction(reaction, request.user, recipe.id, active)
+
+    if active and changed:
+        # Raw inserts bypass post_save, so record the analytics event here
+        tracker = track_recipe_like_manual if reaction == 'like' else track_recipe_save_manual
+        tracker(
             recipe=recipe,
             user=request.user,
             ip_address=request.META.get('REMOTE_ADDR'),
-            session_key=request.session.session_key
+            session_key=request.visitor_id
         )
-    return Response({'status': 'added'}, status=status.HTTP_201_CREATED)
 
+    if request.method == 'POST':
+        response_status = status.HTTP_201_CREATED if active else status.HTTP_200_OK
+    else:
+        response_status = status.HTTP_200_OK
 
-@api_view(['POST'])
+    return Response({
+        'status': ('added' if active else 'removed') if changed else 'unchanged',
+        'active': active,
+        counter_field: count
+    }, status=response_status)
+
+
+@api_view(['POST', 'PUT', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def toggle_favorite(request, recipe_id):
+    return _reaction_response('favorite', request, recipe_id)
+
+
+@api_view(['POST', 'PUT', 'DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def toggle_like(request, recipe_id):
-    recipe = get_object_or_404(Recipe, id=recipe_id)
-    like, created = LikedRecipe.objects.get_or_create(
-        user=request.user,
-        recipe=recipe
-    )
-    
-    if not created:
-        # Recipe was already liked, so remove it
-        like.delete()
-        return Response({'status': 'removed'}, status=status.HTTP_200_OK)
-    
-    return Response({'status': 'added'}, status=status.HTTP_201_CREATED)
+    return _reaction_response('like', request, recipe_id)
 
 
 class SearchRecipesView(generics.ListAPIView):
@@ -566,7 +553,8 @@ class SearchRecipesView(generics.ListAPIView):
         ).distinct().annotate(
             average_rating=Avg('ratings__value'),
             rating_count=Count('ratings', distinct=True),
-            like_count=Count('likes', distinct=True)
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
         )
         
         return queryset
@@ -603,7 +591,8 @@ def ingredient_based_search(request):
         # Consider adding logic to sort by the number of matched ingredients
         # .order_by('-matched_ingredient_count')
         average_rating=Avg('ratings__value'),
-        like_count=Count('likes', distinct=True)
+        like_count=Count('likes', distinct=True),
+        **counter_totals('likes', 'favorites')
     )
     serializer = RecipeListSerializer(recipes, many=True)
     return Response(serializer.data)
@@ -822,7 +811,9 @@ class MealPlanEntryListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         meal_plan_pk = self.kwargs.get('meal_plan_pk')
-        return MealPlanEntry.objects.filter(meal_plan__pk=meal_plan_pk, meal_plan__user=self.request.user)
+        return MealPlanEntry.objects.filter(
+            meal_plan__pk=meal_plan_pk, meal_plan__user=self.request.user
+        ).prefetch_related(prefetch_with_counters('recipe', 'likes', 'favorites'))
 
     def perform_create(self, serializer):
         meal_plan_pk = self.kwargs.get('meal_plan_pk')
@@ -884,7 +875,45 @@ class RelatedRecipesView(APIView):
         queryset = queryset.annotate(
             average_rating=Avg('ratings__value'),
             rating_count=Count('ratings', distinct=True),
-            like_count=Count('likes', distinct=True)
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
         )[:6]
         serializer = RecipeListSerializer(queryset, many=True, context={'request': request})
-        return Response({'related_recipes': serializer.data})
\ No newline at end of file
+        return Response({'related_recipes': serializer.data})
+
+
+class TrendingRecipesView(APIView):
+    """
+    Trending recipes, overall or within ?category=<slug>, in rank order.
+    Served from the TrendingRecipe table that refresh_trending_recipes materializes.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        entries = TrendingRecipe.objects.filter(category__isnull=True)
+        category_slug = request.query_params.get('category')
+        if category_slug:
+            category = get_object_or_404(Category, slug=category_slug)
+            entries = TrendingRecipe.objects.filter(category=category)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        entries = list(entries.order_by('rank').values_list('recipe_id', 'score', 'computed_at')[:limit])
+        recipes = Recipe.objects.filter(id__in=[recipe_id for recipe_id, _, _ in entries]).select_related(
+            'author', 'category'
+        ).annotate(
+            average_rating=Avg('ratings__value'),
+            rating_count=Count('ratings', distinct=True),
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
+        ).in_bulk()
+        ranked = [recipes[recipe_id] for recipe_id, _, _ in entries if recipe_id in recipes]
+        serializer = RecipeListSerializer(ranked, many=True, context={'request': request})
+        return Response({
+            'trending_recipes': serializer.data,
+            'scores': {recipe_id: round(score, 3) for recipe_id, score, _ in entries},
+            'computed_at': entries[0][2] if entries else None,
+        })
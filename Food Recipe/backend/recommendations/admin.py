@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserPreference, RecipeView, AIRecommendation, IngredientSearchHistory
+from .models import UserPreference, RecipeView, AIRecommendation, IngredientSearchHistory, LLMResponse, SimilarRecipe
 
 @admin.register(UserPreference)
 class UserPreferenceAdmin(admin.ModelAdmin):
@@ -14,12 +14,26 @@ class RecipeViewAdmin(admin.ModelAdmin):
 
 @admin.register(AIRecommendation)
 class AIRecommendationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe', 'confidence_score', 'reason', 'created_at')
+    list_display = ('user', 'recipe', 'confidence_score', 'source', 'reason', 'generated_at')
     search_fields = ('user__username', 'recipe__title', 'reason')
-    list_filter = ('created_at',)
+    list_filter = ('source', 'generated_at')
 
 @admin.register(IngredientSearchHistory)
 class IngredientSearchHistoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'ingredients', 'search_timestamp', 'ip_address')
     search_fields = ('user__username', 'ingredients')
     list_filter = ('search_timestamp',)
+
+@admin.register(SimilarRecipe)
+class SimilarRecipeAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'rank', 'similar_recipe', 'score', 'computed_at')
+    search_fields = ('recipe__title',)
+    raw_id_fields = ('recipe', 'similar_recipe')
+    list_select_related = ('recipe', 'similar_recipe')
+
+@admin.register(LLMResponse)
+class LLMResponseAdmin(admin.ModelAdmin):
+    list_display = ('key', 'model', 'created_at', 'last_used_at', 'expires_at')
+    list_filter = ('model',)
+    search_fields = ('key',)
+    readonly_fields = ('key', 'model', 'response', 'created_at', 'last_used_at', 'expires_at')
@@ -6,10 +6,16 @@ import re
 from django.conf import settings
 from typing import List, Dict, Any
 from django.db.models import Q
+from backend.http_client import http_client
 from .models import UserPreference, RecipeView, Recipe
+from .collaborative import recommend_for_user
+from .llm_cache import LLM_CACHE_SETTINGS, llm_cache, request_key
 
 logger = logging.getLogger(__name__)
 
+# Complementary ingredients don't depend on the catalogue, so they can be kept longer
+SUGGESTIONS_CACHE_TTL = 7 * 24 * 60 * 60
+
 class DeepSeekAIService:
     def __init__(self):
         self.api_key = getattr(settings, 'DEEPSEEK_API_KEY', os.environ.get('DEEPSEEK_API_KEY', ''))
@@ -22,23 +28,31 @@ class DeepSeekAIService:
             "X-Title": "Recipe Recommendation Platform",
         }
 
-    def _make_request(self, messages: List[Dict[str, str]], max_tokens: int = 2000) -> Dict[str, Any]:
-        """Make a request to the DeepSeek API"""
+    def _make_request(self, messages: List[Dict[str, str]], max_tokens: int = 2000, cache_ttl: int = None) -> Dict[str, Any]:
+        """Make a request to the DeepSeek API, through the response cache (see llm_cache.py)"""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.3,  # Lower temperature for more consistent JSON output
+            "top_p": 0.9
+        }
+        if not LLM_CACHE_SETTINGS['ENABLED']:
+            return self._post(payload)
+        key = request_key(self.model, messages, max_tokens, payload["temperature"], payload["top_p"])
+        return llm_cache.get_or_call(key, self.model, lambda: self._post(payload), ttl=cache_ttl)
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         try:
             logger.info("[DeepSeek] Sending request to DeepSeek API...")
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": max_tokens,
-                "temperature": 0.3,  # Lower temperature for more consistent JSON output
-                "top_p": 0.9
-            }
-            
-            response = requests.post(
+            # Pooled, retried and breaker-guarded; timeouts and the retry deadline come from the
+            # openrouter.ai upstream settings. A repeated completion only costs tokens, so 502/503/504
+            # are retried; read timeouts are not.
+            response = http_client.post(
                 self.base_url,
                 headers=self.headers,
                 data=json.dumps(payload),
-                timeout=45  # Increased timeout
+                idempotent=True,
             )
             
             logger.info(f"[DeepSeek] Response status: {response.status_code}")
@@ -97,11 +111,11 @@ class DeepSeekAIService:
                     return recommendations
             
             logger.warning("[DeepSeek] No valid recommendations from AI, using fallback")
-            return self._fallback_recommendations(user, limit)
+            return self.fallback_recommendations(user, limit)
             
         except Exception as e:
             logger.error(f"[DeepSeek] Failed to get AI recommendations: {str(e)}. Using fallback.")
-            return self._fallback_recommendations(user, limit)
+            return self.fallback_recommendations(user, limit)
 
     def get_ingredient_based_recipes(self, ingredients: List[str], max_results: int = 10) -> Dict[str, Any]:
         """Find recipes based on available ingredients using AI"""
@@ -328,6 +342,8 @@ If you cannot find any suitable recipes, return an empty array in the recipes fi
     def _get_ingredient_suggestions(self, ingredients: List[str]) -> List[str]:
         """Get AI suggestions for complementary ingredients"""
         try:
+            # Same pantry in any order or case -> same prompt, so the cached answer is reused
+            ingredients = sorted({ingredient.strip().lower() for ingredient in ingredients if ingredient.strip()})
             prompt = f"""
 Ingredients: {', '.join(ingredients)}
 
@@ -347,7 +363,7 @@ Suggest 5 complementary ingredients. Respond with JSON array only:
                 }
             ]
             
-            response = self._make_request(messages, max_tokens=100)
+            response = self._make_request(messages, max_tokens=100, cache_ttl=SUGGESTIONS_CACHE_TTL)
             
             if 'choices' in response and len(response['choices']) > 0:
                 ai_content = response['choices'][0]['message']['content'].strip()
@@ -368,10 +384,24 @@ Suggest 5 complementary ingredients. Respond with JSON array only:
             logger.error(f"[DeepSeek] Error getting ingredient suggestions: {str(e)}")
             return ["salt", "pepper", "olive oil", "garlic", "onion"]
 
-    def _fallback_recommendations(self, user, limit: int) -> List[Dict[str, Any]]:
-        """Fallback recommendation logic when AI fails"""
+    def fallback_recommendations(self, user, limit: int) -> List[Dict[str, Any]]:
+        """Fallback recommendation logic when AI fails (fast, no AI call)"""
         logger.info("[DeepSeek] Using fallback recommendations")
-        # Simple fallback: recommend popular recipes not recently viewed
+        # Item-item collaborative filtering first (in-memory model, no AI call)
+        scored = recommend_for_user(user, limit)
+        if scored:
+            top = scored[0][1]
+            return [
+                {
+                    "recipe_id": recipe_id,
+                    "confidence_score": round(0.5 + 0.4 * score / top, 3),
+                    "reason": "Popular with people who enjoyed the recipes you liked",
+                    "source": "collaborative"
+                }
+                for recipe_id, score in scored
+            ]
+        
+        # No model or no history yet: recommend popular recipes not recently viewed
         viewed_recipe_ids = RecipeView.objects.filter(user=user).values_list('recipe_id', flat=True)
         recipes = Recipe.objects.exclude(id__in=viewed_recipe_ids)[:limit]
         
@@ -379,7 +409,8 @@ Suggest 5 complementary ingredients. Respond with JSON array only:
             {
                 "recipe_id": recipe.id,
                 "confidence_score": 0.5,
-                "reason": "Popular recipe recommendation"
+                "reason": "Popular recipe recommendation",
+                "source": "popular"
             }
             for recipe in recipes
         ]
@@ -0,0 +1,342 @@
+# recommendations/collaborative.py
+"""
+Item-item collaborative filtering over implicit feedback.
+
+build_item_item_model() (run nightly by the build_item_similarity command)
+turns likes, favorites, good ratings and views of both RecipeView tables into
+a sparse user x recipe matrix of signal weights, and keeps each recipe's
+TOP_K cosine neighbours over the users' columns (computed in blocks, see
+content.top_k_neighbours). The result is saved as a versioned artifact,
+
+    <RECOMMENDATIONS_MODEL_DIR>/item_item-<version>.npz
+
+and the CURRENT file is switched to it last. Every process checks CURRENT at
+most every RELOAD_SECONDS and swaps the new version in, so a rebuild needs no
+restart and a request never sees a half-written model.
+
+A user is scored by summing the neighbours of their RECENT_ITEMS latest
+recipes, weighted by how strongly they engaged with each: a few indexed
+queries plus array work on the in-memory model.
+
+Settings (all optional):
+    RECOMMENDATIONS_COLLABORATIVE = {
+        'WEIGHTS': {'view': 1.0, 'like': 3.0, 'favorite': 4.0, 'rating': 4.0},
+        'VIEW_DAYS': 180,
+        'TOP_K': 50,
+        'MIN_SCORE': 0.01,
+        'RECENT_ITEMS': 30,
+        'KEEP_VERSIONS': 3,
+        'RELOAD_SECONDS': 60,
+    }
+"""
+import io
+import logging
+import math
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+from scipy import sparse
+
+from analytics.models import RecipeView as AnalyticsRecipeView
+from recipe.models import FavoriteRecipe, LikedRecipe, Rating
+from .content import top_k_neighbours
+from .models import RecipeView
+
+logger = logging.getLogger(__name__)
+
+COLLABORATIVE_SETTINGS = {
+    'WEIGHTS': {'view': 1.0, 'like': 3.0, 'favorite': 4.0, 'rating': 4.0},
+    'VIEW_DAYS': 180,
+    'TOP_K': 50,
+    'MIN_SCORE': 0.01,
+    'RECENT_ITEMS': 30,
+    'KEEP_VERSIONS': 3,
+    'RELOAD_SECONDS': 60,
+    **getattr(settings, 'RECOMMENDATIONS_COLLABORATIVE', {}),
+}
+WEIGHTS = COLLABORATIVE_SETTINGS['WEIGHTS']
+
+MODEL_DIR = Path(getattr(settings, 'RECOMMENDATIONS_MODEL_DIR', settings.BASE_DIR / 'recommendation_models'))
+CURRENT_FILE = MODEL_DIR / 'CURRENT'
+
+# recommendations.RecipeView.interaction_type -> signal
+INTERACTION_SIGNALS = {'view': 'view', 'like': 'like', 'bookmark': 'favorite'}
+
+
+def rating_weight(value):
+    """Ratings above 2 stars count as positive feedback, scaled up to WEIGHTS['rating'] at 5"""
+    value = float(value)
+    return WEIGHTS['rating'] * (value - 2) / 3 if value > 2 else 0.0
+
+
+def view_weight(count):
+    return WEIGHTS['view'] * (1 + math.log(count)) if count else 0.0
+
+
+def interactions(view_days=None):
+    """Yield (user_id, recipe_id, weight) for every signal; repeats are summed later"""
+    view_days = view_days or COLLABORATIVE_SETTINGS['VIEW_DAYS']
+    for user_id, recipe_id in LikedRecipe.objects.values_list('user_id', 'recipe_id').iterator(chunk_size=10000):
+        yield user_id, recipe_id, WEIGHTS['like']
+    for user_id, recipe_id in FavoriteRecipe.objects.values_list('user_id', 'recipe_id').iterator(chunk_size=10000):
+        yield user_id, recipe_id, WEIGHTS['favorite']
+    ratings = Rating.objects.filter(user__isnull=False).values_list('user_id', 'recipe_id', 'value')
+    for user_id, recipe_id, value in ratings.iterator(chunk_size=10000):
+        yield user_id, recipe_id, rating_weight(value)
+    views = RecipeView.objects.values_list('user_id', 'recipe_id', 'interaction_type')
+    for user_id, recipe_id, interaction in views.iterator(chunk_size=10000):
+        yield user_id, recipe_id, WEIGHTS[INTERACTION_SIGNALS.get(interaction, 'view')]
+    # Anonymous views can't link two recipes to one person; repeat views count logarithmically
+    recent_views = (
+        AnalyticsRecipeView.objects
+        .filter(user__isnull=False, viewed_at__gte=timezone.now() - timedelta(days=view_days))
+        .values('user_id', 'recipe_id').annotate(n=Count('id')).values_list('user_id', 'recipe_id', 'n')
+        .order_by()
+    )
+    for user_id, recipe_id, count in recent_views.iterator(chunk_size=10000):
+        yield user_id, recipe_id, view_weight(count)
+
+
+def interaction_matrix(rows):
+    """
+    Sum (user_id, recipe_id, weight) rows into a recipe x user CSR matrix.
+
+    Returns:
+        tuple: (sorted ndarray of recipe ids, CSR matrix with one row per recipe id)
+    """
+    users, items, weights = [], [], []
+    for user_id, recipe_id, weight in rows:
+        if weight > 0:
+            users.append(user_id)
+            items.append(recipe_id)
+            weights.append(weight)
+    item_ids, item_index = np.unique(np.array(items, dtype=np.int64), return_inverse=True)
+    _, user_index = np.unique(np.array(users, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.array(weights, dtype=np.float32), (item_index, user_index)),
+        shape=(len(item_ids), int(user_index.max()) + 1 if len(users) else 0),
+    )
+    matrix.sum_duplicates()
+    return item_ids, matrix
+
+
+def item_neighbours(matrix, top_k=None, min_score=None):
+    """
+    Top-K cosine neighbours of every row, as CSR arrays.
+
+    Returns:
+        tuple: (indptr, neighbour row indexes, scores)
+    """
+    top_k = top_k or COLLABORATIVE_SETTINGS['TOP_K']
+    min_score = COLLABORATIVE_SETTINGS['MIN_SCORE'] if min_score is None else min_score
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    normalized = (sparse.diags(1 / norms).astype(np.float32) @ matrix).tocsr()
+
+    indptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+    indices, scores = [], []
+    for row, columns, row_scores in top_k_neighbours(normalized, top_k, min_score=min_score):
+        indptr[row + 1] = len(columns)
+        indices.append(columns.astype(np.int32))
+        scores.append(row_scores.astype(np.float32))
+    return (
+        np.cumsum(indptr),
+        np.concatenate(indices) if indices else np.empty(0, dtype=np.int32),
+        np.concatenate(scores) if scores else np.empty(0, dtype=np.float32),
+    )
+
+
+class ItemItemModel:
+    """One loaded artifact: recipe ids and their neighbour lists (CSR)"""
+
+    def __init__(self, version, item_ids, indptr, indices, scores):
+        self.version = version
+        self.item_ids = item_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def _positions(self, recipe_ids):
+        """Row of each recipe id, -1 where the model doesn't know it"""
+        positions = np.searchsorted(self.item_ids, recipe_ids)
+        clipped = np.minimum(positions, max(len(self.item_ids) - 1, 0))
+        known = (positions < len(self.item_ids)) & (self.item_ids[clipped] == recipe_ids) if len(self) else False
+        return np.where(known, positions, -1)
+
+    def neighbours(self, recipe_id):
+        """[(recipe_id, score)] best first"""
+        (position,) = self._positions(np.array([recipe_id], dtype=np.int64))
+        if position < 0:
+            return []
+        lo, hi = self.indptr[position], self.indptr[position + 1]
+        return list(zip(self.item_ids[self.indices[lo:hi]].tolist(), self.scores[lo:hi].tolist()))
+
+    def recommend(self, history, limit, exclude=()):
+        """
+        Score candidates by summing the neighbour scores of history items.
+
+        Args:
+            history (dict): {recipe_id: weight} of the user's recent recipes.
+            limit (int): Results wanted.
+            exclude (iterable): Recipe ids never to return (history is always excluded).
+
+        Returns:
+            list: [(recipe_id, score)] best first.
+        """
+        if not history or not len(self):
+            return []
+        recipe_ids = np.fromiter(history, dtype=np.int64, count=len(history))
+        weights = np.fromiter(history.values(), dtype=np.float32, count=len(history))
+        positions = self._positions(recipe_ids)
+        known = positions >= 0
+        if not known.any():
+            return []
+
+        candidates, contributions = [], []
+        for position, weight in zip(positions[known].tolist(), weights[known].tolist()):
+            lo, hi = self.indptr[position], self.indptr[position + 1]
+            candidates.append(self.indices[lo:hi])
+            contributions.append(self.scores[lo:hi] * weight)
+        candidates = np.concatenate(candidates)
+        if not len(candidates):
+            return []
+        rows, inverse = np.unique(candidates, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(contributions))
+
+        candidate_ids = self.item_ids[rows]
+        seen = np.union1d(recipe_ids, np.fromiter(exclude, dtype=np.int64))
+        keep = ~np.isin(candidate_ids, seen) & (totals > 0)
+        candidate_ids, totals = candidate_ids[keep], totals[keep]
+        if len(totals) > limit:
+            best = np.argpartition(-totals, limit)[:limit]
+            candidate_ids, totals = candidate_ids[best], totals[best]
+        order = np.argsort(-totals, kind='stable')
+        return list(zip(candidate_ids[order].tolist(), totals[order].tolist()))
+
+
+def model_path(version):
+    return MODEL_DIR / f'item_item-{version}.npz'
+
+
+def save_model(item_ids, indptr, indices, scores):
+    """Write a new artifact, then point CURRENT at it. Returns its version."""
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    version = timezone.now().strftime('%Y%m%dT%H%M%S')
+    path = model_path(version)
+    buffer = io.BytesIO()
+    np.savez(buffer, item_ids=item_ids, indptr=indptr, indices=indices, scores=scores)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(buffer.getvalue())
+    os.replace(tmp, path)
+    pointer = CURRENT_FILE.with_name(CURRENT_FILE.name + '.tmp')
+    pointer.write_text(version)
+    os.replace(pointer, CURRENT_FILE)
+    _prune_versions(version)
+    return version
+
+
+def _prune_versions(current):
+    keep = COLLABORATIVE_SETTINGS['KEEP_VERSIONS']
+    paths = sorted(MODEL_DIR.glob('item_item-*.npz'), reverse=True)
+    for path in paths[keep:]:
+        if path != model_path(current):
+            path.unlink(missing_ok=True)
+
+
+def current_version():
+    try:
+        return CURRENT_FILE.read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_model(version):
+    with np.load(model_path(version)) as arrays:
+        return ItemItemModel(
+            version, arrays['item_ids'], arrays['indptr'], arrays['indices'], arrays['scores']
+        )
+
+
+_model = None
+_checked_at = None
+_reload_lock = threading.Lock()
+
+
+def get_model():
+    """The current artifact, reloaded when CURRENT changes (None until one is built)"""
+    global _model, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < COLLABORATIVE_SETTINGS['RELOAD_SECONDS']:
+        return _model
+    # One thread checks; the others keep serving the loaded model meanwhile
+    if _reload_lock.acquire(blocking=_model is None):
+        try:
+            _checked_at = now
+            version = current_version()
+            if version and (_model is None or _model.version != version):
+                try:
+                    _model = load_model(version)
+                    logger.info('Loaded item-item model %s (%d recipes)', version, len(_model))
+                except (OSError, ValueError, KeyError):
+                    logger.exception('Failed to load item-item model %s', version)
+        finally:
+            _reload_lock.release()
+    return _model
+
+
+def build_item_item_model(top_k=None, view_days=None):
+    """
+    Rebuild and publish the model from the current interactions.
+
+    Returns:
+        tuple: (version, recipes in the model)
+    """
+    item_ids, matrix = interaction_matrix(interactions(view_days))
+    indptr, indices, scores = item_neighbours(matrix, top_k)
+    return save_model(item_ids, indptr, indices, scores), len(item_ids)
+
+
+def recent_history(user, limit=None):
+    """
+    {recipe_id: weight} of the user's latest recipes across every signal.
+
+    One small indexed query per signal; the strongest signal per recipe wins.
+    """
+    limit = limit or COLLABORATIVE_SETTINGS['RECENT_ITEMS']
+    signals = [
+        (LikedRecipe.objects.filter(user=user).order_by('-liked_at').values_list('recipe_id', flat=True),
+         lambda _: WEIGHTS['like']),
+        (FavoriteRecipe.objects.filter(user=user).order_by('-added_at').values_list('recipe_id', flat=True),
+         lambda _: WEIGHTS['favorite']),
+        (Rating.objects.filter(user=user).order_by('-created_at').values_list('recipe_id', 'value'),
+         lambda row: rating_weight(row[1])),
+        (RecipeView.objects.filter(user=user).order_by('-viewed_at').values_list('recipe_id', 'interaction_type'),
+         lambda row: WEIGHTS[INTERACTION_SIGNALS.get(row[1], 'view')]),
+        (AnalyticsRecipeView.objects.filter(user=user).order_by('-viewed_at').values_list('recipe_id', flat=True),
+         lambda _: WEIGHTS['view']),
+    ]
+    history = {}
+    for queryset, weight in signals:
+        for row in queryset[:limit]:
+            recipe_id = row[0] if isinstance(row, tuple) else row
+            history[recipe_id] = max(history.get(recipe_id, 0.0), weight(row))
+    # Zero weights (e.g. a 2-star rating) add nothing but still keep the recipe out of the results
+    return history
+
+
+def recommend_for_user(user, limit=10, exclude=()):
+    """[(recipe_id, score)] for user, best first; empty without a model or history"""
+    model = get_model()
+    if model is None:
+        return []
+    return model.recommend(recent_history(user), limit, exclude)
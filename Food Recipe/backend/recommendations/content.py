@@ -0,0 +1,211 @@
+# recommendations/content.py
+"""
+Content-based "similar recipes" from sparse TF-IDF vectors.
+
+Each recipe becomes a bag of weighted terms: words of its title and
+description, canonical ingredient names, tags and category. The terms are
+TF-IDF weighted (sublinear tf) into a SciPy CSR matrix with unit-length rows,
+so cosine similarity is a sparse dot product. Neighbours are found
+BLOCK_SIZE rows at a time (block @ X.T), keeping only each row's TOP_K, so
+memory stays at one sparse block instead of an N x N matrix.
+
+rebuild_similar_recipes() (run nightly by the build_similar_recipes command)
+replaces the SimilarRecipe table, which /recipes/<id>/similar/ reads by
+(recipe, rank) without touching the LLM.
+
+Settings (all optional):
+    RECOMMENDATIONS_CONTENT = {
+        'TOP_K': 20,
+        'BLOCK_SIZE': 1000,
+        'MIN_SCORE': 0.05,
+        'MAX_DF': 0.5,
+        'FIELD_WEIGHTS': {'title': 2.0, 'description': 1.0, 'ingredient': 3.0, 'tag': 2.0, 'category': 1.5},
+    }
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from recipe.models import Ingredient, Recipe
+from .models import SimilarRecipe
+
+CONTENT_SETTINGS = {
+    'TOP_K': 20,
+    'BLOCK_SIZE': 1000,
+    'MIN_SCORE': 0.05,
+    # Terms in more than this share of recipes carry no signal and densify the products
+    'MAX_DF': 0.5,
+    'FIELD_WEIGHTS': {'title': 2.0, 'description': 1.0, 'ingredient': 3.0, 'tag': 2.0, 'category': 1.5},
+    **getattr(settings, 'RECOMMENDATIONS_CONTENT', {}),
+}
+FIELD_WEIGHTS = CONTENT_SETTINGS['FIELD_WEIGHTS']
+
+STOP_WORDS = frozenset("""
+    a about an and are as at be but by for from has have in into is it its of on or our so that the
+    their then this to was were will with you your recipe recipes delicious easy perfect best make
+""".split())
+
+# Preparation words dropped from ingredient names ("2 large onions, finely chopped" -> "onion")
+INGREDIENT_NOISE = frozenset("""
+    chopped diced minced sliced grated crushed peeled fresh freshly dried large small medium finely
+    roughly thinly cup cups tbsp tsp tablespoon tablespoons teaspoon teaspoons g kg ml l oz lb pinch
+    of to taste optional
+""".split())
+
+_WORD = re.compile(r'[^\W\d_]+')
+
+
+def words(text):
+    return [word for word in _WORD.findall((text or '').lower()) if len(word) > 1 and word not in STOP_WORDS]
+
+
+def singular(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def canonical_ingredient(name):
+    """Lower-cased, singular ingredient name without amounts, notes or preparation words"""
+    name = re.sub(r'\(.*?\)', ' ', (name or '').lower()).split(',')[0]
+    return ' '.join(singular(word) for word in _WORD.findall(name) if word not in INGREDIENT_NOISE)
+
+
+def recipe_documents():
+    """
+    Weighted terms of every recipe, from three streaming queries.
+
+    Returns:
+        dict: {recipe_id: Counter(term -> summed field weight)}
+    """
+    docs = {}
+    recipes = Recipe.objects.values_list('id', 'title', 'description', 'category__name').order_by()
+    for recipe_id, title, description, category in recipes.iterator(chunk_size=2000):
+        terms = docs[recipe_id] = Counter()
+        for word in words(title):
+            terms[word] += FIELD_WEIGHTS['title']
+        for word in words(description):
+            terms[word] += FIELD_WEIGHTS['description']
+        if category:
+            terms[f'category:{category.lower()}'] += FIELD_WEIGHTS['category']
+
+    ingredients = Ingredient.objects.values_list('recipe_id', 'name').order_by()
+    for recipe_id, name in ingredients.iterator(chunk_size=5000):
+        canonical = canonical_ingredient(name)
+        if canonical and recipe_id in docs:
+            # The full name, plus its head noun so "red onion" still matches "onion"
+            docs[recipe_id][f'ingredient:{canonical}'] += FIELD_WEIGHTS['ingredient']
+            head = canonical.rsplit(' ', 1)[-1]
+            if head != canonical:
+                docs[recipe_id][f'ingredient:{head}'] += FIELD_WEIGHTS['ingredient'] / 2
+
+    tags = Recipe.tags.through.objects.values_list('recipe_id', 'tag__name').order_by()
+    for recipe_id, tag in tags.iterator(chunk_size=5000):
+        if recipe_id in docs:
+            docs[recipe_id][f'tag:{tag.lower()}'] += FIELD_WEIGHTS['tag']
+    return docs
+
+
+def tfidf_matrix(docs, max_df=None):
+    """
+    L2-normalized TF-IDF rows for docs.
+
+    Terms found in a single recipe are dropped (they can't make two recipes
+    similar), as are terms in more than max_df of them.
+
+    Returns:
+        tuple: (ndarray of recipe ids, CSR matrix with one row per id)
+    """
+    max_df = CONTENT_SETTINGS['MAX_DF'] if max_df is None else max_df
+    n = len(docs)
+    df = Counter(term for terms in docs.values() for term in terms)
+    vocabulary = {}
+    for term, count in df.items():
+        if 2 <= count <= max(max_df * n, 2):
+            vocabulary[term] = len(vocabulary)
+    idf = np.empty(len(vocabulary), dtype=np.float32)
+    for term, column in vocabulary.items():
+        idf[column] = math.log((1 + n) / (1 + df[term])) + 1
+
+    indptr, indices, data = [0], [], []
+    for terms in docs.values():
+        for term, weight in terms.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                data.append(1 + math.log(weight) if weight > 1 else weight)
+        indptr.append(len(indices))
+
+    indices = np.array(indices, dtype=np.int32)
+    data = np.array(data, dtype=np.float32) * idf[indices]
+    matrix = sparse.csr_matrix((data, indices, np.array(indptr, dtype=np.int64)), shape=(n, len(vocabulary)))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sparse.diags(1 / norms).astype(np.float32) @ matrix
+    return np.fromiter(docs, dtype=np.int64, count=n), matrix.tocsr()
+
+
+def top_k_neighbours(matrix, top_k, block_size=None, min_score=None):
+    """
+    Yield (row, neighbour rows, scores) for every row, best first, excluding itself.
+
+    Similarities are computed one block of rows at a time, so the peak is a
+    block_size x N sparse product rather than N x N.
+    """
+    block_size = block_size or CONTENT_SETTINGS['BLOCK_SIZE']
+    min_score = CONTENT_SETTINGS['MIN_SCORE'] if min_score is None else min_score
+    transposed = matrix.T.tocsr()
+    for start in range(0, matrix.shape[0], block_size):
+        block = (matrix[start:start + block_size] @ transposed).tocsr()
+        for offset in range(block.shape[0]):
+            row = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            columns, scores = block.indices[lo:hi], block.data[lo:hi]
+            keep = (columns != row) & (scores >= min_score)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                columns, scores = columns[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            yield row, columns[order], scores[order]
+
+
+def rebuild_similar_recipes(top_k=None, block_size=None, batch_size=5000):
+    """
+    Recompute every recipe's neighbours and replace SimilarRecipe in one transaction.
+
+    Returns:
+        int: rows written.
+    """
+    top_k = top_k or CONTENT_SETTINGS['TOP_K']
+    ids, matrix = tfidf_matrix(recipe_documents())
+    computed_at = timezone.now()
+    written = 0
+    with transaction.atomic():
+        # Readers keep seeing the previous neighbours until the commit
+        SimilarRecipe.objects.all().delete()
+        batch = []
+        for row, columns, scores in top_k_neighbours(matrix, top_k, block_size):
+            recipe_id = int(ids[row])
+            for rank, (column, score) in enumerate(zip(columns.tolist(), scores.tolist()), 1):
+                batch.append(SimilarRecipe(
+                    recipe_id=recipe_id, similar_recipe_id=int(ids[column]),
+                    rank=rank, score=score, computed_at=computed_at,
+                ))
+            if len(batch) >= batch_size:
+                SimilarRecipe.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        SimilarRecipe.objects.bulk_create(batch)
+        written += len(batch)
+    return written
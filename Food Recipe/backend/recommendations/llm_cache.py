@@ -0,0 +1,272 @@
+# recommendations/llm_cache.py
+"""
+Content-addressed cache of LLM responses.
+
+A request is keyed by the SHA-256 of its model, messages (whitespace-
+normalized), max_tokens, temperature and top_p, so the same prompt from any
+caller maps to the same entry. Lookups go through two tiers:
+
+- an in-process LRU of MEMORY_ENTRIES responses, each with its expiry (a
+  response loaded from the table keeps the row's remaining lifetime);
+- the LLMResponse table, which survives restarts and is shared by every
+  process. Every PRUNE_EVERY writes, expired rows are deleted and the least
+  recently used ones beyond STORE_ENTRIES are evicted.
+
+Concurrent misses on one key are single-flighted per process: the first
+caller makes the upstream request and the others wait for its result.
+Only successful responses (non-empty choices) are stored. stats() reports
+hits per tier, misses, coalesced waits and evictions.
+
+Settings (all optional):
+    RECOMMENDATIONS_LLM_CACHE = {
+        'ENABLED': True,
+        'TTL_SECONDS': 24 * 60 * 60,
+        'MEMORY_ENTRIES': 256,
+        'STORE_ENTRIES': 20000,
+        'PRUNE_EVERY': 100,
+        'WAIT_SECONDS': 60,          # longest a follower waits for the leader's call
+        'TOUCH_INTERVAL_SECONDS': 3600,
+    }
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .models import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TTL_SECONDS': 24 * 60 * 60,
+    'MEMORY_ENTRIES': 256,
+    'STORE_ENTRIES': 20000,
+    'PRUNE_EVERY': 100,
+    'WAIT_SECONDS': 60,
+    'TOUCH_INTERVAL_SECONDS': 3600,
+    **getattr(settings, 'RECOMMENDATIONS_LLM_CACHE', {}),
+}
+
+
+def normalize_messages(messages):
+    """Role and whitespace-collapsed content of each message"""
+    return [
+        {'role': message.get('role', ''), 'content': ' '.join(str(message.get('content', '')).split())}
+        for message in messages
+    ]
+
+
+def request_key(model, messages, max_tokens, temperature, top_p=None):
+    payload = json.dumps(
+        {
+            'model': model,
+            'messages': normalize_messages(messages),
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'top_p': top_p,
+        },
+        sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable(response):
+    choices = response.get('choices') if isinstance(response, dict) else None
+    return bool(choices) and bool((choices[0].get('message') or {}).get('content'))
+
+
+class _Flight:
+    """One in-progress upstream call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class LLMResponseCache:
+    """Memory LRU in front of the LLMResponse table, with per-process single-flight"""
+
+    def __init__(self, ttl_seconds, memory_entries, store_entries, prune_every, wait_seconds, touch_interval):
+        self.ttl = ttl_seconds
+        self.memory_entries = memory_entries
+        self.store_entries = store_entries
+        self.prune_every = prune_every
+        self.wait_seconds = wait_seconds
+        self.touch_interval = timedelta(seconds=touch_interval)
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.writes = 0
+        self.errors = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (expires monotonic, response)
+        self._flights = {}
+
+    def get_or_call(self, key, model, call, ttl=None):
+        """
+        Cached response for key, else call() once (per process) and store it.
+
+        Args:
+            key (str): request_key() of the request.
+            model (str): Model name, stored for inspection.
+            call (callable): Makes the upstream request and returns its JSON.
+            ttl (int): Seconds to keep this response. Defaults to TTL_SECONDS.
+        """
+        response = self._memory_get(key)
+        if response is not None:
+            self._count('memory_hits')
+            return response
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._count('coalesced')
+            if flight.done.wait(self.wait_seconds):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.response
+            # The leader is stuck; don't queue behind it forever
+            return call()
+
+        try:
+            stored = self._store_get(key)
+            if stored is not None:
+                self._count('store_hits')
+                response, expires_at = stored
+                self._memory_put(key, response, (expires_at - timezone.now()).total_seconds())
+            else:
+                self._count('misses')
+                response = call()
+                if is_cacheable(response):
+                    self._store_put(key, model, response, ttl or self.ttl)
+                self._memory_put(key, response, ttl or self.ttl)
+            flight.response = response
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def stats(self):
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            'pid': os.getpid(),
+            'memory_entries': len(self._memory),
+            'memory_capacity': self.memory_entries,
+            'memory_hits': self.memory_hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else 0,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._flights),
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'errors': self.errors,
+        }
+
+    def _count(self, counter, amount=1):
+        # Bumped from every request thread; returns the new value
+        with self._lock:
+            value = getattr(self, counter) + amount
+            setattr(self, counter, value)
+            return value
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires <= time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return response
+
+    def _memory_put(self, key, response, ttl):
+        if not is_cacheable(response) or ttl <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (time.monotonic() + ttl, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _store_get(self, key):
+        """(response, expires_at) of the key's live row, or None"""
+        now = timezone.now()
+        try:
+            entry = LLMResponse.objects.filter(key=key, expires_at__gt=now).only(
+                'response', 'last_used_at', 'expires_at'
+            ).first()
+            if entry is None:
+                return None
+            # Recency for LRU eviction, written at most once per touch interval
+            if now - entry.last_used_at >= self.touch_interval:
+                LLMResponse.objects.filter(key=key).update(last_used_at=now)
+            return entry.response, entry.expires_at
+        except DatabaseError as e:
+            self._count('errors')
+            logger.error(f"LLM cache lookup failed: {str(e)}")
+            return None
+
+    def _store_put(self, key, model, response, ttl):
+        now = timezone.now()
+        try:
+            LLMResponse.objects.update_or_create(
+                key=key,
+                defaults={
+                    'model': model, 'response': response, 'created_at': now,
+                    'last_used_at': now, 'expires_at': now + timedelta(seconds=ttl),
+                },
+            )
+            if self._count('writes') % self.prune_every == 0:
+                self.prune()
+        except DatabaseError as e:
+            self._count('errors')
+            logger.error(f"LLM cache write failed: {str(e)}")
+
+    def prune(self):
+        """Delete expired entries and the least recently used beyond STORE_ENTRIES"""
+        with transaction.atomic():
+            expired, _ = LLMResponse.objects.filter(expires_at__lte=timezone.now()).delete()
+            cutoff = (
+                LLMResponse.objects.order_by('-last_used_at')
+                .values_list('last_used_at', flat=True)[self.store_entries:self.store_entries + 1]
+                .first()
+            )
+            evicted = LLMResponse.objects.filter(last_used_at__lte=cutoff).delete()[0] if cutoff else 0
+        self._count('evictions', expired + evicted)
+        return expired + evicted
+
+
+llm_cache = LLMResponseCache(
+    ttl_seconds=LLM_CACHE_SETTINGS['TTL_SECONDS'],
+    memory_entries=LLM_CACHE_SETTINGS['MEMORY_ENTRIES'],
+    store_entries=LLM_CACHE_SETTINGS['STORE_ENTRIES'],
+    prune_every=LLM_CACHE_SETTINGS['PRUNE_EVERY'],
+    wait_seconds=LLM_CACHE_SETTINGS['WAIT_SECONDS'],
+    touch_interval=LLM_CACHE_SETTINGS['TOUCH_INTERVAL_SECONDS'],
+)
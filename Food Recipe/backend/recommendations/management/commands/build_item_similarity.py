@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recommendations.collaborative import COLLABORATIVE_SETTINGS, MODEL_DIR, build_item_item_model
+
+
+class Command(BaseCommand):
+    help = 'Rebuild and publish the item-item collaborative filtering model (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=COLLABORATIVE_SETTINGS['TOP_K'],
+            help=f'Neighbours kept per recipe. Default: {COLLABORATIVE_SETTINGS["TOP_K"]}.',
+        )
+        parser.add_argument(
+            '--view-days',
+            type=int,
+            default=COLLABORATIVE_SETTINGS['VIEW_DAYS'],
+            help=f'Days of signed-in analytics views to include. Default: {COLLABORATIVE_SETTINGS["VIEW_DAYS"]}.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        version, recipes = build_item_item_model(options['top_k'], options['view_days'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Published item-item model {version} ({recipes} recipes) to {MODEL_DIR} '
+                f'in {time.monotonic() - started:.1f}s'
+            )
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recommendations.content import CONTENT_SETTINGS, rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Recompute every recipe\'s content-based top-K similar recipes (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=CONTENT_SETTINGS['TOP_K'],
+            help=f'Neighbours kept per recipe. Default: {CONTENT_SETTINGS["TOP_K"]}.',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=CONTENT_SETTINGS['BLOCK_SIZE'],
+            help=f'Recipes per similarity block (bounds memory). Default: {CONTENT_SETTINGS["BLOCK_SIZE"]}.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild_similar_recipes(options['top_k'], options['block_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {written} similar-recipe entries in {time.monotonic() - started:.1f}s')
+        )
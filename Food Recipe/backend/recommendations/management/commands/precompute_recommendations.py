@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from recommendations.precompute import (
+    PRECOMPUTE_SETTINGS, CHECKPOINT_FILE, active_user_ids, clear_checkpoint, precompute, read_checkpoint
+)
+
+
+class Command(BaseCommand):
+    help = 'Precompute personalized recommendations for recently active users (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--active-days',
+            type=int,
+            default=PRECOMPUTE_SETTINGS['ACTIVE_DAYS'],
+            help=f'Users with engagement in this many days. Default: {PRECOMPUTE_SETTINGS["ACTIVE_DAYS"]}.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=PRECOMPUTE_SETTINGS['WORKERS'],
+            help=f'Users refreshed concurrently. Default: {PRECOMPUTE_SETTINGS["WORKERS"]}.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PRECOMPUTE_SETTINGS['BATCH_SIZE'],
+            help=f'Users per checkpoint. Default: {PRECOMPUTE_SETTINGS["BATCH_SIZE"]}.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=PRECOMPUTE_SETTINGS['LIMIT'],
+            help=f'Recommendations per user. Default: {PRECOMPUTE_SETTINGS["LIMIT"]}.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Also refresh users whose recommendations are still fresh.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue an interrupted run from its checkpoint instead of starting over.',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be at least 1')
+
+        checkpoint = read_checkpoint() if options['resume'] else None
+        if options['resume'] and checkpoint is None:
+            self.stdout.write(f'No checkpoint at {CHECKPOINT_FILE}; starting a new run')
+        elif checkpoint:
+            self.stdout.write(f"Resuming run started {checkpoint['started_at']} after user {checkpoint['last_user_id']}")
+        else:
+            clear_checkpoint()
+
+        user_ids = active_user_ids(options['active_days'], include_fresh=options['force'])
+        self.stdout.write(f"Precomputing recommendations for {len(user_ids)} users with {options['workers']} workers")
+        started = time.monotonic()
+
+        def report(progress, total):
+            self.stdout.write(
+                f"  through user {progress['last_user_id']}: {progress['done']} done, {progress['failed']} failed "
+                f"({time.monotonic() - started:.0f}s)"
+            )
+
+        result = precompute(
+            user_ids, workers=options['workers'], batch_size=options['batch_size'],
+            limit=options['limit'], checkpoint=checkpoint, on_batch=report,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Precomputed recommendations for {result['done']} users ({result['failed']} failed) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recommendations", "0004_similar_recipes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airecommendation",
+            name="generated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="airecommendation",
+            name="source",
+            field=models.CharField(
+                choices=[
+                    ("ai", "AI"),
+                    ("collaborative", "Collaborative filtering"),
+                    ("popular", "Popular"),
+                ],
+                default="ai",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="airecommendation",
+            index=models.Index(
+                fields=["user", "-generated_at"], name="ai_rec_user_generated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recommendations", "0005_ai_recommendation_generated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMResponse",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("response", models.JSONField()),
+                ("created_at", models.DateTimeField()),
+                ("last_used_at", models.DateTimeField(db_index=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
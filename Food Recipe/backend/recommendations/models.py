@@ -55,15 +55,27 @@ class UserPreference(models.Model):
         return f"Preferences for {self.user.username}"
 
 class AIRecommendation(models.Model):
+    SOURCE_CHOICES = [
+        ('ai', 'AI'),
+        ('collaborative', 'Collaborative filtering'),
+        ('popular', 'Popular'),
+    ]
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='ai_recommendations')
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ai_recommendations')
     confidence_score = models.FloatField(default=0.0)  # AI confidence in recommendation
     reason = models.TextField(blank=True)  # Why this recipe was recommended
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='ai')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Run that last (re)produced this row; a user's current set is their latest run (see precompute.py)
+    generated_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ['user', 'recipe']
         ordering = ['-confidence_score', '-created_at']
+        indexes = [
+            models.Index(fields=['user', '-generated_at'], name='ai_rec_user_generated_idx'),
+        ]
 
 class IngredientSearchHistory(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='ingredient_searches', null=True, blank=True)
@@ -73,4 +85,28 @@ class IngredientSearchHistory(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
 
     class Meta:
-        ordering = ['-search_timestamp']
\ No newline at end of file
+        ordering = ['-search_timestamp']
+
+class SimilarRecipe(models.Model):
+    """Precomputed content-based neighbours of a recipe (see recommendations/content.py)"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='similar_entries')
+    similar_recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()  # cosine similarity of the TF-IDF vectors
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['recipe', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'rank'], name='unique_similar_recipe_rank'),
+        ]
+
+
+class LLMResponse(models.Model):
+    """Persistent tier of the LLM response cache (see recommendations/llm_cache.py)"""
+    key = models.CharField(max_length=64, primary_key=True)  # SHA-256 of the normalized request
+    model = models.CharField(max_length=100)
+    response = models.JSONField()
+    created_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,300 @@
+# recommendations/precompute.py
+"""
+Precomputed personalized recommendations.
+
+The LLM call behind DeepSeekAIService.get_recipe_recommendations() can take
+tens of seconds, so requests never make it. Instead each user's latest set is
+stored in AIRecommendation rows sharing one generated_at:
+
+- the precompute_recommendations command refreshes recently active users in
+  batches on a bounded thread pool (the work is waiting on the LLM), writing
+  a checkpoint after every batch so an interrupted run can --resume;
+- AIRecommendationsView serves the stored set immediately and, when it is
+  older than STALE_HOURS, hands the user to the in-process refresher, whose
+  background threads regenerate it. A lock in the shared default cache
+  (settings.CACHES) keeps one refresh per user in flight across processes.
+
+A user with nothing stored gets the fast collaborative/popular fallback
+synchronously, and an LLM refresh queued behind it.
+
+Settings (all optional):
+    RECOMMENDATIONS_PRECOMPUTE = {
+        'LIMIT': 12,
+        'STALE_HOURS': 24,
+        'ACTIVE_DAYS': 30,
+        'WORKERS': 4,
+        'BATCH_SIZE': 50,
+        'REFRESH_THREADS': 2,
+        'REFRESH_QUEUE_SIZE': 1000,
+        'REFRESH_LOCK_SECONDS': 600,
+    }
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from analytics.models import EngagementEvent
+from authentication.models import CustomUser
+from recipe.models import Recipe
+from .ai_service import DeepSeekAIService
+from .collaborative import MODEL_DIR
+from .models import AIRecommendation
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_SETTINGS = {
+    'LIMIT': 12,
+    'STALE_HOURS': 24,
+    'ACTIVE_DAYS': 30,
+    'WORKERS': 4,
+    'BATCH_SIZE': 50,
+    'REFRESH_THREADS': 2,
+    'REFRESH_QUEUE_SIZE': 1000,
+    'REFRESH_LOCK_SECONDS': 600,
+    **getattr(settings, 'RECOMMENDATIONS_PRECOMPUTE', {}),
+}
+STALE_AFTER = timedelta(hours=PRECOMPUTE_SETTINGS['STALE_HOURS'])
+
+CHECKPOINT_FILE = Path(getattr(
+    settings, 'RECOMMENDATIONS_PRECOMPUTE_CHECKPOINT', MODEL_DIR / 'precompute_checkpoint.json'
+))
+
+
+def store_recommendations(user, recommendations):
+    """
+    Upsert a new set for user under one generated_at; earlier rows stay as history.
+
+    Returns:
+        int: rows stored (unknown and repeated recipe ids are skipped).
+    """
+    by_recipe = {}
+    for rec in recommendations:
+        recipe_id = rec.get('recipe_id')
+        if recipe_id and recipe_id not in by_recipe:
+            by_recipe[recipe_id] = rec
+    existing = set(Recipe.objects.filter(id__in=list(by_recipe)).values_list('id', flat=True))
+    generated_at = timezone.now()
+    rows = [
+        AIRecommendation(
+            user=user, recipe_id=recipe_id,
+            confidence_score=float(rec.get('confidence_score') or 0.0),
+            reason=rec.get('reason') or '',
+            source=rec.get('source', 'ai'),
+            generated_at=generated_at,
+        )
+        for recipe_id, rec in by_recipe.items() if recipe_id in existing
+    ]
+    with transaction.atomic():
+        AIRecommendation.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['user', 'recipe'],
+            update_fields=['confidence_score', 'reason', 'source', 'generated_at'],
+        )
+    return len(rows)
+
+
+def generate_recommendations(user, limit=None):
+    """Ask the AI service (which falls back on its own) and store the result"""
+    limit = limit or PRECOMPUTE_SETTINGS['LIMIT']
+    return store_recommendations(user, DeepSeekAIService().get_recipe_recommendations(user, limit))
+
+
+def get_precomputed(user, limit):
+    """
+    The user's latest set, best first.
+
+    Returns:
+        tuple: ([AIRecommendation], generated_at or None)
+    """
+    rows = list(
+        AIRecommendation.objects.filter(user=user, generated_at__isnull=False)
+        .order_by('-generated_at', '-confidence_score')[:limit]
+    )
+    if not rows:
+        return [], None
+    # The latest run sorts first; rows after it are older history
+    generated_at = rows[0].generated_at
+    return [row for row in rows if row.generated_at == generated_at], generated_at
+
+
+def is_stale(generated_at):
+    return generated_at is None or timezone.now() - generated_at > STALE_AFTER
+
+
+def _refresh_lock_key(user_id):
+    return f'recommendations:refresh:{user_id}'
+
+
+def refresh_user(user_id, limit=None):
+    """Regenerate one user's set. Returns rows stored, or None if the user is gone."""
+    try:
+        user = CustomUser.objects.get(pk=user_id)
+    except CustomUser.DoesNotExist:
+        return None
+    return generate_recommendations(user, limit)
+
+
+class RecommendationRefresher:
+    """Bounded queue of user ids regenerated by a few background threads"""
+
+    def __init__(self, threads, max_size, lock_seconds):
+        self.threads = threads
+        self.max_size = max_size
+        self.lock_seconds = lock_seconds
+        self.queued = 0
+        self.dropped = 0
+        self.refreshed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def request_refresh(self, user_id):
+        """Queue user_id unless a refresh is already pending anywhere. Returns True if queued."""
+        if not cache.add(_refresh_lock_key(user_id), 1, self.lock_seconds):
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(user_id)
+        except queue.Full:
+            self._count('dropped')
+            cache.delete(_refresh_lock_key(user_id))
+            return False
+        self._count('queued')
+        return True
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'queued': self.queued,
+            'dropped': self.dropped,
+            'refreshed': self.refreshed,
+            'failed': self.failed,
+        }
+
+    def _count(self, counter):
+        # Bumped from request threads and every refresh thread
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _ensure_started(self):
+        # Start lazily, and again in each forked worker process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_size)
+            for index in range(self.threads):
+                threading.Thread(target=self._run, name=f'recommendation-refresh-{index}', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            user_id = self._queue.get()
+            close_old_connections()
+            try:
+                refresh_user(user_id)
+                self._count('refreshed')
+            except Exception as e:
+                # The lock stays until it expires, so a failing user isn't retried on every request
+                self._count('failed')
+                logger.error(f"Failed to refresh recommendations for user {user_id}: {str(e)}")
+                continue
+            cache.delete(_refresh_lock_key(user_id))
+
+
+refresher = RecommendationRefresher(
+    threads=PRECOMPUTE_SETTINGS['REFRESH_THREADS'],
+    max_size=PRECOMPUTE_SETTINGS['REFRESH_QUEUE_SIZE'],
+    lock_seconds=PRECOMPUTE_SETTINGS['REFRESH_LOCK_SECONDS'],
+)
+
+
+def active_user_ids(active_days=None, include_fresh=False):
+    """Sorted ids of users with engagement in the last active_days, minus those with a fresh set"""
+    active_days = active_days or PRECOMPUTE_SETTINGS['ACTIVE_DAYS']
+    now = timezone.now()
+    user_ids = set(
+        EngagementEvent.objects.filter(created_at__gte=now - timedelta(days=active_days), user__isnull=False)
+        .values_list('user_id', flat=True).distinct().order_by()
+    )
+    if not include_fresh:
+        user_ids -= set(
+            AIRecommendation.objects.filter(generated_at__gte=now - STALE_AFTER)
+            .values_list('user_id', flat=True).distinct().order_by()
+        )
+    return sorted(user_ids)
+
+
+def read_checkpoint():
+    try:
+        return json.loads(CHECKPOINT_FILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_checkpoint(checkpoint):
+    CHECKPOINT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CHECKPOINT_FILE.with_name(CHECKPOINT_FILE.name + '.tmp')
+    tmp.write_text(json.dumps(checkpoint))
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def clear_checkpoint():
+    CHECKPOINT_FILE.unlink(missing_ok=True)
+
+
+def _refresh_in_worker(user_id, limit):
+    try:
+        return user_id, refresh_user(user_id, limit), None
+    except Exception as e:
+        return user_id, None, str(e)
+    finally:
+        # Pool threads each hold their own connection
+        connection.close()
+
+
+def precompute(user_ids, workers=None, batch_size=None, limit=None, checkpoint=None, on_batch=None):
+    """
+    Refresh user_ids (ascending) in batches on a pool of workers threads.
+
+    After each batch the checkpoint records the last user id done, so a rerun
+    with the same checkpoint skips everything up to it. The checkpoint is
+    cleared when the run completes.
+
+    Returns:
+        dict: the final checkpoint counters.
+    """
+    workers = workers or PRECOMPUTE_SETTINGS['WORKERS']
+    batch_size = batch_size or PRECOMPUTE_SETTINGS['BATCH_SIZE']
+    checkpoint = checkpoint or {
+        'started_at': timezone.now().isoformat(), 'last_user_id': 0, 'done': 0, 'failed': 0,
+    }
+    pending = [user_id for user_id in user_ids if user_id > checkpoint['last_user_id']]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='precompute') as executor:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            for user_id, stored, error in executor.map(_refresh_in_worker, batch, [limit] * len(batch)):
+                if error is None:
+                    checkpoint['done'] += 1
+                else:
+                    checkpoint['failed'] += 1
+                    logger.error(f"Failed to precompute recommendations for user {user_id}: {error}")
+            checkpoint['last_user_id'] = batch[-1]
+            write_checkpoint(checkpoint)
+            if on_batch:
+                on_batch(checkpoint, len(pending))
+    clear_checkpoint()
+    return checkpoint
@@ -20,7 +20,7 @@ class AIRecommendationSerializer(serializers.ModelSerializer):
     recipe = RecipeListSerializer(read_only=True)
     class Meta:
         model = AIRecommendation
-        fields = ['recipe', 'confidence_score', 'reason', 'created_at']
+        fields = ['recipe', 'confidence_score', 'reason', 'source', 'created_at', 'generated_at']
 
 class IngredientSearchSerializer(serializers.Serializer):
     ingredients = serializers.ListField(
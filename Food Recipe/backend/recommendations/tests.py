@@ -1,3 +1,408 @@
-from django.test import TestCase
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import requests
+from django.test import SimpleTestCase
+from django.utils import timezone as django_timezone
+from scipy import sparse
+
+from backend.http_client import BulkheadFullError, CircuitOpenError, HTTPClient
+from . import collaborative
+from .collaborative import ItemItemModel, interaction_matrix, item_neighbours
+from .content import tfidf_matrix, top_k_neighbours
+from .llm_cache import LLMResponseCache, request_key
+
+
+def brute_force_neighbours(matrix, top_k, min_score):
+    """{row: [(neighbour, score)]} from the dense cosine matrix, best first"""
+    dense = matrix.toarray().astype(np.float64)
+    norms = np.linalg.norm(dense, axis=1)
+    norms[norms == 0] = 1
+    similarity = (dense / norms[:, None]) @ (dense / norms[:, None]).T
+    result = {}
+    for row in range(len(dense)):
+        candidates = [(column, similarity[row, column]) for column in range(len(dense))
+                      if column != row and similarity[row, column] >= min_score]
+        result[row] = sorted(candidates, key=lambda item: -item[1])[:top_k]
+    return result
+
+
+class TopKNeighboursTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.matrix = sparse.random(60, 40, density=0.15, format='csr', random_state=rng, dtype=np.float32)
+
+    def assertMatchesBruteForce(self, found, expected):
+        for row, pairs in expected.items():
+            columns, scores = found[row]
+            self.assertEqual(len(columns), len(pairs), f'row {row}')
+            np.testing.assert_allclose(scores, [score for _, score in pairs], rtol=1e-4, atol=1e-5)
+
+    def test_top_k_matches_brute_force_cosine(self):
+        norms = np.sqrt(np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        normalized = (sparse.diags(1 / norms) @ self.matrix).tocsr()
+        found = {
+            row: (columns, scores)
+            for row, columns, scores in top_k_neighbours(normalized, top_k=5, block_size=7, min_score=0.05)
+        }
+        self.assertEqual(sorted(found), list(range(60)))
+        self.assertMatchesBruteForce(found, brute_force_neighbours(self.matrix, 5, 0.05))
+        for row, (columns, _) in found.items():
+            self.assertNotIn(row, columns.tolist())
+
+    def test_item_neighbours_csr_matches_brute_force(self):
+        indptr, indices, scores = item_neighbours(self.matrix, top_k=4, min_score=0.01)
+        found = {row: (indices[indptr[row]:indptr[row + 1]], scores[indptr[row]:indptr[row + 1]]) for row in range(60)}
+        self.assertMatchesBruteForce(found, brute_force_neighbours(self.matrix, 4, 0.01))
+
+
+class TfidfMatrixTests(SimpleTestCase):
+    def test_rows_are_unit_length_and_rare_or_common_terms_dropped(self):
+        docs = {
+            10: Counter({'tomato': 2, 'onion': 1, 'salt': 1, 'unique': 1}),
+            20: Counter({'tomato': 1, 'salt': 1, 'rice': 1}),
+            30: Counter({'onion': 1, 'salt': 1, 'rice': 1}),
+            40: Counter({'salt': 1, 'beans': 1}),
+        }
+        ids, matrix = tfidf_matrix(docs, max_df=0.6)
+        self.assertEqual(ids.tolist(), [10, 20, 30, 40])
+        # 'unique' is in one recipe, 'salt' in all four (> 60%); 'tomato', 'onion', 'rice' remain
+        self.assertEqual(matrix.shape[1], 3)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        np.testing.assert_allclose(norms[:3], 1, rtol=1e-5)
+        self.assertEqual(norms[3], 0)
+
+
+class ItemItemModelTests(SimpleTestCase):
+    def test_interaction_matrix_sums_repeats_and_drops_non_positive(self):
+        item_ids, matrix = interaction_matrix([
+            (1, 300, 1.0), (1, 300, 2.0), (2, 100, 4.0), (2, 300, 0.0), (3, 200, -1.0),
+        ])
+        self.assertEqual(item_ids.tolist(), [100, 300])
+        self.assertEqual(matrix.shape, (2, 2))
+        self.assertEqual(matrix[1, 0], 3.0)
+        self.assertEqual(matrix.nnz, 2)
+
+    def model(self):
+        # Users 1-3 pair recipe 100 with 200; user 4 pairs 200 with 300
+        item_ids, matrix = interaction_matrix([
+            (1, 100, 1), (1, 200, 1), (2, 100, 1), (2, 200, 1), (3, 100, 1), (3, 200, 1),
+            (4, 200, 1), (4, 300, 1), (5, 400, 1),
+        ])
+        return ItemItemModel('test', item_ids, *item_neighbours(matrix, top_k=10, min_score=0.01))
+
+    def test_recommend_scores_neighbours_of_history(self):
+        model = self.model()
+        self.assertEqual([recipe_id for recipe_id, _ in model.neighbours(100)], [200])
+        recommended = model.recommend({100: 1.0}, limit=5)
+        self.assertEqual([recipe_id for recipe_id, _ in recommended], [200])
+        recommended = model.recommend({100: 1.0, 200: 1.0}, limit=5)
+        self.assertEqual([recipe_id for recipe_id, _ in recommended], [300])
+
+    def test_recommend_excludes_and_ignores_unknown(self):
+        model = self.model()
+        self.assertEqual(model.recommend({200: 1.0}, limit=5, exclude=[100]), [(300, model.neighbours(200)[1][1])])
+        self.assertEqual(model.recommend({999: 1.0}, limit=5), [])
+        self.assertEqual(model.recommend({400: 1.0}, limit=5), [])
+        self.assertEqual(model.neighbours(999), [])
+
+
+class ModelArtifactTests(SimpleTestCase):
+    def setUp(self):
+        directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(mock.patch.object(collaborative, 'MODEL_DIR', directory))
+        self.enterContext(mock.patch.object(collaborative, 'CURRENT_FILE', directory / 'CURRENT'))
+        self.enterContext(mock.patch.object(collaborative, '_model', None))
+        self.enterContext(mock.patch.object(collaborative, '_checked_at', None))
+        self.enterContext(mock.patch.dict(collaborative.COLLABORATIVE_SETTINGS, {'RELOAD_SECONDS': 0, 'KEEP_VERSIONS': 2}))
+        self.directory = directory
+
+    def save(self, second, item_ids):
+        now = datetime(2026, 1, 1, 0, 0, second, tzinfo=dt_timezone.utc)
+        with mock.patch.object(collaborative.timezone, 'now', return_value=now):
+            return collaborative.save_model(
+                np.array(item_ids, dtype=np.int64), np.zeros(len(item_ids) + 1, dtype=np.int64),
+                np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32),
+            )
+
+    def test_no_model_until_one_is_saved(self):
+        self.assertIsNone(collaborative.get_model())
+
+    def test_round_trip_and_hot_swap(self):
+        first = self.save(1, [1, 2, 3])
+        model = collaborative.get_model()
+        self.assertEqual((model.version, model.item_ids.tolist()), (first, [1, 2, 3]))
+
+        second = self.save(2, [4, 5])
+        self.assertEqual(collaborative.current_version(), second)
+        swapped = collaborative.get_model()
+        self.assertEqual((swapped.version, swapped.item_ids.tolist()), (second, [4, 5]))
+
+    def test_old_versions_are_pruned(self):
+        versions = [self.save(second, [second]) for second in range(1, 5)]
+        kept = sorted(path.name for path in self.directory.glob('item_item-*.npz'))
+        self.assertEqual(kept, [collaborative.model_path(version).name for version in versions[-2:]])
+        self.assertFalse(list(self.directory.glob('*.tmp')))
+
+
+class LLMResponseCacheTests(SimpleTestCase):
+    RESPONSE = {'choices': [{'message': {'content': 'ok'}}]}
+
+    def setUp(self):
+        self.cache = LLMResponseCache(
+            ttl_seconds=60, memory_entries=2, store_entries=10, prune_every=10, wait_seconds=5, touch_interval=60,
+        )
+        # Memory tier and single-flight only; the LLMResponse table is exercised in production
+        self.enterContext(mock.patch.object(self.cache, '_store_get', return_value=None))
+        self.enterContext(mock.patch.object(self.cache, '_store_put'))
+
+    def test_key_ignores_whitespace_but_not_content(self):
+        messages = [{'role': 'user', 'content': 'Suggest  recipes\nwith rice'}]
+        same = [{'role': 'user', 'content': 'Suggest recipes with rice'}]
+        other = [{'role': 'user', 'content': 'Suggest recipes with beans'}]
+        key = request_key('model', messages, 100, 0.3, 0.9)
+        self.assertEqual(key, request_key('model', same, 100, 0.3, 0.9))
+        self.assertNotEqual(key, request_key('model', other, 100, 0.3, 0.9))
+        self.assertNotEqual(key, request_key('model', messages, 200, 0.3, 0.9))
+
+    def test_concurrent_misses_make_one_call(self):
+        calls = []
+        start = threading.Barrier(10)
+
+        def call():
+            calls.append(1)
+            time.sleep(0.2)
+            return self.RESPONSE
+
+        def worker(results):
+            start.wait()
+            results.append(self.cache.get_or_call('key', 'model', call))
+
+        results = []
+        threads = [threading.Thread(target=worker, args=(results,)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [self.RESPONSE] * 10)
+        self.assertEqual(self.cache.stats()['coalesced'], 9)
+
+        self.assertEqual(self.cache.get_or_call('key', 'model', call), self.RESPONSE)
+        self.assertEqual((len(calls), self.cache.memory_hits), (1, 1))
+
+    def test_leader_error_reaches_followers_and_is_not_cached(self):
+        leader_started = threading.Event()
+
+        def failing():
+            leader_started.set()
+            time.sleep(0.2)
+            raise RuntimeError('upstream down')
+
+        errors = []
+
+        def follower():
+            leader_started.wait()
+            try:
+                self.cache.get_or_call('key', 'model', lambda: self.RESPONSE)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=follower)
+        thread.start()
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_call('key', 'model', failing)
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.cache.get_or_call('key', 'model', lambda: self.RESPONSE), self.RESPONSE)
+
+    def test_store_hit_keeps_the_row_expiry(self):
+        expires_at = django_timezone.now() + timedelta(seconds=60)
+        with mock.patch.object(self.cache, '_store_get', return_value=(self.RESPONSE, expires_at)):
+            self.assertEqual(self.cache.get_or_call('key', 'model', lambda: None, ttl=7 * 24 * 3600), self.RESPONSE)
+        memory_expires, _ = self.cache._memory['key']
+        self.assertAlmostEqual(memory_expires - time.monotonic(), 60, delta=2)
+        self.assertEqual((self.cache.store_hits, self.cache.misses), (1, 0))
+
+    def test_expired_store_hit_is_not_kept_in_memory(self):
+        expires_at = django_timezone.now() - timedelta(seconds=1)
+        with mock.patch.object(self.cache, '_store_get', return_value=(self.RESPONSE, expires_at)):
+            self.cache.get_or_call('key', 'model', lambda: None)
+        self.assertNotIn('key', self.cache._memory)
+
+    def test_memory_tier_is_lru_bounded(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.get_or_call(key, 'model', lambda: self.RESPONSE)
+        self.assertEqual(list(self.cache._memory), ['b', 'c'])
+
+
+class StubUpstream(BaseHTTPRequestHandler):
+    """
+    Local stand-in for OpenRouter/Fapshi.
+
+    /ok answers 200, /down 503, /slow sleeps 0.5s first, /truncated breaks off
+    a chunked body and /flaky fails with 503 until it has been called
+    server.flaky_failures times.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.handle_path()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.handle_path()
+
+    def handle_path(self):
+        server = self.server
+        with server.lock:
+            server.calls[self.path] = server.calls.get(self.path, 0) + 1
+            server.clients.add(self.client_address)
+            calls = server.calls[self.path]
+        if self.path == '/slow':
+            time.sleep(0.5)
+        if self.path == '/truncated':
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self.wfile.write(b'zz\r\n')
+            return
+        failing = self.path == '/down' or (self.path == '/flaky' and calls <= server.flaky_failures)
+        body = b'{}'
+        self.send_response(503 if failing else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPClientTests(SimpleTestCase):
+    """backend.http_client against a local stub server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubUpstream)
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.calls = {}
+        self.server.clients = set()
+        self.server.flaky_failures = 2
+
+    def http_client(self, **config):
+        return HTTPClient(default={'BACKOFF_BASE': 0.01, 'BACKOFF_MAX': 0.02, **config})
+
+    def test_connections_are_reused(self):
+        client = self.http_client()
+        for _ in range(5):
+            self.assertEqual(client.get(f'{self.base_url}/ok').status_code, 200)
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_idempotent_requests_are_retried(self):
+        client = self.http_client(RETRIES=2)
+        response = client.post(f'{self.base_url}/flaky', json={}, idempotent=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.calls['/flaky'], 3)
+        self.assertEqual(client.stats()[client.upstream(self.base_url).name]['retries'], 2)
+
+    def test_retries_are_bounded(self):
+        client = self.http_client(RETRIES=2)
+        response = client.get(f'{self.base_url}/down')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.calls['/down'], 3)
+
+    def test_non_idempotent_posts_are_not_retried(self):
+        response = self.http_client(RETRIES=2).post(f'{self.base_url}/down', json={})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.calls['/down'], 1)
+
+    def test_connect_errors_are_retried_for_posts(self):
+        with ThreadingHTTPServer(('127.0.0.1', 0), StubUpstream) as closed:
+            url = f'http://127.0.0.1:{closed.server_port}/ok'
+        client = self.http_client(RETRIES=2, FAILURE_THRESHOLD=10)
+        with self.assertRaises(requests.ConnectionError):
+            client.post(url, json={})
+        self.assertEqual(client.upstream(url).retries, 2)
+
+    def test_read_timeouts_are_not_retried_without_retry_timeouts(self):
+        client = self.http_client(RETRIES=2, READ_TIMEOUT=0.1, RETRY_TIMEOUTS=False)
+        with self.assertRaises(requests.Timeout):
+            client.post(f'{self.base_url}/slow', json={}, idempotent=True)
+        self.assertEqual(self.server.calls['/slow'], 1)
+
+    def test_deadline_caps_total_time_across_retries(self):
+        client = self.http_client(RETRIES=5, READ_TIMEOUT=0.2, DEADLINE=0.3, FAILURE_THRESHOLD=10)
+        started = time.monotonic()
+        with self.assertRaises(requests.Timeout):
+            client.get(f'{self.base_url}/slow')
+        self.assertLess(time.monotonic() - started, 0.45)
+        self.assertLessEqual(self.server.calls['/slow'], 2)
+
+    def test_breaker_fails_fast_then_recovers(self):
+        client = self.http_client(RETRIES=0, FAILURE_THRESHOLD=2, RECOVERY_SECONDS=0.2)
+        for _ in range(2):
+            client.get(f'{self.base_url}/down')
+        started = time.monotonic()
+        with self.assertRaises(CircuitOpenError):
+            client.get(f'{self.base_url}/ok')
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertNotIn('/ok', self.server.calls)
+
+        time.sleep(0.25)
+        self.assertEqual(client.get(f'{self.base_url}/ok').status_code, 200)
+        self.assertEqual(client.upstream(self.base_url).breaker.state, 'closed')
+
+    def test_other_request_errors_end_the_half_open_trial(self):
+        client = self.http_client(RETRIES=0, FAILURE_THRESHOLD=1, RECOVERY_SECONDS=0.1)
+        breaker = client.upstream(self.base_url).breaker
+        client.get(f'{self.base_url}/down')
+        time.sleep(0.15)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            client.get(f'{self.base_url}/truncated')
+        self.assertEqual((breaker.state, breaker._trial_running), ('open', False))
+
+        time.sleep(0.15)
+        self.assertEqual(client.get(f'{self.base_url}/ok').status_code, 200)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_open_breaker_is_a_request_exception(self):
+        # Callers' existing `except requests.RequestException` fallbacks must catch it
+        client = self.http_client(RETRIES=0, FAILURE_THRESHOLD=1, RECOVERY_SECONDS=60)
+        client.get(f'{self.base_url}/down')
+        with self.assertRaises(requests.RequestException):
+            client.get(f'{self.base_url}/ok')
+
+    def test_bulkhead_rejects_beyond_max_concurrent(self):
+        client = self.http_client(MAX_CONCURRENT=1, ACQUIRE_TIMEOUT=0)
+        slow = threading.Thread(target=client.get, args=(f'{self.base_url}/slow',))
+        slow.start()
+        while not self.server.calls.get('/slow'):
+            time.sleep(0.01)
+        with self.assertRaises(BulkheadFullError):
+            client.get(f'{self.base_url}/ok')
+        slow.join()
+        self.assertEqual(client.get(f'{self.base_url}/ok').status_code, 200)
+        self.assertEqual(client.upstream(self.base_url).rejected_full, 1)
@@ -15,6 +15,12 @@ urlpatterns = [
     path('ingredient-search/', views.IngredientBasedSearchView.as_view(), name='ingredient-search'),
     path('ingredient-search/history/', views.get_ingredient_search_history, name='search-history'),
     
+    # Content-based similar recipes (precomputed)
+    path('recipes/<int:recipe_id>/similar/', views.SimilarRecipesView.as_view(), name='similar-recipes'),
+    
     # Tracking
     path('recommendations/track-view/<int:recipe_id>/', views.track_recipe_view, name='track-recipe-view'),
+    
+    # LLM response cache metrics (staff)
+    path('llm-cache/stats/', views.LLMCacheStatsView.as_view(), name='llm-cache-stats'),
 ]
\ No newline at end of file
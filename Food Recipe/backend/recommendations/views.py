@@ -3,10 +3,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg, Q
+from django.db.models import Avg, Count, Q
 from django.utils import timezone
-from .models import UserPreference, RecipeView, AIRecommendation, IngredientSearchHistory
+from .models import UserPreference, RecipeView, AIRecommendation, IngredientSearchHistory, LLMResponse, SimilarRecipe
+from recipe.counters import counter_totals, prefetch_with_counters
 from recipe.models import Recipe
+from recipe.serializers import RecipeListSerializer
 from .serializers import (
     UserPreferenceSerializer, 
     RecipeViewSerializer, 
@@ -15,6 +17,8 @@ from .serializers import (
     IngredientSearchResultSerializer
 )
 from .ai_service import DeepSeekAIService
+from .llm_cache import llm_cache
+from .precompute import PRECOMPUTE_SETTINGS, get_precomputed, is_stale, refresher, store_recommendations
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,67 +55,49 @@ class AIRecommendationsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        """Get AI-powered recipe recommendations for the user"""
+        """
+        Get the user's precomputed recommendations (see recommendations/precompute.py).
+        Stale sets are served as-is and refreshed in the background.
+        """
         try:
-            limit = int(request.query_params.get('limit', 10))
-            limit = min(limit, 20)  # Cap at 20 to avoid performance issues
-            
-            logger.info(f"[AIRecommendationsView] Getting recommendations for user {request.user.id}")
-            
-            ai_service = DeepSeekAIService()
-            
-            # Get AI recommendations
-            ai_recommendations = ai_service.get_recipe_recommendations(request.user, limit)
-            logger.info(f"[AIRecommendationsView] Got {len(ai_recommendations)} AI recommendations")
-            
-            recommended_recipes = []
-            
-            for rec in ai_recommendations:
-                try:
-                    recipe_id = rec.get('recipe_id')
-                    if not recipe_id:
-                        logger.warning(f"[AIRecommendationsView] No recipe_id in recommendation: {rec}")
-                        continue
-                        
-                    recipe = Recipe.objects.get(id=recipe_id)
-                    
-                    # Store AI recommendation in database
-                    ai_rec, created = AIRecommendation.objects.get_or_create(
-                        user=request.user,
-                        recipe=recipe,
-                        defaults={
-                            'confidence_score': rec.get('confidence_score', 0.0),
-                            'reason': rec.get('reason', 'AI recommendation')
-                        }
-                    )
-                    
-                    # Update if not created
-                    if not created:
-                        ai_rec.confidence_score = rec.get('confidence_score', ai_rec.confidence_score)
-                        ai_rec.reason = rec.get('reason', ai_rec.reason)
-                        ai_rec.save()
-                    
-                    recommended_recipes.append(recipe)
-                    
-                except Recipe.DoesNotExist:
-                    logger.warning(f"[AIRecommendationsView] Recipe {recipe_id} not found")
-                    continue
-                except Exception as e:
-                    logger.error(f"[AIRecommendationsView] Error processing recommendation {rec}: {str(e)}")
-                    continue
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 20)  # Cap at 20
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            rows, generated_at = get_precomputed(request.user, limit)
+            if not rows:
+                # First visit: fast picks now, the AI ones in the background
+                logger.info(f"[AIRecommendationsView] No precomputed recommendations for user {request.user.id}")
+                store_recommendations(
+                    request.user,
+                    DeepSeekAIService().fallback_recommendations(request.user, PRECOMPUTE_SETTINGS['LIMIT'])
+                )
+                rows, generated_at = get_precomputed(request.user, limit)
+                refresher.request_refresh(request.user.id)
+            stale = is_stale(generated_at)
+            if stale:
+                refresher.request_refresh(request.user.id)
             
-            # If no AI recommendations worked, fallback to recent recipes
-            if not recommended_recipes:
-                logger.info("[AIRecommendationsView] No AI recommendations found, using fallback")
-                viewed_recipe_ids = RecipeView.objects.filter(user=request.user).values_list('recipe_id', flat=True)
-                recommended_recipes = Recipe.objects.exclude(id__in=viewed_recipe_ids)[:limit]
+            # Recipes with their list annotations in one query
+            recipes = Recipe.objects.filter(id__in=[row.recipe_id for row in rows]).select_related(
+                'author', 'category'
+            ).annotate(
+                average_rating=Avg('ratings__value'),
+                rating_count=Count('ratings', distinct=True),
+                like_count=Count('likes', distinct=True),
+                **counter_totals('likes', 'favorites')
+            ).in_bulk()
+            for row in rows:
+                row.recipe = recipes[row.recipe_id]
             
-            logger.info(f"[AIRecommendationsView] Returning {len(recommended_recipes)} recipes")
-            serializer = RecipeViewSerializer(recommended_recipes, many=True)
+            serializer = AIRecommendationSerializer(rows, many=True, context={'request': request})
             return Response({
                 'recommendations': serializer.data,
-                'total_count': len(recommended_recipes),
-                'ai_powered': len(ai_recommendations) > 0
+                'total_count': len(rows),
+                'ai_powered': any(row.source == 'ai' for row in rows),
+                'generated_at': generated_at,
+                'stale': stale,
             })
             
         except Exception as e:
@@ -219,7 +205,9 @@ def track_recipe_view(request, recipe_id):
 def get_recommendation_history(request):
     """Get user's recommendation history"""
     try:
-        recommendations = AIRecommendation.objects.filter(user=request.user).order_by('-created_at')[:20]
+        recommendations = AIRecommendation.objects.filter(user=request.user).prefetch_related(
+            prefetch_with_counters('recipe', 'likes', 'favorites')
+        ).order_by('-created_at')[:20]
         serializer = AIRecommendationSerializer(recommendations, many=True)
         return Response(serializer.data)
     except Exception as e:
@@ -251,4 +239,51 @@ def get_ingredient_search_history(request):
         return Response(
             {'error': 'Failed to get search history'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+class SimilarRecipesView(APIView):
+    """
+    Content-based neighbours of a recipe, best first, from the SimilarRecipe
+    table that build_similar_recipes precomputes (no AI call).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, recipe_id):
+        get_object_or_404(Recipe.objects.only('id'), id=recipe_id)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        entries = list(
+            SimilarRecipe.objects.filter(recipe_id=recipe_id).order_by('rank')
+            .values_list('similar_recipe_id', 'score', 'computed_at')[:limit]
+        )
+        recipes = Recipe.objects.filter(id__in=[similar_id for similar_id, _, _ in entries]).select_related(
+            'author', 'category'
+        ).annotate(
+            average_rating=Avg('ratings__value'),
+            rating_count=Count('ratings', distinct=True),
+            like_count=Count('likes', distinct=True),
+            **counter_totals('likes', 'favorites')
+        ).in_bulk()
+        ranked = [recipes[similar_id] for similar_id, _, _ in entries if similar_id in recipes]
+        serializer = RecipeListSerializer(ranked, many=True, context={'request': request})
+        return Response({
+            'similar_recipes': serializer.data,
+            'scores': {similar_id: round(score, 3) for similar_id, score, _ in entries},
+            'computed_at': entries[0][2] if entries else None,
+        })
+
+
+class LLMCacheStatsView(APIView):
+    """Hit/miss counters of this worker's LLM response cache, plus the persistent store size"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            **llm_cache.stats(),
+            'store_entries': LLMResponse.objects.count(),
+            'store_capacity': llm_cache.store_entries,
+        })
@@ -20,10 +20,8 @@ class GuestSessionMiddleware:
         else:
             request.guest_session_key = None
 
-        # Create Django session for unauthenticated users if needed
-        user = getattr(request, 'user', None)
-        if (user is None or not getattr(user, 'is_authenticated', False)) and not request.session.session_key:
-            request.session.create()
+        # Guest carts create their Django session on demand (see shop/views.py);
+        # analytics uses the visitor ID cookie instead of a session.
 
         return self.get_response(request)
 